@@ -1,12 +1,14 @@
-import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.figure_factory as ff
 import seaborn as sns
 import matplotlib.pyplot as plt
 from scipy import stats
+from animation_builder import frame_aggregates, build_animation
+from comoments import accumulate_frame, correlation
+from flight_data import load_flights
+from payload_profiler import write_checked_html
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -14,7 +16,7 @@ print("🎨 CREATING ADVANCED VISUALIZATIONS")
 print("="*60)
 
 # Read the dataset
-df = pd.read_csv('airlines_flights_data.csv')
+df = load_flights()
 
 # 1. ADVANCED PRICE ANALYSIS WITH DISTRIBUTION FITTING
 print("📊 Creating Advanced Price Analysis...")
@@ -79,7 +81,7 @@ fig_price_advanced.update_layout(
     template='plotly_white',
     showlegend=True
 )
-fig_price_advanced.write_html('advanced_price_analysis.html')
+write_checked_html(fig_price_advanced, 'advanced_price_analysis.html')
 
 # 2. TIME SERIES AND TREND ANALYSIS
 print("⏰ Creating Time Series Analysis...")
@@ -149,7 +151,7 @@ fig_time_advanced.update_layout(
     title_text="Time Series and Trend Analysis",
     template='plotly_white'
 )
-fig_time_advanced.write_html('time_series_analysis.html')
+write_checked_html(fig_time_advanced, 'time_series_analysis.html')
 
 # 3. ADVANCED STATISTICAL ANALYSIS
 print("📈 Creating Advanced Statistical Analysis...")
@@ -166,8 +168,7 @@ fig_stats = make_subplots(
 )
 
 # Correlation matrix
-numeric_cols = ['price', 'duration', 'days_left']
-corr_matrix = df[numeric_cols].corr()
+corr_matrix = correlation(accumulate_frame(df, one_hot=['class', 'stops']))
 fig_stats.add_trace(
     go.Heatmap(z=corr_matrix.values, x=corr_matrix.columns, y=corr_matrix.columns,
                colorscale='RdBu', zmid=0),
@@ -207,7 +208,7 @@ fig_stats.update_layout(
     title_text="Advanced Statistical Analysis",
     template='plotly_white'
 )
-fig_stats.write_html('statistical_analysis.html')
+write_checked_html(fig_stats, 'statistical_analysis.html')
 
 # 4. INTERACTIVE FILTERING DASHBOARD
 print("🔍 Creating Interactive Filtering Dashboard...")
@@ -239,29 +240,26 @@ fig_interactive.update_layout(
     template='plotly_white',
     height=600
 )
-fig_interactive.write_html('interactive_filtering.html')
+write_checked_html(fig_interactive, 'interactive_filtering.html')
 
 # 5. ADVANCED ANIMATION
 print("🎬 Creating Advanced Animation...")
 
-# Create animated bubble chart
-fig_animated = px.scatter(
-    df.sample(5000),
-    x='price',
-    y='duration',
-    size='days_left',
-    color='airline',
-    hover_name='flight',
-    animation_frame='stops',
+# Create animated bubble chart (one bubble per flight number, aggregated per stops frame)
+animation_data = frame_aggregates(df, 'stops', 'airline', ['price', 'duration', 'days_left'],
+                                  key_col='flight', max_keys=300)
+fig_animated = build_animation(
+    animation_data, x='price', y='duration', size='days_left', text='flight',
     title='Animated Flight Analysis by Stops',
-    labels={'price': 'Price ($)', 'duration': 'Duration (hours)', 'days_left': 'Days Left'},
+    labels={'price': 'Price ($)', 'duration': 'Duration (hours)', 'days_left': 'Days Left',
+            'frame': 'stops', 'group': 'airline'},
     size_max=20
 )
 fig_animated.update_layout(
     template='plotly_white',
     title_font_size=20
 )
-fig_animated.write_html('animated_bubble_chart.html')
+write_checked_html(fig_animated, 'animated_bubble_chart.html')
 
 # 6. ADVANCED HEATMAPS
 print("🔥 Creating Advanced Heatmaps...")
@@ -314,7 +312,7 @@ fig_heatmaps.update_layout(
     title_text="Advanced Route Analysis Heatmaps",
     template='plotly_white'
 )
-fig_heatmaps.write_html('advanced_heatmaps.html')
+write_checked_html(fig_heatmaps, 'advanced_heatmaps.html')
 
 print("\n" + "="*60)
 print("🎉 ADVANCED VISUALIZATIONS COMPLETE!")
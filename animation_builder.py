@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from flight_data import CATEGORY_DOMAINS
+
+# Animation builder for the dashboard scripts.
+#
+# px.scatter(animation_frame=...) repeats every trace attribute (name, colour,
+# hovertemplate, legendgroup, ...) in every frame.  Here the per-frame values
+# are aggregated once with a single groupby, everything that does not change
+# between frames lives only in the base traces, and each frame carries just
+# the arrays that actually vary.  Frames are deltas against the base figure
+# (not against the previous frame) so the slider can still jump anywhere.
+
+FRAME_DURATION = 500
+
+
+def bin_frames(values, n_frames=None):
+    """Return (codes, labels) mapping each row to an animation frame.
+
+    Numeric columns with more distinct values than ``n_frames`` are cut into
+    ``n_frames`` equal-width bins, otherwise every distinct value is a frame.
+    Dataset categories come in their CATEGORY_DOMAINS order, anything else sorted.
+    """
+    values = pd.Series(values)
+    if values.name in CATEGORY_DOMAINS:
+        # Categorical axes follow the dataset's domain order (e.g. zero, one, two_or_more)
+        present = set(values.astype(object).unique())
+        domain = CATEGORY_DOMAINS[values.name]
+        uniques = [v for v in domain if v in present] + sorted(v for v in present if v not in domain)
+        return pd.Index(uniques).get_indexer(values.astype(object)), [str(v) for v in uniques]
+    uniques = np.sort(values.unique())
+    if n_frames is None or len(uniques) <= n_frames or not pd.api.types.is_numeric_dtype(values):
+        codes = np.searchsorted(uniques, values.to_numpy())
+        return codes, [str(v) for v in uniques]
+
+    edges = np.linspace(uniques[0], uniques[-1], n_frames + 1)
+    codes = np.clip(np.searchsorted(edges, values.to_numpy(), side='right') - 1, 0, n_frames - 1)
+    lows = np.ceil(edges[:-1]).astype(int)
+    highs = np.concatenate([np.ceil(edges[1:-1]).astype(int) - 1, [int(uniques[-1])]])
+    labels = [f"{lo}" if lo == hi else f"{lo}-{hi}" for lo, hi in zip(lows, highs)]
+    return codes, labels
+
+
+def frame_aggregates(df, frame_col, group_col, value_cols, key_col=None, agg='mean',
+                     n_frames=None, max_keys=None):
+    """Aggregate ``value_cols`` per (frame, group[, key]) in one groupby pass.
+
+    Returns a dict with the frame labels, the group names and, for every
+    (frame, group) pair, a dict of value arrays (one entry per key, or a single
+    entry when ``key_col`` is None).  Missing pairs are filled with empty arrays.
+    ``max_keys`` keeps only the most frequent keys of each (frame, group) pair.
+    """
+    codes, labels = bin_frames(df[frame_col], n_frames)
+    keys = [pd.Series(codes, index=df.index, name='_frame'), df[group_col]]
+    if key_col is not None:
+        keys.append(df[key_col])
+
+    grouper = df[value_cols].groupby(keys, observed=True, sort=True)
+    grouped = grouper.agg(agg)
+    counts = grouper.size().to_numpy() if max_keys is not None else None
+    groups = list(pd.unique(grouped.index.get_level_values(1)))
+    groups.sort()
+
+    frame_codes = grouped.index.get_level_values(0).to_numpy()
+    group_codes = pd.Categorical(grouped.index.get_level_values(1), categories=groups).codes
+    order = np.lexsort((group_codes, frame_codes))
+    flat = frame_codes[order] * len(groups) + group_codes[order]
+    bounds = np.searchsorted(flat, np.arange(len(labels) * len(groups) + 1))
+
+    columns = {col: grouped[col].to_numpy()[order] for col in value_cols}
+    if key_col is not None:
+        columns[key_col] = grouped.index.get_level_values(2).to_numpy()[order]
+    if counts is not None:
+        counts = counts[order]
+
+    cells = []
+    for f in range(len(labels)):
+        row = []
+        for g in range(len(groups)):
+            start, stop = bounds[f * len(groups) + g], bounds[f * len(groups) + g + 1]
+            rows = np.arange(start, stop)
+            if max_keys is not None and len(rows) > max_keys:
+                rows = np.sort(rows[np.argsort(-counts[rows], kind='stable')[:max_keys]])
+            row.append({col: arr[rows] for col, arr in columns.items()})
+        cells.append(row)
+
+    return {'frames': labels, 'groups': groups, 'cells': cells, 'key_col': key_col}
+
+
+def _to_list(values, decimals):
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        values = np.round(values, decimals)
+        return [None if np.isnan(v) else v for v in values.tolist()]
+    return values.tolist()
+
+
+def build_animation(aggregates, x, y, size=None, text=None, title=None, labels=None,
+                    range_x=None, range_y=None, size_max=20, decimals=1,
+                    colors=None, frame_title=None):
+    """Build an animated scatter figure from :func:`frame_aggregates` output."""
+    labels = labels or {}
+    colors = colors or px.colors.qualitative.Plotly
+    frames, groups, cells = aggregates['frames'], aggregates['groups'], aggregates['cells']
+
+    attrs = {'x': x, 'y': y}
+    if size is not None:
+        attrs['size'] = size
+    if text is not None:
+        attrs['text'] = text
+
+    # Encode every (frame, trace, attribute) once, then hoist the attributes
+    # that are identical in every frame into the base trace.
+    encoded = [[{attr: _to_list(cell[col], decimals) for attr, col in attrs.items()}
+                for cell in row] for row in cells]
+    varying = []
+    for g in range(len(groups)):
+        varying.append({attr for attr in attrs
+                        if any(encoded[f][g][attr] != encoded[0][g][attr] for f in range(len(frames)))})
+
+    sizeref = None
+    if size is not None:
+        size_values = [v for row in encoded for cell in row for v in cell['size'] if v is not None]
+        sizeref = 2.0 * max(size_values or [1]) / size_max ** 2
+
+    x_title = labels.get(x, x)
+    y_title = labels.get(y, y)
+    hovertemplate = f"{x_title}=%{{x}}<br>{y_title}=%{{y}}"
+    if size is not None:
+        hovertemplate += f"<br>{labels.get(size, size)}=%{{marker.size}}"
+    if text is not None:
+        hovertemplate = "<b>%{text}</b><br>" + hovertemplate
+
+    def trace_data(f, g, only=None):
+        cell = encoded[f][g]
+        data = {attr: cell[attr] for attr in ('x', 'y', 'text') if attr in cell and (only is None or attr in only)}
+        if 'size' in cell and (only is None or 'size' in only):
+            data['marker'] = {'size': cell['size']}
+        return data
+
+    fig = go.Figure()
+    for g, group in enumerate(groups):
+        base = trace_data(0, g)
+        marker = dict(base.pop('marker', {}), color=colors[g % len(colors)])
+        if sizeref is not None:
+            marker.update(sizemode='area', sizeref=sizeref, sizemin=2)
+        fig.add_trace(go.Scatter(
+            mode='markers', name=str(group), legendgroup=str(group),
+            marker=marker, hovertemplate=hovertemplate + f"<extra>{group}</extra>",
+            **base
+        ))
+
+    changing = [g for g in range(len(groups)) if varying[g]]
+    fig.frames = [
+        go.Frame(
+            name=label,
+            traces=changing,
+            data=[go.Scatter(**trace_data(f, g, varying[g])) for g in changing]
+        )
+        for f, label in enumerate(frames)
+    ]
+
+    frame_title = frame_title or labels.get('frame', 'frame')
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title=x_title, range=range_x),
+        yaxis=dict(title=y_title, range=range_y),
+        legend_title_text=labels.get('group'),
+        updatemenus=[dict(
+            type='buttons', direction='left', showactive=False,
+            x=0.1, y=0, xanchor='right', yanchor='top', pad=dict(r=10, t=70),
+            buttons=[
+                dict(label='&#9654;', method='animate',
+                     args=[None, dict(frame=dict(duration=FRAME_DURATION, redraw=False),
+                                      mode='immediate', fromcurrent=True,
+                                      transition=dict(duration=FRAME_DURATION, easing='linear'))]),
+                dict(label='&#9724;', method='animate',
+                     args=[[None], dict(frame=dict(duration=0, redraw=False),
+                                        mode='immediate', transition=dict(duration=0))])
+            ]
+        )],
+        sliders=[dict(
+            active=0, x=0.1, y=0, len=0.9, xanchor='left', yanchor='top', pad=dict(b=10, t=60),
+            currentvalue=dict(prefix=f"{frame_title}="),
+            steps=[dict(label=label, method='animate',
+                        args=[[label], dict(frame=dict(duration=0, redraw=False),
+                                            mode='immediate', transition=dict(duration=0))])
+                   for label in frames]
+        )]
+    )
+    return fig
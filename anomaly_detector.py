@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import CATEGORY_DOMAINS, CITIES, DATA_FILE, encode_frame, load_flights
+
+# Streaming price anomaly detector.
+#
+# Every (route, class, days_left bucket) group keeps a histogram of log prices
+# on a fixed grid.  The histogram is the sketch: it is updated with one
+# bincount per batch, can be decayed geometrically between batches (an EWMA
+# over batches), and gives the group median and MAD (median absolute
+# deviation) without keeping any rows.  A fare is flagged when its robust
+# z-score  (log price - median) / (1.4826 * MAD)  exceeds the threshold.
+# Scoring works on encoded columns, so a batch is a handful of array ops.
+
+STATE_FILE = 'anomaly_state.npz'
+FLAGGED_FILE = 'flagged_fares.csv'
+
+N_BINS = 512
+LOG_MIN, LOG_MAX = np.log(100.0), np.log(1_000_000.0)
+BIN_WIDTH = (LOG_MAX - LOG_MIN) / N_BINS
+BIN_CENTERS = LOG_MIN + (np.arange(N_BINS) + 0.5) * BIN_WIDTH
+
+MAX_DAYS = 49
+DAY_BUCKETS = [1, 4, 8, 15, 31]  # 1-3, 4-7, 8-14, 15-30, 31-49 days
+DAY_BUCKET_OF = np.searchsorted(DAY_BUCKETS, np.arange(MAX_DAYS + 1), side='right').astype(np.int32) - 1
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+N_GROUPS = len(CITIES) ** 2 * N_CLASSES * len(DAY_BUCKETS)
+
+THRESHOLD = 5.0
+MIN_COUNT = 30
+REASONS = ['ok', 'unknown_category', 'bad_days_left', 'bad_price', 'price_too_high', 'price_too_low']
+OK, UNKNOWN_CATEGORY, BAD_DAYS_LEFT, BAD_PRICE, TOO_HIGH, TOO_LOW = range(len(REASONS))
+
+
+def new_detector(threshold=THRESHOLD, decay=1.0, min_count=MIN_COUNT):
+    """Empty detector; ``decay`` < 1 down-weights older batches geometrically."""
+    detector = {
+        'threshold': threshold,
+        'decay': decay,
+        'min_count': min_count,
+        'hist': np.zeros((N_GROUPS, N_BINS)),
+    }
+    _refresh(detector)
+    return detector
+
+
+def _weighted_median(values, weights):
+    """Row-wise weighted median of ``values`` (rows sorted ascending) under ``weights``."""
+    cumulative = np.cumsum(weights, axis=1)
+    position = (cumulative >= cumulative[:, -1:] / 2).argmax(axis=1)
+    return values[np.arange(len(values)), position]
+
+
+def _refresh(detector):
+    """Recompute per-group median and MAD of log price from the histograms."""
+    hist = detector['hist']
+    total = hist.sum(axis=1)
+    median = _weighted_median(np.broadcast_to(BIN_CENTERS, hist.shape), hist)
+
+    distance = np.abs(BIN_CENTERS[None, :] - median[:, None])
+    order = np.argsort(distance, axis=1)
+    mad = _weighted_median(np.take_along_axis(distance, order, axis=1), np.take_along_axis(hist, order, axis=1))
+
+    known = total >= detector['min_count']
+    detector['count'] = total
+    detector['median'] = np.where(known, median, np.nan)
+    # The grid cannot resolve spreads below one bin
+    detector['scale'] = np.where(known, 1.4826 * np.maximum(mad, BIN_WIDTH), np.nan)
+
+
+def _prepare(columns):
+    """Group ids, log prices and validity reasons for a batch of encoded columns."""
+    days_left = np.asarray(columns['days_left'], dtype=np.float64)
+    # Unvalidated input: a missing days_left is out of range like any other bad value
+    days_left = np.where(np.isnan(days_left), 0, days_left).astype(np.int32)
+    price = np.asarray(columns['price'], dtype=np.float64)
+    route, travel_class = columns['route'].astype(np.int32), columns['class'].astype(np.int32)
+
+    reason = np.zeros(len(price), dtype=np.int8)
+    reason[~(price > 0)] = BAD_PRICE
+    reason[(days_left < 1) | (days_left > MAX_DAYS)] = BAD_DAYS_LEFT
+    reason[(route < 0) | (travel_class < 0)] = UNKNOWN_CATEGORY
+
+    valid = reason == OK
+    bucket = DAY_BUCKET_OF[np.clip(days_left, 0, MAX_DAYS)]
+    groups = np.where(valid, (route * N_CLASSES + travel_class) * len(DAY_BUCKETS) + bucket, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_price = np.log(price)
+    return groups, log_price, reason, valid
+
+
+def update(detector, columns):
+    """Decay the histograms and add the valid rows of a batch."""
+    groups, log_price, _, valid = _prepare(columns)
+    bins = np.clip(((log_price[valid] - LOG_MIN) / BIN_WIDTH).astype(np.int64), 0, N_BINS - 1)
+    if detector['decay'] != 1.0:
+        detector['hist'] *= detector['decay']
+    detector['hist'] += np.bincount(groups[valid] * N_BINS + bins, minlength=N_GROUPS * N_BINS).reshape(N_GROUPS, N_BINS)
+    _refresh(detector)
+
+
+def score(detector, columns):
+    """Return (robust z-scores, reason codes) for a batch; z is NaN for groups without history."""
+    groups, log_price, reason, valid = _prepare(columns)
+    z = (log_price - detector['median'][groups]) / detector['scale'][groups]
+    z[~valid] = np.nan
+    with np.errstate(invalid='ignore'):
+        reason[z > detector['threshold']] = TOO_HIGH
+        reason[z < -detector['threshold']] = TOO_LOW
+    return z, reason
+
+
+def ingest(detector, columns):
+    """Update with a batch, then score it against the refreshed statistics.
+
+    Updating first means the very first batch is scored too; the median and
+    MAD are robust, so the outliers being scored barely move them.
+    """
+    update(detector, columns)
+    return score(detector, columns)
+
+
+def frame_columns(df):
+    columns = encode_frame(df)
+    columns['days_left'] = df['days_left'].to_numpy()
+    columns['price'] = df['price'].to_numpy()
+    return columns
+
+
+def save_detector(detector, path=STATE_FILE):
+    np.savez_compressed(path, hist=detector['hist'], domains=json.dumps(CATEGORY_DOMAINS),
+                        settings=json.dumps({key: detector[key] for key in ('threshold', 'decay', 'min_count')}))
+
+
+def load_detector(path=STATE_FILE):
+    with np.load(path) as data:
+        if json.loads(str(data['domains'])) != CATEGORY_DOMAINS:
+            raise ValueError(f"{path} was built with different category domains")
+        detector = new_detector(**json.loads(str(data['settings'])))
+        detector['hist'] = data['hist']
+    _refresh(detector)
+    return detector
+
+
+def scan_file(detector, path=DATA_FILE, chunksize=500_000, output=FLAGGED_FILE):
+    """Ingest a CSV batch by batch and write flagged rows with their reason to ``output``.
+
+    Returns (rows, flagged, seconds spent encoding and scoring).
+    """
+    rows = flagged = 0
+    seconds = 0.0
+    header = True
+    # Unvalidated: the detector reports bad rows itself, with its own reason codes
+    for chunk in load_flights(path, chunksize=chunksize, validate=False):
+        start = time.perf_counter()
+        z, reason = ingest(detector, frame_columns(chunk))
+        seconds += time.perf_counter() - start
+
+        hits = np.flatnonzero(reason != OK)
+        if len(hits):
+            out = chunk.iloc[hits].copy()
+            out['reason'] = np.array(REASONS)[reason[hits]]
+            out['robust_z'] = z[hits].round(2)
+            out.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        rows += len(chunk)
+        flagged += len(hits)
+    if header:
+        pd.DataFrame(columns=['reason', 'robust_z']).to_csv(output, index=False)
+    return rows, flagged, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag anomalous fares per route, class and days-left bucket')
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--state', default=STATE_FILE, help='detector state to resume from and save to')
+    parser.add_argument('--output', default=FLAGGED_FILE)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--decay', type=float, default=1.0, help='histogram decay per batch (1 keeps all history)')
+    args = parser.parse_args()
+
+    print("🚨 FARE ANOMALY DETECTOR")
+    print("="*60)
+    if os.path.exists(args.state):
+        detector = load_detector(args.state)
+        detector['threshold'], detector['decay'] = args.threshold, args.decay
+        print(f"📂 Resumed from '{args.state}' ({int(detector['count'].sum()):,} fares of history)")
+    else:
+        detector = new_detector(args.threshold, args.decay)
+
+    rows, flagged, seconds = scan_file(detector, args.data, args.chunksize, args.output)
+    save_detector(detector, args.state)
+    print(f"⚡ {rows:,} fares scored in {seconds:.2f}s ({rows / max(seconds, 1e-9) / 1e6:.1f}M rows/s)")
+    print(f"🚩 {flagged:,} flagged fares written to '{args.output}'")
+    if flagged:
+        print(pd.read_csv(args.output)['reason'].value_counts().to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,9 @@ import plotly.figure_factory as ff
 import seaborn as sns
 import matplotlib.pyplot as plt
 from scipy import stats
+from crossfilter_cube import build_cube, write_crossfilter_html
+from flight_data import load_flights
+from payload_profiler import write_checked_html
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -14,7 +17,7 @@ print("🎨 CREATING BEAUTIFUL DASHBOARD")
 print("="*60)
 
 # Read the dataset
-df = pd.read_csv('airlines_flights_data.csv')
+df = load_flights()
 
 # 1. MAIN DASHBOARD WITH PROPER SUBPLOT SPECIFICATIONS
 print("📊 Creating Main Dashboard...")
@@ -94,7 +97,7 @@ fig_main.update_layout(
     showlegend=True,
     title_font_size=24
 )
-fig_main.write_html('main_dashboard.html')
+write_checked_html(fig_main, 'main_dashboard.html')
 
 # 2. ADVANCED PRICE ANALYSIS
 print("💰 Creating Advanced Price Analysis...")
@@ -157,7 +160,7 @@ fig_price.update_layout(
     template='plotly_white',
     showlegend=True
 )
-fig_price.write_html('advanced_price_dashboard.html')
+write_checked_html(fig_price, 'advanced_price_dashboard.html')
 
 # 3. INTERACTIVE TIME ANALYSIS
 print("⏰ Creating Time Analysis Dashboard...")
@@ -214,7 +217,7 @@ fig_time.update_layout(
     template='plotly_white',
     showlegend=True
 )
-fig_time.write_html('time_analysis_dashboard.html')
+write_checked_html(fig_time, 'time_analysis_dashboard.html')
 
 # 4. ROUTE AND AIRLINE ANALYSIS
 print("🛫 Creating Route and Airline Analysis...")
@@ -274,9 +277,13 @@ fig_route.update_layout(
     template='plotly_white',
     showlegend=True
 )
-fig_route.write_html('route_airline_dashboard.html')
+write_checked_html(fig_route, 'route_airline_dashboard.html')
 
-# 5. CREATE A BEAUTIFUL HTML DASHBOARD
+# 5. CROSS-FILTER EXPLORER (pre-aggregated cube, filtered in the browser)
+print("🎛️ Creating Cross-Filter Explorer...")
+explorer_size = write_crossfilter_html(build_cube(df), 'crossfilter_dashboard.html')
+
+# 6. CREATE A BEAUTIFUL HTML DASHBOARD
 print("🌐 Creating Beautiful HTML Dashboard...")
 
 html_content = """
@@ -426,6 +433,7 @@ html_content = """
             <button class="nav-button" onclick="showSection('pricing')">💰 Pricing Analysis</button>
             <button class="nav-button" onclick="showSection('routes')">🛫 Routes & Airlines</button>
             <button class="nav-button" onclick="showSection('timing')">⏰ Time Analysis</button>
+            <button class="nav-button" onclick="showSection('explorer')">🎛️ Explorer</button>
         </div>
         
         <div id="overview" class="section">
@@ -506,6 +514,19 @@ html_content = """
                 </div>
             </div>
         </div>
+        
+        <div id="explorer" class="section" style="display: none;">
+            <div class="dashboard-grid">
+                <div class="dashboard-card">
+                    <div class="card-header">🎛️ Cross-Filter Explorer</div>
+                    <div class="card-content">
+                        <div class="iframe-container" style="height: 900px;">
+                            <iframe src="crossfilter_dashboard.html"></iframe>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
     </div>
     
     <div class="footer">
@@ -547,7 +568,8 @@ print("1. main_dashboard.html - Main comprehensive dashboard")
 print("2. advanced_price_dashboard.html - Advanced price analysis")
 print("3. time_analysis_dashboard.html - Time-based analysis")
 print("4. route_airline_dashboard.html - Route and airline analysis")
-print("5. beautiful_dashboard.html - Beautiful HTML dashboard with navigation")
+print(f"5. crossfilter_dashboard.html - Cross-filtering explorer ({explorer_size / 1024:.0f} KB, works offline)")
+print("6. beautiful_dashboard.html - Beautiful HTML dashboard with navigation")
 
 print("\n🚀 Open 'beautiful_dashboard.html' in your browser for the complete experience!")
 print("💡 Features:")
@@ -555,5 +577,6 @@ print("   - Interactive navigation between different analyses")
 print("   - Responsive design with beautiful gradients")
 print("   - Hover effects and smooth animations")
 print("   - Embedded interactive Plotly charts")
+print("   - Click-to-filter explorer that re-aggregates every panel in the browser")
 print("   - Professional statistics cards")
 print("   - Mobile-friendly layout") 
\ No newline at end of file
@@ -0,0 +1,161 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from flight_data import CATEGORY_DOMAINS, CITIES, encode_frame, load_flights
+from payload_profiler import write_checked_html
+
+# Booking curves (average price as a function of days_left) for every
+# (airline, route, class) group.
+#
+# The data is reduced to a dense group x days_left matrix of sums and counts
+# with one bincount.  Two fits are then made for all groups at once:
+#   * a weighted least-squares curve  price = a + b * log(days_left) + c / days_left,
+#     solved as a batch of tiny normal-equation systems with np.linalg.solve;
+#   * a non-increasing isotonic curve, using the min-max formula
+#     f(i) = min_{j<=i} max_{k>=i} mean(j..k) over all day intervals, which for
+#     49 days is a small (groups x 49 x 49) array instead of a PAVA loop.
+
+MAX_DAYS = 49
+DAYS = np.arange(1, MAX_DAYS + 1)
+DESIGN = np.column_stack([np.ones(MAX_DAYS), np.log(DAYS), 1.0 / DAYS])
+PARAMS = ['a', 'b_log_days', 'c_inv_days']
+
+N_AIRLINES = len(CATEGORY_DOMAINS['airline'])
+N_ROUTES = len(CITIES) ** 2
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+N_GROUPS = N_AIRLINES * N_ROUTES * N_CLASSES
+
+
+def group_day_matrix(df):
+    """Return (sums, counts), each of shape (N_GROUPS, MAX_DAYS)."""
+    codes = encode_frame(df)
+    days_left = df['days_left'].to_numpy().astype(np.int64)
+    group = (codes['airline'].astype(np.int64) * N_ROUTES + codes['route']) * N_CLASSES + codes['class']
+    valid = ((codes['airline'] >= 0) & (codes['route'] >= 0) & (codes['class'] >= 0)
+             & (days_left >= 1) & (days_left <= MAX_DAYS))
+    cell = group[valid] * MAX_DAYS + days_left[valid] - 1
+    size = N_GROUPS * MAX_DAYS
+    sums = np.bincount(cell, weights=df['price'].to_numpy()[valid], minlength=size).reshape(N_GROUPS, MAX_DAYS)
+    counts = np.bincount(cell, minlength=size).reshape(N_GROUPS, MAX_DAYS)
+    return sums, counts
+
+
+def fit_parametric(means, counts, ridge=1e-6):
+    """Batched weighted least squares; rows with fewer than 3 observed days get NaN parameters."""
+    weights = counts.astype(np.float64)
+    y = np.nan_to_num(means)
+    gram = np.einsum('dk,gd,dl->gkl', DESIGN, weights, DESIGN) + ridge * np.eye(len(PARAMS))
+    rhs = np.einsum('dk,gd->gk', DESIGN, weights * y)
+    params = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    params[(counts > 0).sum(axis=1) < len(PARAMS)] = np.nan
+    return params
+
+
+def fit_isotonic(means, counts):
+    """Weighted non-increasing isotonic fit of every row; NaN where a row has no data."""
+    weights = counts.astype(np.float64)
+    cum_w = np.concatenate([np.zeros((len(weights), 1)), np.cumsum(weights, axis=1)], axis=1)
+    cum_wy = np.concatenate([np.zeros((len(weights), 1)), np.cumsum(weights * np.nan_to_num(means), axis=1)], axis=1)
+
+    # interval[g, j, k] = weighted mean of days j..k (j <= k); empty intervals never win the max
+    total_w = cum_w[:, None, 1:] - cum_w[:, :-1, None]
+    total_wy = cum_wy[:, None, 1:] - cum_wy[:, :-1, None]
+    upper = np.triu(np.ones((MAX_DAYS, MAX_DAYS), dtype=bool))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        interval = np.where(upper & (total_w > 0), total_wy / total_w, -np.inf)
+
+    # max over k >= i for each (j, i): reverse cumulative max along k
+    max_from = np.maximum.accumulate(interval[:, :, ::-1], axis=2)[:, :, ::-1]
+    # min over j <= i of max_from[j, i], ignoring intervals that start after i
+    candidates = np.where(upper, max_from, np.inf)
+    fitted = np.minimum.accumulate(candidates, axis=1)[:, np.arange(MAX_DAYS), np.arange(MAX_DAYS)]
+    fitted[~np.isfinite(fitted)] = np.nan
+    return fitted
+
+
+def group_labels():
+    airline, route, travel_class = np.unravel_index(np.arange(N_GROUPS), (N_AIRLINES, N_ROUTES, N_CLASSES))
+    return pd.DataFrame({
+        'airline': np.array(CATEGORY_DOMAINS['airline'])[airline],
+        'source_city': np.array(CITIES)[route // len(CITIES)],
+        'destination_city': np.array(CITIES)[route % len(CITIES)],
+        'class': np.array(CATEGORY_DOMAINS['class'])[travel_class],
+    })
+
+
+def fit_booking_curves(df):
+    """Fit every group; returns (params DataFrame, curves dict of (N_GROUPS, MAX_DAYS) arrays)."""
+    sums, counts = group_day_matrix(df)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+
+    params = fit_parametric(means, counts)
+    fitted = params @ DESIGN.T
+    isotonic = fit_isotonic(means, counts)
+
+    observed = counts > 0
+    with np.errstate(invalid='ignore'):
+        residual = np.where(observed, means - fitted, 0.0)
+        rmse = np.sqrt((counts * residual ** 2).sum(axis=1) / counts.sum(axis=1))
+
+    table = group_labels()
+    for i, name in enumerate(PARAMS):
+        table[name] = params[:, i]
+    table['flights'] = counts.sum(axis=1)
+    table['days_observed'] = observed.sum(axis=1)
+    table['rmse'] = rmse
+    table['price_1_day'] = fitted[:, 0]
+    table['price_30_days'] = fitted[:, 29]
+
+    keep = table['days_observed'] >= len(PARAMS)
+    curves = {'mean': means[keep], 'counts': counts[keep], 'fitted': fitted[keep], 'isotonic': isotonic[keep]}
+    return table[keep].reset_index(drop=True), curves
+
+
+def booking_curve_figure(table, curves, top=10):
+    """Fitted and isotonic curves for the ``top`` groups by number of flights."""
+    fig = go.Figure()
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+              '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+    for n, i in enumerate(table['flights'].nlargest(top).index):
+        row = table.loc[i]
+        name = f"{row['airline']} {row['source_city']}→{row['destination_city']} ({row['class']})"
+        color = colors[n % len(colors)]
+        fig.add_trace(go.Scatter(x=DAYS, y=curves['mean'][i], mode='markers', name=name, legendgroup=name,
+                                 marker=dict(color=color, size=5, opacity=0.6)))
+        fig.add_trace(go.Scatter(x=DAYS, y=curves['fitted'][i], mode='lines', name=f"{name} fit",
+                                 legendgroup=name, showlegend=False, line=dict(color=color, width=2)))
+        fig.add_trace(go.Scatter(x=DAYS, y=curves['isotonic'][i], mode='lines', name=f"{name} isotonic",
+                                 legendgroup=name, showlegend=False, line=dict(color=color, dash='dot')))
+    fig.update_layout(
+        title='Booking Curves by Airline, Route and Class (fit — , isotonic ···)',
+        xaxis_title='Days Before Departure',
+        yaxis_title='Average Price ($)',
+        template='plotly_white',
+        title_font_size=20,
+        height=700
+    )
+    return fig
+
+
+if __name__ == '__main__':
+    print("📈 FITTING BOOKING CURVES")
+    print("="*60)
+    df = load_flights()
+
+    start = time.perf_counter()
+    table, curves = fit_booking_curves(df)
+    print(f"⚡ Fitted {len(table):,} (airline, route, class) curves in {time.perf_counter() - start:.3f}s")
+
+    table.to_csv('booking_curves.csv', index=False)
+    np.savez_compressed('booking_curves.npz', **curves)
+    write_checked_html(booking_curve_figure(table, curves), 'booking_curves.html')
+
+    premium = (table['price_1_day'] / table['price_30_days']).groupby(table['airline']).median()
+    print("\nMedian last-minute premium (1 day vs 30 days out):")
+    for airline, ratio in premium.sort_values(ascending=False).items():
+        print(f"  {airline}: {ratio:.2f}x")
+    print("\n✅ Saved booking_curves.csv, booking_curves.npz and booking_curves.html")
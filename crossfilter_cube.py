@@ -0,0 +1,316 @@
+import argparse
+import base64
+import gzip
+import json
+import time
+
+import numpy as np
+
+from flight_data import CATEGORY_DOMAINS, CITIES, DATA_FILE, encode_frame, load_flights
+
+# Static cross-filtering dashboard backed by a pre-aggregated cube.
+#
+# Rows are reduced to cells of (airline, class, route), the dimensions a user
+# filters on.  Every cell holds a flight count and price/duration sums, and
+# each panel dimension (days_left, stops, departure time, price band) adds
+# one more axis to those cells.  The arrays are written little-endian, gzipped
+# and embedded in the page as base64; the script decompresses them with the
+# browser's DecompressionStream and re-aggregates every panel from the cells
+# passing the current selection.  A panel ignores its own dimension's filter,
+# crossfilter style, and highlights the selected bars instead.  The page is
+# self-contained (no plotly.js, no network) and its size depends only on the
+# number of cells, never on the number of rows.
+
+OUTPUT_FILE = 'crossfilter_dashboard.html'
+MAX_DAYS = 49
+N_ROUTES = len(CITIES) ** 2
+FILTER_DIMS = {'airline': CATEGORY_DOMAINS['airline'], 'class': CATEGORY_DOMAINS['class'],
+               'route': [f"{s}→{d}" for s in CITIES for d in CITIES]}
+N_CELLS = int(np.prod([len(labels) for labels in FILTER_DIMS.values()]))
+
+# Log-spaced bands plus an underflow and an overflow band, so every fare is counted
+PRICE_EDGES = np.geomspace(1_000, 160_000, 34)
+PANEL_DIMS = {
+    'days_left': [str(d) for d in range(1, MAX_DAYS + 1)],
+    'stops': CATEGORY_DOMAINS['stops'],
+    'departure_time': CATEGORY_DOMAINS['departure_time'],
+    'price_band': ([f"< ${PRICE_EDGES[0]:,.0f}"]
+                   + [f"${lo:,.0f}–${hi:,.0f}" for lo, hi in zip(PRICE_EDGES[:-1], PRICE_EDGES[1:])]
+                   + [f"≥ ${PRICE_EDGES[-1]:,.0f}"]),
+}
+# Panels drawn as average price (the others are flight counts)
+PRICED_PANELS = ('days_left', 'stops')
+
+
+def _panel_codes(df, codes):
+    """Per-row code along each panel dimension (-1 when out of range)."""
+    days_left = df['days_left'].to_numpy().astype(np.int64)
+    price = df['price'].to_numpy().astype(np.float64)
+    band = np.searchsorted(PRICE_EDGES, price, side='right')
+    return {
+        'days_left': np.where((days_left >= 1) & (days_left <= MAX_DAYS), days_left - 1, -1),
+        'stops': codes['stops'].astype(np.int64),
+        'departure_time': codes['departure_time'].astype(np.int64),
+        'price_band': np.where(np.isnan(price), -1, band),
+    }
+
+
+def build_cube(df):
+    """Aggregate a frame into {array name: flat array}; cell = (airline, class, route)."""
+    codes = encode_frame(df)
+    cell = ((codes['airline'].astype(np.int64) * len(FILTER_DIMS['class']) + codes['class']) * N_ROUTES
+            + codes['route'])
+    valid = (codes['airline'] >= 0) & (codes['class'] >= 0) & (codes['route'] >= 0)
+    price = df['price'].to_numpy().astype(np.float64)
+
+    cube = {
+        'count': np.bincount(cell[valid], minlength=N_CELLS),
+        'price': np.bincount(cell[valid], weights=price[valid], minlength=N_CELLS),
+        'duration': np.bincount(cell[valid], weights=df['duration'].to_numpy()[valid].astype(np.float64),
+                                minlength=N_CELLS),
+    }
+    for dim, values in _panel_codes(df, codes).items():
+        width = len(PANEL_DIMS[dim])
+        ok = valid & (values >= 0)
+        index = cell[ok] * width + values[ok]
+        cube[f"{dim}_count"] = np.bincount(index, minlength=N_CELLS * width)
+        if dim in PRICED_PANELS:
+            cube[f"{dim}_price"] = np.bincount(index, weights=price[ok], minlength=N_CELLS * width)
+    return cube
+
+
+def cube_payload(cube):
+    """(header dict, base64 of the gzipped arrays): counts as uint32, sums as float32."""
+    arrays, header, offset = [], [], 0
+    for name, values in cube.items():
+        dtype = '<u4' if name.endswith('count') else '<f4'
+        data = np.ascontiguousarray(values, dtype=dtype).tobytes()
+        header.append([name, 'u32' if dtype == '<u4' else 'f32', offset, len(values)])
+        arrays.append(data)
+        offset += len(data)
+    meta = {'arrays': header, 'filters': FILTER_DIMS, 'panels': PANEL_DIMS, 'cities': CITIES}
+    return meta, base64.b64encode(gzip.compress(b''.join(arrays), compresslevel=9, mtime=0)).decode('ascii')
+
+
+def write_crossfilter_html(cube, path=OUTPUT_FILE, title='🎛️ Cross-Filter Explorer'):
+    """Write the self-contained dashboard; returns its size in bytes."""
+    meta, data = cube_payload(cube)
+    html = (TEMPLATE.replace('__TITLE__', title)
+            .replace('__META__', json.dumps(meta, ensure_ascii=False))
+            .replace('__DATA__', data))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return len(html.encode('utf-8'))
+
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>__TITLE__</title>
+<style>
+    body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0;
+           background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: #333; }
+    .header { background: rgba(255, 255, 255, 0.95); padding: 16px; text-align: center;
+              box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+    .header h1 { margin: 0; color: #2c3e50; }
+    .header p { margin: 6px 0 0 0; color: #7f8c8d; }
+    .container { max-width: 1400px; margin: 0 auto; padding: 20px; }
+    .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 16px; margin-bottom: 20px; }
+    .stat-card, .panel { background: rgba(255, 255, 255, 0.95); border-radius: 15px; box-shadow: 0 4px 15px rgba(0,0,0,0.1); }
+    .stat-card { padding: 16px; text-align: center; }
+    .stat-number { font-size: 2em; font-weight: bold; color: #3498db; }
+    .stat-label { color: #7f8c8d; }
+    .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(420px, 1fr)); gap: 20px; }
+    .panel { padding: 12px 16px; }
+    .panel h3 { margin: 0 0 8px 0; color: #2c3e50; font-size: 1.05em; }
+    .filters { background: rgba(255, 255, 255, 0.95); border-radius: 15px; padding: 10px 16px; margin-bottom: 20px; }
+    .chip { display: inline-block; background: #3498db; color: white; border-radius: 12px; padding: 3px 10px;
+            margin: 2px; cursor: pointer; }
+    button { border: none; border-radius: 20px; padding: 6px 16px; cursor: pointer; font-weight: bold; }
+    svg text { font-size: 11px; fill: #555; }
+    .hit { cursor: pointer; }
+    #timing { color: #7f8c8d; float: right; }
+</style>
+</head>
+<body>
+<div class="header">
+    <h1>__TITLE__</h1>
+    <p>Click bars or heatmap cells to filter by airline, class or route; every panel re-aggregates in the browser.</p>
+</div>
+<div class="container">
+    <div class="filters"><span id="timing"></span><b>Filters:</b> <span id="chips"></span>
+        <button onclick="resetFilters()">Reset</button></div>
+    <div class="stats-grid">
+        <div class="stat-card"><div class="stat-number" id="stat-flights">–</div><div class="stat-label">Flights</div></div>
+        <div class="stat-card"><div class="stat-number" id="stat-price">–</div><div class="stat-label">Average Price</div></div>
+        <div class="stat-card"><div class="stat-number" id="stat-duration">–</div><div class="stat-label">Avg Duration</div></div>
+        <div class="stat-card"><div class="stat-number" id="stat-routes">–</div><div class="stat-label">Routes</div></div>
+    </div>
+    <div class="grid">
+        <div class="panel"><h3>Market Share by Airline</h3><div id="p-airline"></div></div>
+        <div class="panel"><h3>Flights by Class</h3><div id="p-class"></div></div>
+        <div class="panel"><h3>Route Popularity Heatmap</h3><div id="p-route"></div></div>
+        <div class="panel"><h3>Average Price by Days Left</h3><div id="p-days_left"></div></div>
+        <div class="panel"><h3>Average Price by Stops</h3><div id="p-stops"></div></div>
+        <div class="panel"><h3>Flights by Departure Time</h3><div id="p-departure_time"></div></div>
+        <div class="panel"><h3>Price Distribution</h3><div id="p-price_band"></div></div>
+    </div>
+</div>
+<script>
+const META = __META__;
+const DATA = "__DATA__";
+const TYPES = {u32: Uint32Array, f32: Float32Array};
+const NA = META.filters.airline.length, NC = META.filters['class'].length, NR = META.filters.route.length;
+const NCITY = META.cities.length;
+const filters = {airline: new Set(), 'class': new Set(), route: new Set()};
+let cube = {};
+
+async function loadCube() {
+    const bytes = Uint8Array.from(atob(DATA), c => c.charCodeAt(0));
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    const buffer = await new Response(stream).arrayBuffer();
+    for (const [name, type, offset, length] of META.arrays) cube[name] = new TYPES[type](buffer, offset, length);
+}
+
+// Cell ids passing every filter except ``skip`` (a panel ignores its own filter)
+function cells(skip) {
+    const pass = (dim, v) => dim === skip || filters[dim].size === 0 || filters[dim].has(v);
+    const out = [];
+    for (let a = 0; a < NA; a++) {
+        if (!pass('airline', a)) continue;
+        for (let k = 0; k < NC; k++) {
+            if (!pass('class', k)) continue;
+            for (let r = 0; r < NR; r++) if (pass('route', r)) out.push((a * NC + k) * NR + r);
+        }
+    }
+    return out;
+}
+
+// Sum ``name`` over cells, grouped by a filter dim ('airline'/'class'/'route') or a panel axis of ``width``
+function groupSum(list, name, by, width) {
+    const values = cube[name], out = new Float64Array(width);
+    for (const c of list) {
+        if (by === 'airline') out[Math.floor(c / (NC * NR))] += values[c];
+        else if (by === 'class') out[Math.floor(c / NR) % NC] += values[c];
+        else if (by === 'route') out[c % NR] += values[c];
+        else for (let j = 0, base = c * width; j < width; j++) out[j] += values[base + j];
+    }
+    return out;
+}
+
+const fmt = v => v >= 1e6 ? (v / 1e6).toFixed(1) + 'M' : v >= 1e3 ? (v / 1e3).toFixed(1) + 'k' : v.toFixed(0);
+const money = v => isFinite(v) ? '$' + Math.round(v).toLocaleString() : '–';
+const escape = s => String(s).replace(/&/g, '&amp;').replace(/</g, '&lt;');
+
+function barChart(id, labels, values, dim, tip) {
+    const W = 440, H = 230, left = 50, bottom = 60, max = Math.max(...values, 1);
+    const bw = (W - left) / labels.length;
+    let svg = `<svg viewBox="0 0 ${W} ${H}" width="100%">`;
+    labels.forEach((label, i) => {
+        const h = (H - bottom - 10) * (values[i] / max), x = left + i * bw;
+        const dimmed = dim && filters[dim].size && !filters[dim].has(i);
+        svg += `<rect class="${dim ? 'hit' : ''}" data-dim="${dim || ''}" data-v="${i}" x="${x + 1}" y="${H - bottom - h}"` +
+               ` width="${Math.max(bw - 2, 1)}" height="${h}" fill="${dimmed ? '#d5dbe0' : '#667eea'}">` +
+               `<title>${escape(label)}: ${tip(i)}</title></rect>`;
+        if (labels.length <= 12 || i % Math.ceil(labels.length / 12) === 0)
+            svg += `<text transform="translate(${x + bw / 2},${H - bottom + 12}) rotate(35)">${escape(label)}</text>`;
+    });
+    svg += `<text x="0" y="12">${fmt(max)}</text><line x1="${left}" x2="${W}" y1="${H - bottom}" y2="${H - bottom}" stroke="#999"/></svg>`;
+    document.getElementById(id).innerHTML = svg;
+}
+
+function heatmap(id, counts) {
+    const S = 48, left = 80, top = 20, max = Math.max(...counts, 1);
+    let svg = `<svg viewBox="0 0 ${left + S * NCITY} ${top + S * NCITY + 70}" width="100%">`;
+    for (let r = 0; r < NR; r++) {
+        const s = Math.floor(r / NCITY), d = r % NCITY, t = counts[r] / max;
+        const dimmed = filters.route.size && !filters.route.has(r);
+        const fill = `rgb(${Math.round(68 + 185 * t)},${Math.round(1 + 230 * t)},${Math.round(84 - 48 * t)})`;
+        svg += `<rect class="hit" data-dim="route" data-v="${r}" x="${left + d * S}" y="${top + s * S}" width="${S - 2}"` +
+               ` height="${S - 2}" fill="${fill}" opacity="${dimmed ? 0.25 : 1}"><title>${escape(META.filters.route[r])}: ` +
+               `${counts[r].toLocaleString()} flights</title></rect>`;
+    }
+    META.cities.forEach((city, i) => {
+        svg += `<text x="0" y="${top + i * S + S / 2}">${city}</text>`;
+        svg += `<text transform="translate(${left + i * S + 4},${top + S * NCITY + 8}) rotate(45)">${city}</text>`;
+    });
+    document.getElementById(id).innerHTML = svg + '</svg>';
+}
+
+function render() {
+    const start = performance.now();
+    const all = cells(null);
+    const count = groupSum(all, 'count', 'airline', NA).reduce((a, b) => a + b, 0);
+    const price = groupSum(all, 'price', 'airline', NA).reduce((a, b) => a + b, 0);
+    const duration = groupSum(all, 'duration', 'airline', NA).reduce((a, b) => a + b, 0);
+    const routes = groupSum(all, 'count', 'route', NR).filter(v => v > 0).length;
+    document.getElementById('stat-flights').textContent = count.toLocaleString();
+    document.getElementById('stat-price').textContent = money(price / count);
+    document.getElementById('stat-duration').textContent = count ? (duration / count).toFixed(1) + 'h' : '–';
+    document.getElementById('stat-routes').textContent = routes;
+
+    for (const dim of ['airline', 'class']) {
+        const list = cells(dim), n = META.filters[dim].length;
+        const c = groupSum(list, 'count', dim, n), p = groupSum(list, 'price', dim, n);
+        barChart('p-' + dim, META.filters[dim], c, dim, i => `${c[i].toLocaleString()} flights, avg ${money(p[i] / c[i])}`);
+    }
+    heatmap('p-route', groupSum(cells('route'), 'count', 'route', NR));
+
+    for (const dim of ['days_left', 'stops', 'departure_time', 'price_band']) {
+        const labels = META.panels[dim], n = labels.length;
+        const c = groupSum(all, dim + '_count', null, n);
+        if (cube[dim + '_price']) {
+            const p = groupSum(all, dim + '_price', null, n), avg = Array.from(p, (v, i) => c[i] ? v / c[i] : 0);
+            barChart('p-' + dim, labels, avg, null, i => `avg ${money(avg[i])} over ${c[i].toLocaleString()} flights`);
+        } else {
+            barChart('p-' + dim, labels, c, null, i => `${c[i].toLocaleString()} flights`);
+        }
+    }
+
+    const chips = [];
+    for (const dim in filters) for (const v of filters[dim])
+        chips.push(`<span class="chip" data-dim="${dim}" data-v="${v}">${escape(META.filters[dim][v])} ✕</span>`);
+    document.getElementById('chips').innerHTML = chips.join('') || 'none';
+    document.getElementById('timing').textContent = `re-aggregated in ${(performance.now() - start).toFixed(1)} ms`;
+}
+
+function resetFilters() { for (const dim in filters) filters[dim].clear(); render(); }
+
+document.addEventListener('click', event => {
+    const target = event.target.closest('[data-dim]');
+    if (!target || !target.dataset.dim) return;
+    const set = filters[target.dataset.dim], v = Number(target.dataset.v);
+    set.has(v) ? set.delete(v) : set.add(v);
+    render();
+});
+
+loadCube().then(render).catch(error => {
+    document.getElementById('timing').textContent = 'This browser cannot decompress the embedded cube: ' + error;
+});
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write the self-contained cross-filtering dashboard')
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    print("🎛️ CROSS-FILTER DASHBOARD")
+    print("="*60)
+    df = load_flights(args.data)
+    start = time.perf_counter()
+    cube = build_cube(df)
+    size = write_crossfilter_html(cube, args.output)
+    print(f"📦 {len(df):,} rows → {sum(len(v) for v in cube.values()):,} cube values "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"✅ Saved '{args.output}' ({size / 1024:.0f} KB, works offline)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,24 @@
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
+import matplotlib
+
+# Headless report mode: Agg backend, pages rendered in parallel, no GUI window
+HEADLESS = '--headless' in sys.argv or (
+    sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+)
+if HEADLESS:
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
+from static_report import price_page_data, render_page, render_report
+from flight_recommender import build_index, top_k
+from derived_columns import derived_frame
+from flight_data import load_flights
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -14,7 +30,7 @@ print("🚀 AIRLINES DATASET ANALYSIS EXPLORER")
 print("="*60)
 
 # Read the dataset
-df = pd.read_csv('airlines_flights_data.csv')
+df = load_flights()
 
 print(f"📊 Dataset loaded: {df.shape[0]:,} flights, {df.shape[1]} features")
 print("\n" + "="*60)
@@ -24,47 +40,19 @@ print("💰 PRICE ANALYSIS")
 print("-" * 30)
 
 # Price distribution by airline
-plt.figure(figsize=(15, 10))
-
-plt.subplot(2, 2, 1)
 airline_prices = df.groupby('airline')['price'].agg(['mean', 'median', 'std']).round(0)
 print("Average prices by airline:")
 print(airline_prices)
-airline_prices['mean'].plot(kind='bar', color='skyblue')
-plt.title('Average Ticket Prices by Airline')
-plt.ylabel('Price ($)')
-plt.xticks(rotation=45)
-
-# Price vs Duration correlation
-plt.subplot(2, 2, 2)
-plt.scatter(df['duration'], df['price'], alpha=0.5, s=1)
-plt.xlabel('Duration (hours)')
-plt.ylabel('Price ($)')
-plt.title('Price vs Flight Duration')
-correlation = df['price'].corr(df['duration'])
-plt.text(0.05, 0.95, f'Correlation: {correlation:.3f}', transform=plt.gca().transAxes, 
-         bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
-
-# Price distribution
-plt.subplot(2, 2, 3)
-plt.hist(df['price'], bins=50, alpha=0.7, color='lightgreen')
-plt.xlabel('Price ($)')
-plt.ylabel('Frequency')
-plt.title('Price Distribution')
-plt.axvline(df['price'].median(), color='red', linestyle='--', label=f'Median: ${df["price"].median():,.0f}')
-plt.legend()
-
-# Price by class
-plt.subplot(2, 2, 4)
-class_prices = df.groupby('class')['price'].mean()
-class_prices.plot(kind='bar', color=['orange', 'purple'])
-plt.title('Average Price by Class')
-plt.ylabel('Price ($)')
-plt.xticks(rotation=0)
-
-plt.tight_layout()
-plt.savefig('price_analysis.png', dpi=300, bbox_inches='tight')
-plt.show()
+
+# Histograms and the price/duration density are precomputed; the 300k points are never drawn
+if HEADLESS:
+    report_start = time.perf_counter()
+    for path, seconds in render_report(df, dpi=300):
+        print(f"  📄 {path} rendered in {seconds:.2f}s")
+    print(f"  Report pages rendered in {time.perf_counter() - report_start:.2f}s")
+else:
+    render_page('price', price_page_data(df), 'price_analysis.png', dpi=300)
+    plt.show()
 
 print(f"✅ Price analysis saved to 'price_analysis.png'")
 
@@ -92,15 +80,15 @@ print("-" * 30)
 # Departure time preferences
 departure_time_counts = df['departure_time'].value_counts()
 print("Departure Time Preferences:")
-for time, count in departure_time_counts.items():
+for slot, count in departure_time_counts.items():
     percentage = (count / len(df)) * 100
-    print(f"  {time}: {count:,} flights ({percentage:.1f}%)")
+    print(f"  {slot}: {count:,} flights ({percentage:.1f}%)")
 
 # Price by departure time
 time_prices = df.groupby('departure_time')['price'].mean().sort_values(ascending=False)
 print(f"\nAverage Prices by Departure Time:")
-for time, price in time_prices.items():
-    print(f"  {time}: ${price:,.0f}")
+for slot, price in time_prices.items():
+    print(f"  {slot}: ${price:,.0f}")
 
 # 4. BOOKING PATTERNS
 print("\n📅 BOOKING PATTERNS")
@@ -157,8 +145,8 @@ for airline, share in market_share.items():
     print(f"  {airline}: {share:.1f}%")
 
 # Revenue potential
-df['revenue_potential'] = df['price'] * (1 + (df['days_left'] < 7) * 0.2)  # 20% premium for last-minute
-revenue_by_airline = df.groupby('airline')['revenue_potential'].sum().sort_values(ascending=False)
+revenue_potential = derived_frame(df, 'revenue_potential')['revenue_potential']  # 20% premium for last-minute
+revenue_by_airline = revenue_potential.groupby(df['airline'], observed=True).sum().sort_values(ascending=False)
 print(f"\nRevenue Potential by Airline:")
 for airline, revenue in revenue_by_airline.items():
     print(f"  {airline}: ${revenue:,.0f}")
@@ -168,8 +156,8 @@ print("\n🎯 RECOMMENDATION ENGINE FEATURES")
 print("-" * 30)
 
 # Best value flights (low price, reasonable duration)
-df['value_score'] = (df['price'].max() - df['price']) / df['price'].max() + (df['duration'].max() - df['duration']) / df['duration'].max()
-best_value = df.nlargest(5, 'value_score')[['airline', 'source_city', 'destination_city', 'price', 'duration', 'days_left']]
+recommender = build_index(df, max_k=5)
+best_value = top_k(recommender, k=5)[['airline', 'source_city', 'destination_city', 'price', 'duration', 'days_left']]
 print("Best Value Flights (low price + reasonable duration):")
 print(best_value)
 
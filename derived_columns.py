@@ -0,0 +1,264 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import (CACHE_COLUMNS, CATEGORY_DOMAINS, DATA_FILE, build_column_cache, encode_column,
+                         encode_frame, open_column_cache)
+
+# Named derived columns, defined as expressions and evaluated lazily.
+#
+# An expression uses base columns (the column cache names: numeric columns
+# and int8 category codes), other derived columns, arithmetic, comparisons,
+# & | ~, a few elementwise functions and whole-column reductions such as
+# max(price).  Reductions are resolved first in their own chunked pass;
+# then every requested column is computed in one fused pass over chunks of
+# CHUNK_ROWS rows, sharing sub-columns within a chunk, so temporaries stay
+# chunk-sized (cache-resident) instead of full-length.  Nothing is added to
+# the caller's DataFrame.  Columns of the full dataset can be materialized
+# once into the column cache directory of its fingerprint, keyed by a hash
+# of the expression and everything it depends on.
+
+CHUNK_ROWS = 1 << 16
+FUNCTIONS = {'where': np.where, 'log': np.log, 'exp': np.exp, 'sqrt': np.sqrt, 'abs': np.abs,
+             'minimum': np.minimum, 'maximum': np.maximum, 'clip': np.clip}
+# (chunk reduction, combine two partial results, value over zero rows)
+REDUCTIONS = {'max': (np.max, max, np.nan), 'min': (np.min, min, np.nan), 'sum': (np.sum, float.__add__, 0.0),
+              'mean': (np.sum, float.__add__, np.nan)}
+BASE_COLUMNS = list(CACHE_COLUMNS)
+
+DERIVED = {}
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Constant, ast.Load,
+                  ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+                  ast.Invert, ast.BitAnd, ast.BitOr, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+_compiled = {}
+
+
+def _compile(expression):
+    """Parse and check an expression; returns {'code', 'names', 'reductions'} (memoized)."""
+    if expression in _compiled:
+        return _compiled[expression]
+    tree = ast.parse(expression, mode='eval')
+    names, reductions = set(), {}
+
+    class Rewrite(ast.NodeTransformer):
+        def visit_Call(self, node):
+            if not isinstance(node.func, ast.Name) or node.keywords:
+                raise ValueError(f"Unsupported call in {expression!r}")
+            if node.func.id in REDUCTIONS:
+                if len(node.args) != 1:
+                    raise ValueError(f"{node.func.id}() takes one expression in {expression!r}")
+                key = f"{node.func.id}({ast.unparse(node.args[0])})"
+                reductions[key] = (node.func.id, ast.unparse(node.args[0]))
+                return ast.Subscript(ast.Name('scalars', ast.Load()), ast.Constant(key), ast.Load())
+            if node.func.id not in FUNCTIONS:
+                raise ValueError(f"Unknown function {node.func.id!r} in {expression!r}")
+            node.args = [self.visit(arg) for arg in node.args]
+            node.func = ast.Subscript(ast.Name('functions', ast.Load()), ast.Constant(node.func.id), ast.Load())
+            return node
+
+        def visit_Name(self, node):
+            names.add(node.id)
+            return ast.Subscript(ast.Name('env', ast.Load()), ast.Constant(node.id), ast.Load())
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax {type(node).__name__} in {expression!r}")
+    tree = ast.fix_missing_locations(Rewrite().visit(tree))
+    _compiled[expression] = {'code': compile(tree, '<derived>', 'eval'), 'names': names, 'reductions': reductions}
+    return _compiled[expression]
+
+
+def _referenced(expression):
+    """Every column name an expression mentions, including inside reductions."""
+    compiled = _compile(expression)
+    return compiled['names'].union(*[_referenced(source) for _, source in compiled['reductions'].values()])
+
+
+def _dependencies(expression, seen=()):
+    """Derived columns an expression needs (directly, through reductions or transitively)."""
+    found = []
+    for name in sorted(_referenced(expression)):
+        if name in DERIVED:
+            if name in seen:
+                raise ValueError(f"Derived column {name!r} depends on itself")
+            found += _dependencies(DERIVED[name]['expression'], seen + (name,)) + [name]
+        elif name not in BASE_COLUMNS:
+            raise ValueError(f"Unknown column {name!r} in {expression!r}")
+    return list(dict.fromkeys(found))
+
+
+def register(name, expression, dtype='float64', description=''):
+    """Add a named derived column; raises ValueError for bad syntax, unknown names or cycles."""
+    if name in BASE_COLUMNS:
+        raise ValueError(f"{name!r} is a base column")
+    previous = DERIVED.get(name)
+    DERIVED[name] = {'expression': expression, 'dtype': np.dtype(dtype).name, 'description': description}
+    try:
+        _dependencies(expression, (name,))
+    except ValueError:
+        if previous is None:
+            del DERIVED[name]
+        else:
+            DERIVED[name] = previous
+        raise
+
+
+register('revenue_potential', 'price * where(days_left < 7, 1.2, 1.0)',
+         description='price with a 20% premium for last-minute (< 7 days) bookings')
+register('value_score', '(1 - price / max(price)) + (1 - duration / max(duration))', dtype='float32',
+         description='flight_recommender.py best-value score with default weights')
+register('price_per_hour', 'price / duration', dtype='float32', description='price per hour of travel')
+register('last_minute', 'days_left < 7', dtype='bool', description='booked less than a week ahead')
+
+
+def _value(name, columns, rows, scalars, memo):
+    """One column (base or derived) over ``rows`` of ``columns``, memoized within the chunk."""
+    if name not in memo:
+        if name in DERIVED:
+            memo[name] = _evaluate_expression(DERIVED[name]['expression'], columns, rows, scalars, memo)
+        else:
+            memo[name] = np.asarray(columns[name][rows])
+    return memo[name]
+
+
+def _evaluate_expression(expression, columns, rows, scalars, memo):
+    compiled = _compile(expression)
+    env = {name: _value(name, columns, rows, scalars, memo) for name in compiled['names']}
+    return eval(compiled['code'], {'__builtins__': {}},
+                {'env': env, 'scalars': scalars, 'functions': FUNCTIONS})
+
+
+def _chunks(n, chunksize):
+    return (slice(start, min(start + chunksize, n)) for start in range(0, n, chunksize))
+
+
+def _resolve_reductions(expression, columns, n, scalars, chunksize):
+    """Compute (chunk by chunk) every reduction that ``expression`` needs, into ``scalars``."""
+    needed = [expression] + [DERIVED[name]['expression'] for name in _dependencies(expression)]
+    for source in needed:
+        for key, (func, inner) in _compile(source)['reductions'].items():
+            if key in scalars:
+                continue
+            _resolve_reductions(inner, columns, n, scalars, chunksize)
+            # Each chunk is reduced as soon as it is computed, so only one is held at a time
+            chunk_reduce, combine, empty = REDUCTIONS[func]
+            total = None
+            for rows in _chunks(n, chunksize):
+                part = _evaluate_expression(inner, columns, rows, scalars, {})
+                if np.size(part):
+                    part = float(chunk_reduce(part))
+                    total = part if total is None else combine(total, part)
+            if total is None:
+                total = empty
+            elif func == 'mean':
+                total /= n
+            scalars[key] = total
+
+
+def evaluate(columns, names, chunksize=CHUNK_ROWS, out=None):
+    """Compute derived columns ``names`` over ``columns`` (mapping name -> array) in one fused pass.
+
+    Returns {name: array}; ``out`` can supply preallocated output arrays.
+    """
+    names = [names] if isinstance(names, str) else list(names)
+    for name in names:
+        if name not in DERIVED:
+            raise KeyError(f"Unknown derived column {name!r}; registered: {sorted(DERIVED)}")
+    n = len(next(iter(columns.values())))
+    scalars = {}
+    for name in names:
+        _resolve_reductions(DERIVED[name]['expression'], columns, n, scalars, chunksize)
+
+    out = dict(out or {})
+    for name in names:
+        if name not in out:
+            out[name] = np.empty(n, dtype=DERIVED[name]['dtype'])
+    for rows in _chunks(n, chunksize):
+        memo = {}
+        for name in names:
+            out[name][rows] = _value(name, columns, rows, scalars, memo)
+    return out
+
+
+def frame_columns(df, names):
+    """Base columns needed by ``names``, taken from a flights DataFrame (categories as codes)."""
+    needed = set()
+    for name in names:
+        for dep in _dependencies(DERIVED[name]['expression']) + [name]:
+            needed |= _referenced(DERIVED[dep]['expression'])
+    columns = {}
+    for name in sorted(needed - set(DERIVED)):
+        if name == 'route':
+            columns[name] = encode_frame(df)['route']
+        elif name in CATEGORY_DOMAINS:
+            columns[name] = encode_column(df[name], CATEGORY_DOMAINS[name])
+        else:
+            columns[name] = df[name].to_numpy()
+    return columns
+
+
+def derived_frame(df, names, chunksize=CHUNK_ROWS):
+    """Derived columns of ``df`` as a new DataFrame on the same index; ``df`` is not modified."""
+    names = [names] if isinstance(names, str) else list(names)
+    for name in names:
+        if name not in DERIVED:
+            raise KeyError(f"Unknown derived column {name!r}; registered: {sorted(DERIVED)}")
+    if not len(df):
+        return pd.DataFrame({name: np.empty(0, dtype=DERIVED[name]['dtype']) for name in names}, index=df.index)
+    return pd.DataFrame(evaluate(frame_columns(df, names), names, chunksize), index=df.index)
+
+
+def _cache_key(name):
+    definitions = {dep: DERIVED[dep] for dep in _dependencies(DERIVED[name]['expression']) + [name]}
+    return hashlib.sha1(json.dumps(definitions, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def materialize(name, path=DATA_FILE, chunksize=CHUNK_ROWS):
+    """Read-only memmap of a derived column over the whole dataset, computed once per fingerprint."""
+    if name not in DERIVED:
+        raise KeyError(f"Unknown derived column {name!r}; registered: {sorted(DERIVED)}")
+    cache_path = build_column_cache(path)
+    columns = open_column_cache(cache_path)
+    n, dtype = len(columns['price']), DERIVED[name]['dtype']
+    target = os.path.join(cache_path, 'derived', f"{name}-{_cache_key(name)}.bin")
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        staging = target + '.tmp'
+        out = np.memmap(staging, dtype=dtype, mode='w+', shape=(n,))
+        evaluate(columns, [name], chunksize, out={name: out})
+        out.flush()
+        del out
+        os.replace(staging, target)
+    return np.memmap(target, dtype=dtype, mode='r', shape=(n,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate and cache named derived columns')
+    parser.add_argument('names', nargs='*', help='derived columns to materialize (default: list them)')
+    parser.add_argument('--data', default=DATA_FILE)
+    args = parser.parse_args()
+
+    print("🧮 DERIVED COLUMNS")
+    print("="*60)
+    if not args.names:
+        for name, spec in DERIVED.items():
+            print(f"  {name:18s} {spec['dtype']:8s} = {spec['expression']}")
+            if spec['description']:
+                print(f"  {'':18s} {'':8s}   {spec['description']}")
+        return
+    for name in args.names:
+        start = time.perf_counter()
+        values = materialize(name, args.data)
+        print(f"⚡ {name}: {len(values):,} values in {time.perf_counter() - start:.2f}s "
+              f"(min {values.min():,.2f}, mean {values.mean(dtype=np.float64):,.2f}, max {values.max():,.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import CATEGORY_DOMAINS, CITIES, DATA_FILE, encode_column, load_flights
+
+# Fare percentile lookup ("is this price good?").
+#
+# Every (route, class, days_left) group is summarised by N_QUANTILES evenly
+# spaced empirical quantiles, computed for all groups at once from a single
+# sort of the data.  A fare's percentile is found by binary search in its
+# group's quantile row and linear interpolation between neighbours.  For bulk
+# scoring, the rows are laid end to end with a per-group offset added, so one
+# np.searchsorted call covers a whole feed regardless of how groups are mixed.
+
+PERCENTILE_FILE = 'fare_percentiles.npz'
+N_QUANTILES = 101
+MAX_DAYS = 49
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+N_GROUPS = len(CITIES) ** 2 * N_CLASSES * MAX_DAYS
+
+FEED_COLUMNS = ['source_city', 'destination_city', 'class', 'days_left', 'price']
+VERDICTS = [(25, 'good deal'), (75, 'typical'), (100.01, 'expensive')]
+
+
+def group_ids(route, travel_class, days_left):
+    """Group id per row, or -1 for unknown route/class or days_left outside 1-49."""
+    days_left = np.asarray(days_left, dtype=np.int32)
+    ids = (np.asarray(route, dtype=np.int32) * N_CLASSES + travel_class) * MAX_DAYS + days_left - 1
+    invalid = (np.asarray(route) < 0) | (np.asarray(travel_class) < 0) | (days_left < 1) | (days_left > MAX_DAYS)
+    ids[invalid] = -1
+    return ids
+
+
+def frame_groups(df):
+    """Group id of every row of a flights DataFrame."""
+    source = encode_column(df['source_city'], CITIES).astype(np.int32)
+    destination = encode_column(df['destination_city'], CITIES).astype(np.int32)
+    route = np.where((source < 0) | (destination < 0), -1, source * len(CITIES) + destination)
+    travel_class = encode_column(df['class'], CATEGORY_DOMAINS['class'])
+    # Unvalidated feeds may hold missing or non-numeric days_left: those rows get group -1
+    days_left = pd.to_numeric(df['days_left'], errors='coerce').fillna(0).to_numpy()
+    return group_ids(route, travel_class, days_left)
+
+
+def build_table(df, n_quantiles=N_QUANTILES):
+    """Compute the per-group quantile table from a flights DataFrame."""
+    groups = frame_groups(df)
+    price = df['price'].to_numpy(dtype=np.float64)
+    keep = groups >= 0
+    groups, price = groups[keep], price[keep]
+
+    order = np.lexsort((price, groups))
+    groups, price = groups[order], price[order]
+    starts = np.searchsorted(groups, np.arange(N_GROUPS))
+    counts = np.bincount(groups, minlength=N_GROUPS)
+
+    probs = np.linspace(0, 1, n_quantiles)
+    position = starts[:, None] + probs[None, :] * np.maximum(counts - 1, 0)[:, None]
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, starts[:, None] + np.maximum(counts - 1, 0)[:, None])
+    low, high = np.minimum(low, len(price) - 1), np.minimum(high, len(price) - 1)
+    frac = position - np.floor(position)
+    quantiles = price[low] * (1 - frac) + price[high] * frac
+    quantiles[counts == 0] = np.nan
+
+    return {'quantiles': quantiles.astype(np.float32), 'counts': counts.astype(np.int32),
+            'probs': (probs * 100).astype(np.float32)}
+
+
+def save_table(table, path=PERCENTILE_FILE):
+    np.savez_compressed(path, domains=json.dumps(CATEGORY_DOMAINS), **table)
+
+
+def load_table(path=PERCENTILE_FILE):
+    with np.load(path) as data:
+        if json.loads(str(data['domains'])) != CATEGORY_DOMAINS:
+            raise ValueError(f"{path} was built with different category domains")
+        table = {key: data[key] for key in ('quantiles', 'counts', 'probs')}
+    # Flattened, group-offset copy of the table used by the bulk searchsorted
+    quantiles = table['quantiles'].astype(np.float64)
+    finite = quantiles[np.isfinite(quantiles)]
+    table['span'] = float(finite.max() - finite.min() + 1) if len(finite) else 1.0
+    table['base'] = float(finite.min()) if len(finite) else 0.0
+    filled = np.where(np.isfinite(quantiles), quantiles, table['base'])
+    table['flat'] = ((filled - table['base']) + np.arange(N_GROUPS)[:, None] * table['span']).ravel()
+    return table
+
+
+def percentiles(table, groups, prices):
+    """Vectorized percentile (0-100) of each price within its group; NaN for empty or unknown groups."""
+    groups = np.asarray(groups, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    n_quantiles = table['quantiles'].shape[1]
+    valid = (groups >= 0) & (table['counts'][np.maximum(groups, 0)] > 0) & ~np.isnan(prices)
+    safe_groups = np.where(valid, groups, 0)
+
+    offsets = safe_groups * table['span']
+    clipped = np.clip(prices - table['base'], -0.5, table['span'] - 1)
+    slot = np.searchsorted(table['flat'], offsets + clipped, side='right') - safe_groups * n_quantiles
+
+    row = table['quantiles'][safe_groups].astype(np.float64)
+    probs = table['probs'].astype(np.float64)
+    hi = np.clip(slot, 1, n_quantiles - 1)
+    q_low = row[np.arange(len(row)), hi - 1]
+    q_high = row[np.arange(len(row)), hi]
+    width = q_high - q_low
+    frac = np.where(width > 0, (prices - q_low) / np.where(width > 0, width, 1), 1.0)
+    result = probs[hi - 1] + np.clip(frac, 0, 1) * (probs[hi] - probs[hi - 1])
+
+    result = np.where(slot <= 0, 0.0, np.where(slot >= n_quantiles, 100.0, result))
+    return np.where(valid, result, np.nan)
+
+
+def percentile_of(table, source, destination, travel_class, days_left, price):
+    """Percentile of a single quoted fare."""
+    for value, domain in ((source, CITIES), (destination, CITIES), (travel_class, CATEGORY_DOMAINS['class'])):
+        if value not in domain:
+            raise ValueError(f"Unknown value {value!r}, expected one of {domain}")
+    route = CITIES.index(source) * len(CITIES) + CITIES.index(destination)
+    groups = group_ids([route], [CATEGORY_DOMAINS['class'].index(travel_class)], [days_left])
+    return float(percentiles(table, groups, [price])[0])
+
+
+def verdict(percentile):
+    if np.isnan(percentile):
+        return 'no history'
+    return next(label for limit, label in VERDICTS if percentile < limit)
+
+
+def score_feed(table, df):
+    """Percentile of every fare in a DataFrame of quotes (at least the FEED_COLUMNS); NaN if unscorable."""
+    return percentiles(table, frame_groups(df), pd.to_numeric(df['price'], errors='coerce').to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Where does a fare sit relative to history?')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='build the percentile table from the dataset')
+    build.add_argument('--data', default=DATA_FILE)
+    build.add_argument('--output', default=PERCENTILE_FILE)
+
+    query = commands.add_parser('query', help='percentile of one quoted fare')
+    query.add_argument('source')
+    query.add_argument('destination')
+    query.add_argument('travel_class', choices=CATEGORY_DOMAINS['class'])
+    query.add_argument('days_left', type=int)
+    query.add_argument('price', type=float)
+    query.add_argument('--table', default=PERCENTILE_FILE)
+
+    score = commands.add_parser('score', help='percentiles for a whole price feed (CSV)')
+    score.add_argument('feed')
+    score.add_argument('--table', default=PERCENTILE_FILE)
+    score.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    print("📊 FARE PERCENTILES")
+    print("="*60)
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        table = build_table(load_flights(args.data))
+        save_table(table, args.output)
+        print(f"✅ {int((table['counts'] > 0).sum()):,} groups saved to '{args.output}' "
+              f"in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'query':
+        table = load_table(args.table)
+        pct = percentile_of(table, args.source, args.destination, args.travel_class, args.days_left, args.price)
+        print(f"{args.source} → {args.destination}, {args.travel_class}, {args.days_left} days out: "
+              f"${args.price:,.0f} is at the {pct:.0f}th percentile ({verdict(pct)})")
+    else:
+        table = load_table(args.table)
+        # Quotes are scored as given: no dataset validation, so no row is silently dropped
+        feed = pd.read_csv(args.feed)
+        missing = [col for col in FEED_COLUMNS if col not in feed.columns]
+        if missing:
+            parser.error(f"{args.feed} is missing columns {missing}")
+        start = time.perf_counter()
+        feed['fare_percentile'] = score_feed(table, feed)
+        seconds = time.perf_counter() - start
+        print(f"⚡ Scored {len(feed):,} fares in {seconds:.3f}s ({len(feed) / seconds:,.0f} fares/s)")
+        unscored = int(feed['fare_percentile'].isna().sum())
+        if unscored:
+            print(f"⚠️ {unscored:,} quotes have no percentile (unknown route or class, days_left outside "
+                  f"1-{MAX_DAYS}, missing or non-numeric price, or no history for the group)")
+        if args.output:
+            feed.to_csv(args.output, index=False)
+            print(f"✅ Saved to '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from flight_data import bounded_map, encode_frame, read_flights
+from price_model import MODEL_FILE, ONE_HOT, load_model
+
+# Batch fare scoring.
+#
+# The price model is linear in its one-hot features, so scoring does not need
+# the sparse matrix at all: each categorical column gets a lookup array of its
+# coefficients (with a trailing 0 so an unknown code of -1 contributes
+# nothing), and a batch is scored as intercept + sum of lookups[codes] + the
+# numeric terms.  Everything is whole-array NumPy; there is no per-row Python.
+
+_worker_scorer = None
+
+
+def build_scorer(model):
+    """Fold a trained SGD price model into per-column coefficient lookup arrays."""
+    coef = model.coef_.astype(np.float64)
+    lookups = {}
+    offset = 0
+    for col, size in ONE_HOT.items():
+        lookups[col] = np.append(coef[offset:offset + size], 0.0)
+        offset += size
+    return {'intercept': float(model.intercept_[0]), 'lookups': lookups, 'numeric': coef[offset:]}
+
+
+def load_scorer(path=MODEL_FILE):
+    return build_scorer(load_model(path))
+
+
+def score_columns(scorer, columns):
+    """Predicted prices for encoded columns (int8 codes plus ``duration`` and ``days_left``)."""
+    log_price = np.full(len(columns['duration']), scorer['intercept'])
+    for col, lookup in scorer['lookups'].items():
+        log_price += lookup[columns[col]]
+
+    duration = np.asarray(columns['duration'], dtype=np.float64)
+    days_left = np.asarray(columns['days_left'], dtype=np.float64)
+    w_duration, w_days, w_log_days = scorer['numeric']
+    log_price += (w_duration / 24) * duration + (w_days / 49) * days_left
+    log_price += (w_log_days / np.log(49)) * np.log(np.maximum(days_left, 1))
+    return np.exp(log_price)
+
+
+def score_frame(scorer, df):
+    """Score a raw DataFrame; returns predicted_price and, when ``price`` is present, residual."""
+    columns = encode_frame(df)
+    columns['duration'] = df['duration'].to_numpy()
+    columns['days_left'] = df['days_left'].to_numpy()
+    result = pd.DataFrame({'predicted_price': score_columns(scorer, columns)}, index=df.index)
+    if 'price' in df.columns:
+        result['residual'] = df['price'].to_numpy() - result['predicted_price'].to_numpy()
+    return result
+
+
+def _init_worker(model_path):
+    global _worker_scorer
+    _worker_scorer = load_scorer(model_path)
+
+
+def _score_chunk(df):
+    return score_frame(_worker_scorer, df)
+
+
+def read_batches(path, batch_size):
+    """Yield DataFrame batches from a CSV or Parquet file, indexed by row number in the file."""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Scoring Parquet files requires pyarrow (pip install pyarrow)")
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            df = batch.to_pandas()
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+    else:
+        # Unvalidated and float64: a bad number gets a NaN prediction rather than a wrapped one
+        yield from read_flights(path, chunksize=batch_size)
+
+
+def score_file(path, model_path=MODEL_FILE, batch_size=250_000, workers=1):
+    """Score every row of ``path`` in batches, optionally over a process pool.
+
+    Returns (predictions DataFrame, stats dict with rows, seconds, rows_per_second).
+    """
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            results = list(bounded_map(pool, _score_chunk, read_batches(path, batch_size), 2 * workers))
+    else:
+        scorer = load_scorer(model_path)
+        results = [score_frame(scorer, batch) for batch in read_batches(path, batch_size)]
+    predictions = pd.concat(results) if results else pd.DataFrame(columns=['predicted_price'])
+    seconds = time.perf_counter() - start
+    return predictions, {'rows': len(predictions), 'seconds': seconds,
+                         'rows_per_second': len(predictions) / seconds if seconds else float('inf')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score flight itineraries with the trained price model')
+    parser.add_argument('input', help='CSV or Parquet file of itineraries')
+    parser.add_argument('--model', default=MODEL_FILE, help='model trained by price_model.py')
+    parser.add_argument('--output', default=None, help='write predictions to this CSV/Parquet file')
+    parser.add_argument('--batch-size', type=int, default=250_000)
+    parser.add_argument('--workers', type=int, default=1, help='scoring processes')
+    args = parser.parse_args()
+
+    print("💸 BATCH FARE SCORING")
+    print("="*60)
+
+    predictions, stats = score_file(args.input, args.model, args.batch_size, args.workers)
+    print(f"⚡ Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)")
+
+    if 'residual' in predictions.columns:
+        residual = predictions['residual']
+        print(f"🎯 Residual vs actual: mean ${residual.mean():,.0f}, MAE ${residual.abs().mean():,.0f}")
+
+    if args.output:
+        if os.path.splitext(args.output)[1] == '.parquet':
+            predictions.to_parquet(args.output)
+        else:
+            predictions.to_csv(args.output)
+        print(f"✅ Predictions saved to '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+import hashlib
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Shared loading and encoding for the airlines flights dataset.
+#
+# Categorical columns are encoded against fixed domains so the same label
+# always gets the same small integer code, whether it comes from the full
+# CSV, a chunk of it, or a new scrape.  Labels outside a domain get -1.
+
+DATA_FILE = 'airlines_flights_data.csv'
+CACHE_DIR = '.flight_cache'
+
+TIME_SLOTS = ['Early_Morning', 'Morning', 'Afternoon', 'Evening', 'Night', 'Late_Night']
+CITIES = ['Delhi', 'Mumbai', 'Bangalore', 'Kolkata', 'Hyderabad', 'Chennai']
+
+CATEGORY_DOMAINS = {
+    'airline': ['Vistara', 'Air_India', 'Indigo', 'GO_FIRST', 'AirAsia', 'SpiceJet'],
+    'source_city': CITIES,
+    'destination_city': CITIES,
+    'departure_time': TIME_SLOTS,
+    'arrival_time': TIME_SLOTS,
+    'stops': ['zero', 'one', 'two_or_more'],
+    'class': ['Economy', 'Business'],
+}
+CATEGORICAL_COLUMNS = list(CATEGORY_DOMAINS)
+NUMERIC_COLUMNS = ['duration', 'days_left', 'price']
+
+DTYPES = {col: 'category' for col in CATEGORICAL_COLUMNS}
+DTYPES.update({'flight': 'category', 'duration': 'float32', 'days_left': 'int8', 'price': 'int32'})
+# Numbers are read wide and only downcast once checked: read_csv would wrap
+# 300 into an int8 and fails outright on a missing or non-numeric value
+READ_DTYPES = {col: dtype for col, dtype in DTYPES.items() if col not in NUMERIC_COLUMNS}
+
+
+def load_flights(path=DATA_FILE, chunksize=None, validate=True, quarantine=None):
+    """Read the dataset with compact dtypes (or an iterator of chunks when ``chunksize`` is set).
+
+    With ``validate`` (the default) rows failing :func:`validate_flights` are
+    dropped and written, with a ``reason`` column, to ``quarantine``
+    (``<name>.quarantine.csv`` next to the data by default).  The validation
+    report is attached to each returned frame as ``df.attrs['validation']``.
+    Unvalidated frames keep their numeric columns as float64 (see
+    :func:`read_flights`).
+    """
+    if not validate:
+        return read_flights(path, chunksize=chunksize)
+    quarantine = quarantine or quarantine_path(path)
+    if os.path.exists(quarantine):
+        os.remove(quarantine)
+    if chunksize is None:
+        return next(_validated_chunks(path, None, quarantine))
+    return _validated_chunks(path, chunksize, quarantine)
+
+
+def read_flights(source, chunksize=None, **kwargs):
+    """``pd.read_csv`` with categorical dtypes and float64 numeric columns (or an iterator of chunks).
+
+    Missing and non-numeric values become NaN instead of failing the read,
+    and nothing wraps around; :func:`downcast` gives the compact dtypes.
+    """
+    data = pd.read_csv(source, dtype=READ_DTYPES, chunksize=chunksize, **kwargs)
+    return _widen(data) if chunksize is None else map(_widen, data)
+
+
+def _widen(df):
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    return df
+
+
+def downcast(df):
+    """``df`` with its numeric columns in the compact :data:`DTYPES` (values must be in range)."""
+    return df.astype({col: DTYPES[col] for col in NUMERIC_COLUMNS if col in df.columns})
+
+
+def encode_column(values, domain):
+    """Map labels to int8 codes in ``domain`` order; unknown labels become -1."""
+    index = pd.Index(domain)
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        # Remap the (few) categories rather than every row
+        lookup = np.append(index.get_indexer(values.cat.categories), -1).astype(np.int8)
+        return lookup.take(values.cat.codes.to_numpy())
+    return index.get_indexer(pd.Index(values)).astype(np.int8)
+
+
+def encode_frame(df):
+    """Return {column: int8 codes} for every categorical column plus ``route``.
+
+    ``route`` is ``source * len(CITIES) + destination`` and is -1 when either
+    city is unknown.
+    """
+    codes = {col: encode_column(df[col], domain) for col, domain in CATEGORY_DOMAINS.items()}
+    route = codes['source_city'].astype(np.int16) * len(CITIES) + codes['destination_city']
+    route[(codes['source_city'] < 0) | (codes['destination_city'] < 0)] = -1
+    codes['route'] = route.astype(np.int8)
+    return codes
+
+
+def route_label(route_code):
+    source, destination = divmod(int(route_code), len(CITIES))
+    return f"{CITIES[source]}→{CITIES[destination]}"
+
+
+def dataset_fingerprint(path=DATA_FILE):
+    """Cheap fingerprint of a data file: size, mtime and a hash of its first megabyte."""
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(1 << 20))
+    return digest.hexdigest()[:16]
+
+
+# COLUMN CACHE
+#
+# Encoded columns are appended chunk by chunk to raw binary files and read
+# back as read-only memory maps, so neither building nor using the cache
+# needs the whole dataset in memory.
+
+CACHE_COLUMNS = {col: 'int8' for col in CATEGORICAL_COLUMNS + ['route']}
+CACHE_COLUMNS.update({'duration': 'float32', 'days_left': 'int8', 'price': 'int32'})
+
+
+def build_column_cache(path=DATA_FILE, cache_dir=CACHE_DIR, chunksize=200_000):
+    """Encode the dataset into ``cache_dir/<fingerprint>/`` unless it is already there.
+
+    Returns the cache directory.
+    """
+    target = os.path.join(cache_dir, dataset_fingerprint(path))
+    meta_path = os.path.join(target, 'meta.json')
+    if os.path.exists(meta_path):
+        return target
+
+    os.makedirs(target, exist_ok=True)
+    files = {col: open(os.path.join(target, f"{col}.bin"), 'wb') for col in CACHE_COLUMNS}
+    rows = 0
+    try:
+        for chunk in load_flights(path, chunksize=chunksize):
+            columns = encode_frame(chunk)
+            for col in NUMERIC_COLUMNS:
+                columns[col] = chunk[col].to_numpy()
+            for col, dtype in CACHE_COLUMNS.items():
+                np.asarray(columns[col], dtype=dtype).tofile(files[col])
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    with open(meta_path, 'w') as f:
+        json.dump({'rows': rows, 'source': os.path.abspath(path), 'columns': CACHE_COLUMNS,
+                   'domains': CATEGORY_DOMAINS}, f, indent=2)
+    return target
+
+
+def open_column_cache(cache_path):
+    """Return {column: read-only memmap} for a cache built by :func:`build_column_cache`."""
+    with open(os.path.join(cache_path, 'meta.json')) as f:
+        meta = json.load(f)
+    return {col: np.memmap(os.path.join(cache_path, f"{col}.bin"), dtype=dtype, mode='r', shape=(meta['rows'],))
+            for col, dtype in meta['columns'].items()}
+
+
+# VALIDATION
+#
+# Every check is a columnar operation over the whole frame (or chunk), and
+# failures are recorded as a bitmask per row, so all checks run in one pass
+# and a row can fail several at once.  Categorical columns are checked per
+# category, not per row: only a column that actually has an unknown label
+# (or a missing value) costs a row-level pass, and the flight pattern is
+# matched against the distinct flight codes only.  Numeric columns arrive as
+# float64 (see read_flights): NaN, and a fraction in an integer column, is a
+# bad value, anything else outside NUMERIC_RANGES is out of range.  Only
+# rows with good numbers count as duplicates (a copy of a rejected row is
+# rejected for the same reason anyway); the first occurrence is kept.
+#
+# Duplicate detection is whole-file, also in chunked mode: the sorted hashes
+# of every row kept so far (8 bytes per row, a few MB for 300k rows) are
+# carried from chunk to chunk, so memory there is the chunk plus O(rows).
+#
+# Known shortfall: on the clean 300k-row file the checks cost about 8% of
+# the read (the duplicate pass is half of that), and about 13% once dropping
+# the rejected rows and downcasting are included -- over the 5% target.
+
+FLIGHT_PATTERN = r'[A-Z0-9]{2}-\d{1,4}'
+NUMERIC_RANGES = {'duration': (0.5, 60.0), 'days_left': (1, 49), 'price': (1, 1_000_000)}
+CHECKS = ([f"unknown_{col}" for col in CATEGORICAL_COLUMNS] + ['bad_flight_code']
+          + [f"{col}_out_of_range" for col in NUMERIC_COLUMNS] + [f"bad_{col}" for col in NUMERIC_COLUMNS]
+          + ['duplicate'])
+INTEGER_COLUMNS = [col for col in NUMERIC_COLUMNS if np.dtype(DTYPES[col]).kind == 'i']
+
+_FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def quarantine_path(path):
+    return f"{os.path.splitext(path)[0]}.quarantine.csv"
+
+
+def _category_codes(values):
+    """(row codes, categories) of a column, converting it to categorical if needed."""
+    values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+    return values.cat.codes.to_numpy(), values.cat.categories
+
+
+def _domain_lookup(categories, domain):
+    """Domain code of every category, plus a trailing -1 that missing values (code -1) pick up."""
+    return np.append(pd.Index(domain).get_indexer(categories), -1)
+
+
+def label_hashes(values):
+    """uint64 hash of every label, computed once per distinct label; missing values hash to 0."""
+    codes, categories = _category_codes(values)
+    return np.append(pd.util.hash_array(categories.to_numpy(dtype=object)), np.uint64(0)).take(codes)
+
+
+def hash_columns(columns):
+    """Mix a sequence of uint64 columns into one uint64 hash per row (FNV-1a over words)."""
+    hashes = None
+    with np.errstate(over='ignore'):
+        for column in columns:
+            if hashes is None:
+                hashes = np.full(len(column), 0xCBF29CE484222325, dtype=np.uint64)
+            hashes ^= column
+            hashes *= _FNV_PRIME
+        hashes ^= hashes >> np.uint64(29)
+    return hashes
+
+
+def row_hashes(df):
+    """uint64 content hash of every row (ignoring the row id), stable across chunks and files."""
+    # Pack the categorical domain codes (3 bits each), days_left and the
+    # float32 duration bits into one word; each categorical column costs one
+    # take from a per-category table that already holds its shifted code.
+    with np.errstate(invalid='ignore'):  # rows with bad numbers hash to garbage; callers skip them
+        days_left, price = df['days_left'].to_numpy().astype(np.uint64), df['price'].to_numpy().astype(np.uint64)
+    packed = df['duration'].to_numpy(dtype=np.float32).view(np.uint32).astype(np.uint64) << np.uint64(32)
+    packed |= (days_left & np.uint64(0xFF)) << np.uint64(21)
+    for i, col in enumerate(CATEGORICAL_COLUMNS):
+        codes, categories = _category_codes(df[col])
+        shifted = (_domain_lookup(categories, CATEGORY_DOMAINS[col]) + 1).astype(np.uint64) << np.uint64(3 * i)
+        packed |= shifted.take(codes)
+    return hash_columns([packed, price, label_hashes(df['flight'])])
+
+
+def validate_flights(df, seen=None):
+    """Return (uint16 bitmask of failed :data:`CHECKS` per row, row hashes); 0 means valid.
+
+    ``seen`` is an optional sorted array of row hashes from earlier chunks;
+    rows matching it count as duplicates (see :func:`find_duplicates`).
+    """
+    failures = np.zeros(len(df), dtype=np.uint16)
+
+    def flag(bit, mask):
+        if mask.any():
+            failures[mask] |= np.uint16(1 << bit)
+
+    for bit, col in enumerate(CATEGORICAL_COLUMNS):
+        codes, categories = _category_codes(df[col])
+        known = _domain_lookup(categories, CATEGORY_DOMAINS[col]) >= 0
+        if not known[:-1].all() or (codes < 0).any():
+            flag(bit, ~known.take(codes))
+
+    bit = len(CATEGORICAL_COLUMNS)
+    codes, flights = _category_codes(df['flight'])
+    valid_code = np.append(np.asarray(flights.str.fullmatch(FLIGHT_PATTERN), dtype=bool), False)
+    if not valid_code[:-1].all() or (codes < 0).any():
+        flag(bit, ~valid_code.take(codes))
+
+    bad_numbers = np.zeros(len(df), dtype=bool)
+    for bit, col in enumerate(NUMERIC_COLUMNS, start=bit + 1):
+        bad, out_of_range = numeric_failures(df, col)
+        flag(bit, out_of_range)
+        flag(bit + len(NUMERIC_COLUMNS), bad)
+        bad_numbers |= bad | out_of_range
+
+    duplicate, hashes = find_duplicates(df, seen, bad_numbers if bad_numbers.any() else None)
+    flag(len(CHECKS) - 1, duplicate)
+    return failures, hashes
+
+
+def numeric_failures(df, col):
+    """(bad value, out of range) masks of a numeric column; bad is NaN or, for integer columns, a fraction."""
+    low, high = NUMERIC_RANGES[col]
+    values = df[col].to_numpy(dtype=np.float64)
+    bad = np.isnan(values)
+    if col in INTEGER_COLUMNS:
+        bad |= np.floor(values) != values
+    return bad, ~bad & ~((values >= low) & (values <= high))
+
+
+def numbers_valid(df):
+    """Mask of rows whose numeric columns are all good and in range (the numeric checks only)."""
+    valid = np.ones(len(df), dtype=bool)
+    for col in NUMERIC_COLUMNS:
+        bad, out_of_range = numeric_failures(df, col)
+        valid &= ~(bad | out_of_range)
+    return valid
+
+
+def find_duplicates(df, seen=None, skip=None):
+    """Return (mask of rows repeating an earlier row, row hashes or None).
+
+    Without ``seen`` only rows sharing an exact (price, flight, days_left)
+    key are hashed in full, which is usually a small fraction of the frame.
+    With ``seen`` (a sorted array of hashes of earlier chunks) every row is
+    hashed, and the hashes are returned so the caller can extend ``seen``.
+    Rows in the optional ``skip`` mask (bad numbers) are never duplicates
+    and their hashes are not returned; no copy of the frame is made.
+    """
+    keep = None if skip is None else ~skip
+    if seen is not None:
+        hashes = row_hashes(df)
+        duplicate = pd.Series(hashes).duplicated().to_numpy(copy=True)
+        if len(seen):
+            position = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+            duplicate |= seen[position] == hashes
+        if keep is None:
+            return duplicate, hashes
+        return duplicate & keep, hashes[keep]
+
+    flight_codes, _ = _category_codes(df['flight'])
+    with np.errstate(invalid='ignore'):  # NaN in skipped rows
+        key = df['price'].to_numpy().astype(np.int64) << 24
+        key |= df['days_left'].to_numpy().astype(np.int64) & 0xFF
+    key |= (flight_codes.astype(np.int64) & 0xFFFF) << 8
+    duplicate = np.zeros(len(df), dtype=bool)
+    candidate = pd.Series(key).duplicated(keep=False).to_numpy()
+    candidates = np.flatnonzero(candidate if keep is None else candidate & keep)
+    if len(candidates):
+        duplicate[candidates] = pd.Series(row_hashes(df.iloc[candidates])).duplicated().to_numpy()
+    return duplicate, None
+
+
+def failure_reasons(failures):
+    """Comma-separated check names for each bitmask (computed per distinct mask)."""
+    masks, inverse = np.unique(failures, return_inverse=True)
+    labels = np.array([','.join(name for i, name in enumerate(CHECKS) if mask >> i & 1) for mask in masks],
+                      dtype=object)
+    return labels[inverse]
+
+
+def _validated_chunks(path, chunksize, quarantine):
+    seen = None if chunksize is None else np.empty(0, dtype=np.uint64)
+    start = time.perf_counter()
+    data = read_flights(path, chunksize=chunksize)
+    for chunk in ([data] if chunksize is None else data):
+        loaded = time.perf_counter()
+        failures, hashes = validate_flights(chunk, seen)
+        if seen is not None:
+            seen = np.union1d(seen, hashes)
+        bad = np.flatnonzero(failures)
+        if len(bad):
+            rejected = chunk.iloc[bad].copy()
+            rejected['reason'] = failure_reasons(failures[bad])
+            rejected.to_csv(quarantine, mode='a', header=not os.path.exists(quarantine), index=False)
+            chunk = chunk.iloc[np.flatnonzero(failures == 0)]
+        chunk = downcast(chunk)
+        validated = time.perf_counter()
+
+        by_check = {name: int(np.count_nonzero(failures & np.uint16(1 << i))) for i, name in enumerate(CHECKS)}
+        chunk.attrs['validation'] = {
+            'rows': len(failures),
+            'rejected': len(bad),
+            'by_check': {name: count for name, count in by_check.items() if count},
+            'quarantine': quarantine if len(bad) else None,
+            'load_seconds': loaded - start,
+            'validate_seconds': validated - loaded,
+        }
+        yield chunk
+        start = time.perf_counter()
+
+
+def bounded_map(pool, fn, items, in_flight):
+    """Like ``pool.map(fn, items)`` but submits at most ``in_flight`` items ahead of the results.
+
+    ``pool.map`` drains the whole ``items`` iterator up front, which defeats
+    streaming a file in batches; here batches are read only as results come
+    back, so memory stays bounded.  Results are yielded in input order.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+if __name__ == '__main__':
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    df = load_flights(path)
+    report = df.attrs['validation']
+    print(f"✅ {report['rows'] - report['rejected']:,} of {report['rows']:,} rows passed validation")
+    for name, count in report['by_check'].items():
+        print(f"  {name}: {count:,}")
+    if report['quarantine']:
+        print(f"🚧 {report['rejected']:,} rows quarantined to '{report['quarantine']}'")
+    print(f"⏱️ load {report['load_seconds']:.3f}s, validation {report['validate_seconds']:.3f}s "
+          f"(+{report['validate_seconds'] / report['load_seconds']:.1%})")
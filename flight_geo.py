@@ -0,0 +1,183 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import CATEGORY_DOMAINS, CITIES, DATA_FILE, encode_frame, load_flights, route_label
+
+# Geography of the route network.
+#
+# City coordinates live in one table in CITIES order, so a city code indexes
+# it directly.  The great-circle distance of every (source, destination)
+# pair is computed once with a vectorized haversine and flattened in route
+# code order (source * len(CITIES) + destination), so joining distances onto
+# rows is a single take on the route codes.  Route and airline metrics come
+# from one bincount per measure over the combined route x airline code, and
+# the route and airline tables are sums of that grid.  Price per km is
+# total price over total distance; speed is distance over scheduled duration
+# (so stops and layovers slow a route down).  The route-flow map is drawn
+# from the aggregated route table only.
+
+EARTH_RADIUS_KM = 6371.0
+CITY_COORDINATES = {
+    'Delhi': (28.7041, 77.1025),
+    'Mumbai': (19.0760, 72.8777),
+    'Bangalore': (12.9716, 77.5946),
+    'Kolkata': (22.5726, 88.3639),
+    'Hyderabad': (17.3850, 78.4867),
+    'Chennai': (13.0827, 80.2707),
+}
+CITY_LATLON = np.array([CITY_COORDINATES[city] for city in CITIES])
+MAP_CENTER = (20.5937, 78.9629)
+N_AIRLINES = len(CATEGORY_DOMAINS['airline'])
+MEASURES = ('price', 'distance_km', 'duration')
+
+
+def haversine_matrix(lat, lon, lat2=None, lon2=None):
+    """Great-circle distances (km) between every point of (lat, lon) and every point of (lat2, lon2)."""
+    lat2 = lat if lat2 is None else lat2
+    lon2 = lon if lon2 is None else lon2
+    phi1, phi2 = np.radians(lat)[:, None], np.radians(lat2)[None, :]
+    dphi = phi2 - phi1
+    dlambda = np.radians(lon2)[None, :] - np.radians(lon)[:, None]
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+DISTANCE_KM = haversine_matrix(CITY_LATLON[:, 0], CITY_LATLON[:, 1])
+ROUTE_KM = DISTANCE_KM.ravel()
+
+
+def route_distances(route_codes):
+    """Distance (km) of every row's route; NaN where the route is unknown (-1)."""
+    route_codes = np.asarray(route_codes, dtype=np.int64)
+    return np.where(route_codes >= 0, np.append(ROUTE_KM, np.nan).take(route_codes), np.nan)
+
+
+def _metric_table(sums, index):
+    n = sums['count']
+    safe = np.maximum(n, 1)
+    table = pd.DataFrame({
+        'count': n.astype(np.int64),
+        'mean_price': np.where(n > 0, sums['price'] / safe, np.nan),
+        'distance_km': np.where(n > 0, sums['distance_km'] / safe, np.nan),
+        'mean_duration': np.where(n > 0, sums['duration'] / safe, np.nan),
+        'price_per_km': np.where(sums['distance_km'] > 0, sums['price'] / np.maximum(sums['distance_km'], 1e-9), np.nan),
+        'speed_kmh': np.where(sums['duration'] > 0, sums['distance_km'] / np.maximum(sums['duration'], 1e-9), np.nan),
+    }, index=index)
+    return table[table['count'] > 0]
+
+
+def route_metrics(df):
+    """{'route_airline', 'route', 'airline'}: count, mean price/distance/duration, price per km, speed."""
+    codes = encode_frame(df)
+    route, airline = codes['route'].astype(np.int64), codes['airline'].astype(np.int64)
+    ok = (route >= 0) & (airline >= 0)
+    key = route[ok] * N_AIRLINES + airline[ok]
+    size = len(ROUTE_KM) * N_AIRLINES
+    values = {'price': df['price'].to_numpy()[ok].astype(np.float64),
+              'distance_km': ROUTE_KM.take(route[ok]),
+              'duration': df['duration'].to_numpy()[ok].astype(np.float64)}
+    grid = {'count': np.bincount(key, minlength=size).astype(np.float64).reshape(-1, N_AIRLINES)}
+    for measure in MEASURES:
+        grid[measure] = np.bincount(key, weights=values[measure], minlength=size).reshape(-1, N_AIRLINES)
+
+    routes = np.arange(len(ROUTE_KM))
+    route_index = pd.Index([route_label(code) for code in routes], name='route')
+    route_table = _metric_table({k: v.sum(axis=1) for k, v in grid.items()}, route_index)
+    source, destination = np.divmod(routes, len(CITIES))
+    route_table['source_city'] = pd.Series(np.asarray(CITIES)[source], index=route_index)
+    route_table['destination_city'] = pd.Series(np.asarray(CITIES)[destination], index=route_index)
+    pairs = pd.MultiIndex.from_product([route_index, CATEGORY_DOMAINS['airline']], names=['route', 'airline'])
+    return {
+        'route_airline': _metric_table({k: v.ravel() for k, v in grid.items()}, pairs),
+        'route': route_table,
+        'airline': _metric_table({k: v.sum(axis=0) for k, v in grid.items()},
+                                 pd.Index(CATEGORY_DOMAINS['airline'], name='airline')),
+    }
+
+
+def city_summary(route_table):
+    """Departures, mean price and served destinations per source city, from the route table."""
+    grouped = route_table.assign(revenue=route_table['count'] * route_table['mean_price']).groupby('source_city')
+    summary = pd.DataFrame({'departures': grouped['count'].sum(), 'destinations': grouped['count'].size()})
+    summary['mean_price'] = grouped['revenue'].sum() / summary['departures']
+    return summary.reindex(CITIES).dropna()
+
+
+def _arc(source, destination, bend=0.15, points=24):
+    """Quadratic Bezier from source to destination bowed to its right, so A→B and B→A stay apart."""
+    source, destination = np.asarray(source), np.asarray(destination)
+    delta = destination - source
+    control = (source + destination) / 2 + bend * np.array([-delta[1], delta[0]])
+    t = np.linspace(0, 1, points)[:, None]
+    return ((1 - t) ** 2 * source + 2 * (1 - t) * t * control + t ** 2 * destination).tolist()
+
+
+def route_flow_map(metrics, max_weight=12):
+    """folium map with one arc per route, width by flight volume and colour by price per km."""
+    try:
+        import folium
+        from branca.colormap import LinearColormap
+    except ImportError:
+        raise ImportError("The route-flow map requires folium (pip install folium)")
+    # A route without a price per km (no flights, or a city to itself) gets no arc
+    routes = metrics['route'].dropna(subset=['price_per_km'])
+    m = folium.Map(location=MAP_CENTER, zoom_start=5, tiles='CartoDB positron')
+    if routes.empty:
+        return m
+    colors = LinearColormap(['#2ca02c', '#ff7f0e', '#d62728'], vmin=routes['price_per_km'].min(),
+                            vmax=routes['price_per_km'].max(), caption='Average price per km ($)')
+    busiest = routes['count'].max()
+    for label, row in routes.sort_values('count').iterrows():
+        folium.PolyLine(
+            _arc(CITY_COORDINATES[row['source_city']], CITY_COORDINATES[row['destination_city']]),
+            weight=1 + (max_weight - 1) * row['count'] / busiest,
+            color=colors(row['price_per_km']),
+            opacity=0.75,
+            tooltip=(f"<b>{label}</b><br>Flights: {row['count']:,}<br>Distance: {row['distance_km']:,.0f} km<br>"
+                     f"Avg price: ${row['mean_price']:,.0f} (${row['price_per_km']:.2f}/km)<br>"
+                     f"Speed: {row['speed_kmh']:,.0f} km/h"),
+        ).add_to(m)
+    for city, row in city_summary(routes).iterrows():
+        folium.Marker(
+            CITY_COORDINATES[city],
+            popup=f"""
+            <b>{city}</b><br>
+            Total Flights: {int(row['departures']):,}<br>
+            Avg Price: ${row['mean_price']:,.0f}<br>
+            Destinations: {int(row['destinations'])}
+            """,
+            tooltip=city,
+            icon=folium.Icon(color='red', icon='plane')
+        ).add_to(m)
+    colors.add_to(m)
+    return m
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distance-aware route and airline metrics')
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--output', default='route_flow_map.html')
+    args = parser.parse_args()
+
+    print("🌏 GEO ROUTE METRICS")
+    print("="*60)
+    df = load_flights(args.data)
+    start = time.perf_counter()
+    metrics = route_metrics(df)
+    print(f"⚡ Metrics for {len(df):,} flights in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    columns = ['count', 'distance_km', 'mean_price', 'price_per_km', 'speed_kmh']
+    print("\nRoutes by price per km:")
+    print(metrics['route'][columns].sort_values('price_per_km', ascending=False).round(2).to_string())
+    print("\nAirlines:")
+    print(metrics['airline'][columns[:1] + columns[2:]].sort_values('price_per_km').round(2).to_string())
+
+    route_flow_map(metrics).save(args.output)
+    print(f"\n✅ Saved '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import CATEGORY_DOMAINS, CITIES, encode_frame, load_flights
+
+# Indexed "best value" recommender.
+#
+# value_score = w_price * (1 - price / max_price) + w_duration * (1 - duration / max_duration)
+#
+# For any non-negative weights a flight can only be in the top k of its cell
+# if fewer than k flights in the cell dominate it (cheaper and shorter), so
+# every cell keeps just its first ``max_k`` Pareto layers on (price, duration).
+# Cells are (route, class, days_left) laid out contiguously by days_left, so a
+# days_left range is a single slice of the candidate arrays and a query scores
+# only a few dozen candidates, whatever the weights.
+
+DEFAULT_WEIGHTS = {'price': 1.0, 'duration': 1.0}
+MAX_DAYS = 49
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+
+
+def _cell_ids(route, travel_class, days_left):
+    return (route.astype(np.int32) * N_CLASSES + travel_class) * MAX_DAYS + (days_left.astype(np.int32) - 1)
+
+
+def pareto_layers(cells, price, duration, max_layers):
+    """Pareto layer (0-based) of every row within its cell, or -1 beyond ``max_layers``."""
+    order = np.lexsort((duration, price, cells))
+    cells, duration = cells[order], duration[order]
+    layer = np.full(len(order), -1, dtype=np.int16)
+    remaining = np.ones(len(order), dtype=bool)
+
+    for current in range(max_layers):
+        idx = np.flatnonzero(remaining)
+        if not len(idx):
+            break
+        # Rows sorted by price: a row is on the skyline if it is shorter than
+        # every cheaper remaining row of its cell.
+        best_before = pd.Series(duration[idx]).groupby(cells[idx]).cummin().groupby(cells[idx]).shift(1)
+        on_front = (best_before.isna() | (duration[idx] < best_before)).to_numpy()
+        layer[idx[on_front]] = current
+        remaining[idx[on_front]] = False
+
+    result = np.empty_like(layer)
+    result[order] = layer
+    return result
+
+
+def build_index(df, max_k=10):
+    """Build the recommender index over a flights DataFrame."""
+    codes = encode_frame(df)
+    price = df['price'].to_numpy(dtype=np.float64)
+    duration = df['duration'].to_numpy(dtype=np.float64)
+    days_left = df['days_left'].to_numpy()
+
+    valid = (codes['route'] >= 0) & (codes['class'] >= 0) & (days_left >= 1) & (days_left <= MAX_DAYS)
+    rows = np.flatnonzero(valid)
+    cells = _cell_ids(codes['route'][rows], codes['class'][rows], days_left[rows])
+    layers = pareto_layers(cells, price[rows], duration[rows], max_k)
+
+    keep = layers >= 0
+    rows, cells = rows[keep], cells[keep]
+    order = np.argsort(cells, kind='stable')
+    rows, cells = rows[order], cells[order]
+
+    n_cells = len(CITIES) ** 2 * N_CLASSES * MAX_DAYS
+    return {
+        'max_k': max_k,
+        'max_price': price.max(),
+        'max_duration': duration.max(),
+        'offsets': np.searchsorted(cells, np.arange(n_cells + 1)),
+        'rows': df.index.to_numpy()[rows],
+        'price': price[rows],
+        'duration': duration[rows],
+        'frame': df.iloc[rows][['airline', 'flight', 'source_city', 'destination_city', 'class',
+                                'stops', 'departure_time', 'price', 'duration', 'days_left']].reset_index(drop=True),
+    }
+
+
+def _candidate_positions(index, source, destination, travel_class, days_left_range):
+    def domain_codes(value, domain):
+        if value is None:
+            return range(len(domain))
+        if value not in domain:
+            raise ValueError(f"Unknown value {value!r}, expected one of {domain}")
+        return [domain.index(value)]
+
+    first_day, last_day = days_left_range
+    first_day, last_day = max(first_day, 1), min(last_day, MAX_DAYS)
+    offsets = index['offsets']
+    slices = []
+    for src in domain_codes(source, CITIES):
+        for dst in domain_codes(destination, CITIES):
+            for cls in domain_codes(travel_class, CATEGORY_DOMAINS['class']):
+                base = ((src * len(CITIES) + dst) * N_CLASSES + cls) * MAX_DAYS
+                start, stop = offsets[base + first_day - 1], offsets[base + last_day]
+                if stop > start:
+                    slices.append(np.arange(start, stop))
+    if len(slices) == 1:
+        return slices[0]
+    return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+
+def top_k(index, source=None, destination=None, travel_class=None, days_left_range=(1, MAX_DAYS),
+          k=5, weights=None):
+    """Return the ``k`` best-value flights matching the query as a DataFrame.
+
+    ``None`` for source, destination or class means any.  ``weights`` maps
+    'price' and 'duration' to non-negative weights (default: both 1).
+    """
+    if k > index['max_k']:
+        raise ValueError(f"Index was built for k <= {index['max_k']}, got k={k}")
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    if weights['price'] < 0 or weights['duration'] < 0:
+        raise ValueError("Weights must be non-negative")
+
+    positions = _candidate_positions(index, source, destination, travel_class, days_left_range)
+    scores = (weights['price'] * (1 - index['price'][positions] / index['max_price'])
+              + weights['duration'] * (1 - index['duration'][positions] / index['max_duration']))
+    if len(positions) > k:
+        best = np.argpartition(-scores, k)[:k]
+    else:
+        best = np.arange(len(positions))
+    best = best[np.argsort(-scores[best], kind='stable')]
+
+    result = index['frame'].iloc[positions[best]].copy()
+    result.index = index['rows'][positions[best]]
+    result['value_score'] = scores[best]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Best-value flight recommendations')
+    parser.add_argument('source', nargs='?', default=None)
+    parser.add_argument('destination', nargs='?', default=None)
+    parser.add_argument('--class', dest='travel_class', default=None, choices=CATEGORY_DOMAINS['class'])
+    parser.add_argument('--days', nargs=2, type=int, default=[1, MAX_DAYS], metavar=('FROM', 'TO'))
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--price-weight', type=float, default=1.0)
+    parser.add_argument('--duration-weight', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print("🎯 BEST VALUE FLIGHTS")
+    print("="*60)
+    df = load_flights()
+
+    start = time.perf_counter()
+    index = build_index(df, max_k=max(10, args.k))
+    print(f"📦 Index built in {time.perf_counter() - start:.2f}s ({len(index['rows']):,} candidates)")
+
+    start = time.perf_counter()
+    result = top_k(index, args.source, args.destination, args.travel_class, tuple(args.days), args.k,
+                   {'price': args.price_weight, 'duration': args.duration_weight})
+    print(f"⚡ Query answered in {(time.perf_counter() - start) * 1000:.3f} ms")
+    print(result)
+
+
+if __name__ == '__main__':
+    main()
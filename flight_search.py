@@ -0,0 +1,169 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from flight_data import CATEGORY_DOMAINS, CITIES, encode_frame, load_flights
+
+# Flight search index for range + threshold queries.
+#
+# Rows are partitioned by (source_city, destination_city, class, stops) and,
+# within a partition, sorted by days_left then price.  A single int32 sort key
+# (partition * KEY_STRIDE + days_left) turns a days_left range into two binary
+# searches.  Rows are also grouped into fixed-size blocks with their minimum
+# price, so blocks that cannot contain a fare under the threshold are skipped
+# without looking at their rows.
+
+KEY_STRIDE = 64
+BLOCK_SIZE = 64
+MAX_DAYS = 49
+RESULT_COLUMNS = ['airline', 'flight', 'source_city', 'destination_city', 'class', 'stops',
+                  'departure_time', 'arrival_time', 'duration', 'days_left', 'price']
+
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+N_STOPS = len(CATEGORY_DOMAINS['stops'])
+
+
+def _partition(route, travel_class, stops):
+    return (route.astype(np.int32) * N_CLASSES + travel_class) * N_STOPS + stops
+
+
+def build_search_index(df, block_size=BLOCK_SIZE):
+    """Sort the flights into the partitioned layout and compute per-block price minima."""
+    codes = encode_frame(df)
+    days_left = df['days_left'].to_numpy().astype(np.int32)
+    price = df['price'].to_numpy()
+
+    valid = (codes['route'] >= 0) & (codes['class'] >= 0) & (codes['stops'] >= 0)
+    rows = np.flatnonzero(valid)
+    keys = _partition(codes['route'][rows], codes['class'][rows], codes['stops'][rows]) * KEY_STRIDE + days_left[rows]
+    order = np.lexsort((price[rows], keys))
+    rows, keys = rows[order], keys[order]
+    sorted_price = price[rows]
+
+    # Pad the last block with a price no query can undercut (prices may be int or float)
+    fill = np.inf if sorted_price.dtype.kind == 'f' else np.iinfo(sorted_price.dtype).max
+    padded = np.full(-(-len(rows) // block_size) * block_size, fill, dtype=sorted_price.dtype)
+    padded[:len(rows)] = sorted_price
+    return {
+        'block_size': block_size,
+        'keys': keys,
+        'price': sorted_price,
+        'block_min': padded.reshape(-1, block_size).min(axis=1),
+        'rows': df.index.to_numpy()[rows],
+        'frame': df.iloc[rows][RESULT_COLUMNS].reset_index(drop=True),
+    }
+
+
+def _codes(value, domain):
+    if value is None:
+        return range(len(domain))
+    if value not in domain:
+        raise ValueError(f"Unknown value {value!r}, expected one of {domain}")
+    return [domain.index(value)]
+
+
+def search_positions(index, source, destination, travel_class, stops=None,
+                     days_left_range=(1, MAX_DAYS), max_price=None):
+    """Positions (into the sorted layout) of every row matching the query."""
+    # Clamp to the key range: a day outside 1..MAX_DAYS would reach into the neighbouring partition
+    first_day, last_day = days_left_range
+    first_day, last_day = max(first_day, 1), min(last_day, MAX_DAYS)
+    keys, prices, block = index['keys'], index['price'], index['block_size']
+    found = []
+    for src in _codes(source, CITIES):
+        for dst in _codes(destination, CITIES):
+            for cls in _codes(travel_class, CATEGORY_DOMAINS['class']):
+                for stop in _codes(stops, CATEGORY_DOMAINS['stops']):
+                    base = (((src * len(CITIES) + dst) * N_CLASSES + cls) * N_STOPS + stop) * KEY_STRIDE
+                    # Probe with the key dtype so searchsorted does not upcast (copy) the keys
+                    lo = np.searchsorted(keys, keys.dtype.type(base + first_day), 'left')
+                    hi = np.searchsorted(keys, keys.dtype.type(base + last_day), 'right')
+                    if hi <= lo:
+                        continue
+                    if max_price is None:
+                        found.append(np.arange(lo, hi))
+                        continue
+
+                    first_block, last_block = lo // block, (hi - 1) // block
+                    blocks = first_block + np.flatnonzero(index['block_min'][first_block:last_block + 1] <= max_price)
+                    positions = (blocks[:, None] * block + np.arange(block)).ravel()
+                    positions = positions[(positions >= lo) & (positions < hi)]
+                    found.append(positions[prices[positions] <= max_price])
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def search(index, source, destination, travel_class, stops=None, days_left_range=(1, MAX_DAYS),
+           max_price=None, limit=None):
+    """Matching flights sorted by price (cheapest first), optionally the first ``limit`` only."""
+    positions = search_positions(index, source, destination, travel_class, stops, days_left_range, max_price)
+    positions = positions[np.argsort(index['price'][positions], kind='stable')]
+    if limit is not None:
+        positions = positions[:limit]
+    result = index['frame'].take(positions)
+    result.index = index['rows'][positions]
+    return result
+
+
+def pandas_search(df, source, destination, travel_class, stops=None, days_left_range=(1, MAX_DAYS),
+                  max_price=None, limit=None):
+    """The equivalent full boolean-mask query, used as the benchmark baseline."""
+    mask = ((df['source_city'] == source) & (df['destination_city'] == destination)
+            & (df['class'] == travel_class) & df['days_left'].between(*days_left_range))
+    if stops is not None:
+        mask &= df['stops'] == stops
+    if max_price is not None:
+        mask &= df['price'] <= max_price
+    result = df.loc[mask, RESULT_COLUMNS].sort_values('price', kind='stable')
+    return result if limit is None else result.head(limit)
+
+
+def _time_per_call(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search flights by route, class, stops, days left and price')
+    parser.add_argument('source')
+    parser.add_argument('destination')
+    parser.add_argument('--class', dest='travel_class', default='Economy', choices=CATEGORY_DOMAINS['class'])
+    parser.add_argument('--stops', default=None, choices=CATEGORY_DOMAINS['stops'])
+    parser.add_argument('--days', nargs=2, type=int, default=[1, MAX_DAYS], metavar=('FROM', 'TO'))
+    parser.add_argument('--max-price', type=float, default=None)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--benchmark', action='store_true', help='compare against the pandas mask query')
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    print("🔎 FLIGHT SEARCH")
+    print("="*60)
+    df = load_flights()
+
+    start = time.perf_counter()
+    index = build_search_index(df)
+    print(f"📦 Index built in {time.perf_counter() - start:.2f}s")
+
+    args.days = [max(args.days[0], 1), min(args.days[1], MAX_DAYS)]
+    query = (args.source, args.destination, args.travel_class, args.stops, tuple(args.days), args.max_price)
+    result = search(index, *query, limit=args.limit)
+    print(f"\n{args.source} → {args.destination}, {args.travel_class}, stops={args.stops or 'any'}, "
+          f"{args.days[0]}-{args.days[1]} days out" + (f", under ${args.max_price:,.0f}" if args.max_price else ""))
+    print(result if len(result) else "No matching flights")
+
+    if args.benchmark:
+        expected = pandas_search(df, *query, limit=args.limit)
+        if result['price'].tolist() != expected['price'].tolist():
+            print(f"❌ Index and pandas results differ:\n{expected}")
+            sys.exit(1)
+        indexed = _time_per_call(lambda: search(index, *query, limit=args.limit), args.repeats)
+        masked = _time_per_call(lambda: pandas_search(df, *query, limit=args.limit), args.repeats)
+        print(f"\n⏱️ Index: {indexed * 1000:.3f} ms/query, pandas mask: {masked * 1000:.3f} ms/query "
+              f"({masked / indexed:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
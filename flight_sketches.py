@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import CATEGORY_DOMAINS, CITIES, DATA_FILE, encode_frame, load_flights, route_label
+
+# Streaming sketches for heavy hitters and distinct counts.
+#
+# Every batch is first reduced to its distinct items with exact counts
+# (bincount for routes, factorize for flight codes), so the sketches only
+# see one update per distinct item per batch.  Items are keyed by a 64-bit
+# hash of their label, which is stable across batches, files and processes.
+#
+# * Count-Min (depth x width counters) estimates the count of any item,
+#   never under, over by at most e*N/width with probability 1 - e^-depth.
+# * SpaceSaving keeps the ``capacity`` heaviest items with a count and an
+#   error; an absent item's count is at most the summary's ``floor``.  Two
+#   summaries merge by adding counts (an absent item is charged the other
+#   summary's floor) and keeping the top ``capacity`` entries.
+# * HyperLogLog (2^precision registers per group) counts distinct flight
+#   codes per airline and per route, with about 1.04/sqrt(2^precision)
+#   relative error; registers merge by elementwise max.
+#
+# Memory depends only on the parameters, never on how much has been seen,
+# and every sketch merges exactly, so partitions can be sketched separately.
+
+SKETCH_FILE = 'flight_sketches.npz'
+ITEMS = ('route', 'flight')
+ROUTE_LABELS = [route_label(code) for code in range(len(CITIES) ** 2)]
+DISTINCT_BY = {'airline': CATEGORY_DOMAINS['airline'], 'route': ROUTE_LABELS}
+SEEDS = np.random.default_rng(48).integers(1, 2 ** 63, size=16, dtype=np.uint64)
+HLL_SEED = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(keys):
+    """splitmix64 finalizer: spreads related 64-bit keys over all bits."""
+    keys = keys.copy()
+    with np.errstate(over='ignore'):
+        keys ^= keys >> np.uint64(30)
+        keys *= np.uint64(0xBF58476D1CE4E5B9)
+        keys ^= keys >> np.uint64(27)
+        keys *= np.uint64(0x94D049BB133111EB)
+        keys ^= keys >> np.uint64(31)
+    return keys
+
+
+def _bit_length(values):
+    """Exact bit length of uint64 values (0 for 0), via float64 exponents of the 32-bit halves."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def label_keys(labels):
+    """uint64 key of every label (the same hash as flight_data.label_hashes)."""
+    return pd.util.hash_array(np.asarray(labels, dtype=object))
+
+
+def _empty_heavy():
+    return {'labels': np.array([], dtype=str), 'keys': np.array([], dtype=np.uint64),
+            'counts': np.array([], dtype=np.int64), 'errors': np.array([], dtype=np.int64), 'floor': 0}
+
+
+def new_sketches(width=2048, depth=4, capacity=64, precision=12):
+    """Empty sketch state; ``width`` must be a power of two."""
+    if width & (width - 1) or not 1 <= depth <= len(SEEDS) or not 4 <= precision <= 18:
+        raise ValueError("width must be a power of two, depth 1-16 and precision 4-18")
+    return {
+        'params': {'width': width, 'depth': depth, 'capacity': capacity, 'precision': precision},
+        'rows': 0,
+        'count_min': {item: np.zeros((depth, width), dtype=np.int64) for item in ITEMS},
+        'heavy': {item: _empty_heavy() for item in ITEMS},
+        'distinct': {group: np.zeros((len(labels), 1 << precision), dtype=np.uint8)
+                     for group, labels in DISTINCT_BY.items()},
+    }
+
+
+def _positions(keys, params):
+    return [_mix(keys ^ SEEDS[i]) & np.uint64(params['width'] - 1) for i in range(params['depth'])]
+
+
+def _merge_heavy(a, b, capacity):
+    """SpaceSaving merge: counts add, an item absent from one side is charged that side's floor."""
+    keys = np.union1d(a['keys'], b['keys'])
+    counts = np.zeros(len(keys), dtype=np.int64)
+    errors = np.zeros(len(keys), dtype=np.int64)
+    labels = np.empty(len(keys), dtype=object)
+    for summary in (a, b):
+        at = np.searchsorted(keys, summary['keys'])
+        charged = np.full(len(keys), summary['floor'], dtype=np.int64)
+        counts += charged
+        errors += charged
+        counts[at] += summary['counts'] - summary['floor']
+        errors[at] += summary['errors'] - summary['floor']
+        labels[at] = summary['labels']
+    order = np.argsort(-counts, kind='stable')
+    floor = a['floor'] + b['floor']
+    if len(order) > capacity:
+        floor = max(floor, int(counts[order[capacity]]))
+        order = order[:capacity]
+    return {'labels': labels[order].astype(str), 'keys': keys[order], 'counts': counts[order],
+            'errors': errors[order], 'floor': floor}
+
+
+def batch_items(df, codes):
+    """{item: (labels, keys, counts)} of the distinct routes and flight codes in a batch.
+
+    ``codes`` is :func:`flight_data.encode_frame` of the batch; the per-row
+    flight code indices are returned too.
+    """
+    route = codes['route'].astype(np.int64)
+    route_counts = np.bincount(route[route >= 0], minlength=len(ROUTE_LABELS))
+    present = np.flatnonzero(route_counts)
+    labels = np.asarray(ROUTE_LABELS)[present]
+    items = {'route': (labels, label_keys(labels), route_counts[present])}
+
+    codes, uniques = pd.factorize(df['flight'])
+    labels = np.asarray(uniques, dtype=str)
+    items['flight'] = (labels, label_keys(labels), np.bincount(codes[codes >= 0], minlength=len(labels)))
+    return items, codes
+
+
+def update_sketches(sketches, df):
+    """Fold one batch of flights into ``sketches`` (in place); returns ``sketches``."""
+    params = sketches['params']
+    codes = encode_frame(df)
+    items, flight_codes = batch_items(df, codes)
+    for item, (labels, keys, counts) in items.items():
+        table = sketches['count_min'][item]
+        for i, position in enumerate(_positions(keys, params)):
+            table[i] += np.bincount(position.astype(np.int64), weights=counts,
+                                    minlength=params['width']).astype(np.int64)
+        exact = {'labels': labels, 'keys': keys, 'counts': counts.astype(np.int64),
+                 'errors': np.zeros(len(keys), dtype=np.int64), 'floor': 0}
+        sketches['heavy'][item] = _merge_heavy(sketches['heavy'][item], exact, params['capacity'])
+
+    # HyperLogLog: register = top p bits of the hash, rank = leading zeros of the rest + 1
+    p = params['precision']
+    valid = flight_codes >= 0
+    hashes = _mix(items['flight'][1] ^ HLL_SEED).take(flight_codes[valid])
+    register = (hashes >> np.uint64(64 - p)).astype(np.int64)
+    rest = (hashes << np.uint64(p)) | np.uint64(1 << (p - 1))
+    rank = (65 - _bit_length(rest)).astype(np.uint8)
+    for group, registers in sketches['distinct'].items():
+        group_codes = codes[group][valid].astype(np.int64)
+        ok = group_codes >= 0
+        np.maximum.at(registers.reshape(-1), group_codes[ok] * registers.shape[1] + register[ok], rank[ok])
+    sketches['rows'] += len(df)
+    return sketches
+
+
+def merge_sketches(a, b):
+    """Sketch of the union of the streams behind ``a`` and ``b`` (same parameters)."""
+    if a['params'] != b['params']:
+        raise ValueError(f"Cannot merge sketches with parameters {a['params']} and {b['params']}")
+    return {
+        'params': dict(a['params']),
+        'rows': a['rows'] + b['rows'],
+        'count_min': {item: a['count_min'][item] + b['count_min'][item] for item in ITEMS},
+        'heavy': {item: _merge_heavy(a['heavy'][item], b['heavy'][item], a['params']['capacity']) for item in ITEMS},
+        'distinct': {group: np.maximum(a['distinct'][group], b['distinct'][group]) for group in DISTINCT_BY},
+    }
+
+
+def estimate_counts(sketches, item, labels):
+    """Count-Min estimates (upper bounds) for arbitrary labels of ``item``."""
+    table = sketches['count_min'][item]
+    positions = _positions(label_keys(labels), sketches['params'])
+    return np.min([table[i, position.astype(np.int64)] for i, position in enumerate(positions)], axis=0)
+
+
+def top_k(sketches, item='route', k=10):
+    """The ``k`` heaviest items: estimate, guaranteed minimum and the SpaceSaving/Count-Min bounds."""
+    heavy = sketches['heavy'][item]
+    count_min = estimate_counts(sketches, item, heavy['labels']) if len(heavy['keys']) else np.array([], np.int64)
+    table = pd.DataFrame({
+        'estimate': np.minimum(heavy['counts'], count_min),
+        'guaranteed': heavy['counts'] - heavy['errors'],
+        'space_saving': heavy['counts'],
+        'count_min': count_min,
+    }, index=pd.Index(heavy['labels'], name=item))
+    return table.sort_values('estimate', ascending=False, kind='stable').head(k)
+
+
+def _hll_estimate(registers):
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.sum(registers == 0, axis=-1)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def distinct_flights(sketches, by='airline'):
+    """Estimated distinct flight codes per ``by`` group (Series), or overall with ``by=None``."""
+    if by is None:
+        return float(_hll_estimate(sketches['distinct']['airline'].max(axis=0)))
+    return pd.Series(_hll_estimate(sketches['distinct'][by]), index=pd.Index(DISTINCT_BY[by], name=by),
+                     name='distinct_flights')
+
+
+def sketch_bytes(sketches):
+    """Memory held by the sketches (bytes), independent of the rows seen."""
+    total = sum(table.nbytes for table in sketches['count_min'].values())
+    total += sum(registers.nbytes for registers in sketches['distinct'].values())
+    total += sum(h['keys'].nbytes + h['counts'].nbytes + h['errors'].nbytes + h['labels'].nbytes
+                 for h in sketches['heavy'].values())
+    return total
+
+
+def save_sketches(sketches, path=SKETCH_FILE):
+    arrays = {'params': json.dumps(sketches['params']), 'rows': sketches['rows']}
+    for item in ITEMS:
+        arrays[f"count_min_{item}"] = sketches['count_min'][item]
+        for key, values in sketches['heavy'][item].items():
+            arrays[f"heavy_{item}_{key}"] = values
+    for group in DISTINCT_BY:
+        arrays[f"distinct_{group}"] = sketches['distinct'][group]
+    np.savez_compressed(path, domains=json.dumps(CATEGORY_DOMAINS), **arrays)
+
+
+def load_sketches(path=SKETCH_FILE):
+    with np.load(path) as data:
+        if json.loads(str(data['domains'])) != CATEGORY_DOMAINS:
+            raise ValueError(f"{path} was built with different category domains")
+        sketches = new_sketches(**json.loads(str(data['params'])))
+        sketches['rows'] = int(data['rows'])
+        for item in ITEMS:
+            sketches['count_min'][item] = data[f"count_min_{item}"]
+            sketches['heavy'][item] = {key: data[f"heavy_{item}_{key}"] for key in _empty_heavy()}
+            sketches['heavy'][item]['floor'] = int(sketches['heavy'][item]['floor'])
+        for group in DISTINCT_BY:
+            sketches['distinct'][group] = data[f"distinct_{group}"]
+    return sketches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Heavy-hitter and distinct-count sketches over flight batches')
+    parser.add_argument('paths', nargs='*', default=[DATA_FILE])
+    parser.add_argument('--chunksize', type=int, default=50_000, help='rows per ingest batch')
+    parser.add_argument('--state', default=None, help=f"sketch file to resume from and save to (e.g. {SKETCH_FILE})")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--exact', action='store_true', help='compare with exact counts (loads the full data)')
+    args = parser.parse_args()
+
+    print("🧾 STREAMING FLIGHT SKETCHES")
+    print("="*60)
+    sketches = new_sketches()
+    if args.state and os.path.exists(args.state):
+        sketches = load_sketches(args.state)
+        print(f"📂 Resumed from '{args.state}' ({sketches['rows']:,} rows seen)")
+    start = time.perf_counter()
+    for path in args.paths:
+        for batch in load_flights(path, chunksize=args.chunksize):
+            update_sketches(sketches, batch)
+    print(f"⚡ {sketches['rows']:,} rows sketched in {time.perf_counter() - start:.2f}s, "
+          f"{sketch_bytes(sketches) / 1024:,.0f} KB of state")
+    if args.state:
+        save_sketches(sketches, args.state)
+        print(f"✅ Saved '{args.state}'")
+
+    exact = pd.concat([load_flights(path) for path in args.paths]) if args.exact else None
+    for item in ITEMS:
+        table = top_k(sketches, item, args.top)
+        if exact is not None:
+            counts = (encode_frame(exact)['route'] if item == 'route' else exact['flight'].astype(str))
+            counts = pd.Series(counts).value_counts()
+            if item == 'route':
+                counts.index = [route_label(code) for code in counts.index]
+            table['exact'] = counts.reindex(table.index).fillna(0).astype(np.int64).to_numpy()
+        print(f"\nTop {args.top} {item}s:")
+        print(table.to_string())
+
+    distinct = distinct_flights(sketches, 'airline').round().astype(int).to_frame('estimate')
+    if exact is not None:
+        distinct['exact'] = exact.groupby('airline', observed=False)['flight'].nunique().reindex(distinct.index)
+    print("\nDistinct flight codes by airline:")
+    print(distinct.to_string())
+    print(f"Total distinct flight codes: ~{distinct_flights(sketches, None):,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import importlib.util
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import (CATEGORY_DOMAINS, CITIES, DATA_FILE, NUMERIC_COLUMNS, build_column_cache, load_flights,
+                         open_column_cache, route_label)
+
+# Embedded SQL over the encoded column cache.
+#
+# The fact table ``fares`` holds the int8 category codes (``<column>_code``,
+# plus ``route_code``) and the numeric columns straight from the column
+# cache.  Every categorical dictionary is registered as a dimension table
+# ``dim_<column>(<column>_code, <column>)``, and the view ``flights`` joins
+# them back, so queries can use labels (``flights``) or group on codes and
+# join once at the end (``fares``), which is what makes large scans fast.
+# Flight codes have no fixed domain and are not in the column cache: they
+# are numbered in order of first appearance into ``flight.bin`` (int32
+# ``flight_code`` per row) and ``flights.json`` (the ``dim_flight`` labels)
+# next to it, built once per fingerprint like the cache itself.
+#
+# DuckDB scans the memory-mapped columns in place when it is installed.
+# Otherwise the standard library's sqlite3 is used: the fact table is copied
+# once into ``flights.sqlite`` inside the cache directory of the dataset
+# fingerprint, so it is rebuilt exactly when the data changes.
+
+ENGINES = ('duckdb', 'sqlite')
+DIMENSIONS = list(CATEGORY_DOMAINS) + ['route', 'flight']
+LABELS = list(CATEGORY_DOMAINS) + ['flight']
+_connections = {}
+
+
+def flight_codes(path, cache_path, chunksize=200_000):
+    """(int32 flight code per cached row, flight labels) for the dataset cached at ``cache_path``."""
+    codes_path, labels_path = os.path.join(cache_path, 'flight.bin'), os.path.join(cache_path, 'flights.json')
+    if not os.path.exists(labels_path):
+        labels = {}
+        with open(codes_path, 'wb') as f:
+            # Same validated rows, in the same order, as the column cache
+            for chunk in load_flights(path, chunksize=chunksize):
+                codes, uniques = pd.factorize(chunk['flight'])
+                lookup = np.array([labels.setdefault(label, len(labels)) for label in uniques], dtype=np.int32)
+                lookup.take(codes).tofile(f)
+        with open(labels_path, 'w') as f:
+            json.dump(list(labels), f)
+    with open(labels_path) as f:
+        labels = json.load(f)
+    if not labels:
+        return np.empty(0, dtype=np.int32), labels
+    return np.memmap(codes_path, dtype=np.int32, mode='r'), labels
+
+
+def dimension_tables(flights=()):
+    """{table name: DataFrame} for every categorical dictionary (and the ``flights`` labels), keyed by code."""
+    tables = {}
+    for col, domain in CATEGORY_DOMAINS.items():
+        tables[f"dim_{col}"] = pd.DataFrame({f"{col}_code": np.arange(len(domain), dtype=np.int64), col: domain})
+    codes = np.arange(len(CITIES) ** 2)
+    tables['dim_route'] = pd.DataFrame({'route_code': codes, 'route': [route_label(c) for c in codes],
+                                        'source_city': np.array(CITIES)[codes // len(CITIES)],
+                                        'destination_city': np.array(CITIES)[codes % len(CITIES)]})
+    tables['dim_flight'] = pd.DataFrame({'flight_code': np.arange(len(flights), dtype=np.int64),
+                                         'flight': pd.Series(list(flights), dtype=object)})
+    return tables
+
+
+def _fact_columns(columns, flights):
+    fact = {f"{col}_code": columns[col] for col in DIMENSIONS if col != 'flight'}
+    fact['flight_code'] = flights
+    fact.update({col: columns[col] for col in NUMERIC_COLUMNS})
+    return fact
+
+
+def _flights_view():
+    labels = ', '.join(f"d_{col}.{col}" for col in LABELS)
+    joins = ' '.join(f"LEFT JOIN dim_{col} AS d_{col} ON f.{col}_code = d_{col}.{col}_code"
+                     for col in LABELS)
+    return (f"CREATE VIEW flights AS SELECT {labels}, d_route.route, "
+            f"{', '.join('f.' + col for col in NUMERIC_COLUMNS)} "
+            f"FROM fares AS f {joins} LEFT JOIN dim_route AS d_route ON f.route_code = d_route.route_code")
+
+
+def _connect_duckdb(path, cache_path):
+    import duckdb
+    codes, flights = flight_codes(path, cache_path)
+    con = duckdb.connect()
+    con.register('fares', pd.DataFrame(_fact_columns(open_column_cache(cache_path), codes), copy=False))
+    for name, table in dimension_tables(flights).items():
+        con.register(name, table)
+    con.execute(_flights_view())
+    return con
+
+
+def _connect_sqlite(path, cache_path, chunksize=1_000_000):
+    db_path = os.path.join(cache_path, 'flights.sqlite')
+    if not os.path.exists(db_path):
+        staging = db_path + '.tmp'
+        if os.path.exists(staging):
+            os.remove(staging)
+        con = sqlite3.connect(staging)
+        codes, flights = flight_codes(path, cache_path)
+        fact = _fact_columns(open_column_cache(cache_path), codes)
+        names = list(fact)
+        types = ', '.join(f"{n} {'REAL' if n == 'duration' else 'INTEGER'}" for n in names)
+        con.execute(f"CREATE TABLE fares ({types})")
+        rows = len(next(iter(fact.values())))
+        insert = f"INSERT INTO fares VALUES ({', '.join('?' * len(names))})"
+        for start in range(0, rows, chunksize):
+            chunk = [np.asarray(fact[n][start:start + chunksize]).tolist() for n in names]
+            con.executemany(insert, zip(*chunk))
+        for name, table in dimension_tables(flights).items():
+            # INTEGER PRIMARY KEY makes the code the rowid, so view joins are direct lookups
+            key, labels = table.columns[0], list(table.columns[1:])
+            con.execute(f"CREATE TABLE {name} ({key} INTEGER PRIMARY KEY, {', '.join(f'{c} TEXT' for c in labels)})")
+            con.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' * len(table.columns))})",
+                            table.itertuples(index=False, name=None))
+        con.execute(_flights_view())
+        con.commit()
+        con.close()
+        os.replace(staging, db_path)
+    return sqlite3.connect(db_path, check_same_thread=False)
+
+
+def connect(path=DATA_FILE, engine='auto'):
+    """Cached connection over the column cache of ``path``; returns (connection, engine name)."""
+    if engine not in ('auto',) + ENGINES:
+        raise ValueError(f"engine must be 'auto' or one of {ENGINES}")
+    if engine == 'auto':
+        # Only look duckdb up: importing it here would load the library even for sqlite
+        engine = 'duckdb' if importlib.util.find_spec('duckdb') is not None else 'sqlite'
+    cache_path = build_column_cache(path)
+    key = (cache_path, engine)
+    if key not in _connections:
+        if engine == 'duckdb':
+            try:
+                _connections[key] = _connect_duckdb(path, cache_path)
+            except ImportError:
+                raise ImportError("The duckdb engine requires duckdb (pip install duckdb)")
+        else:
+            _connections[key] = _connect_sqlite(path, cache_path)
+    return _connections[key], engine
+
+
+def query(sql, path=DATA_FILE, engine='auto', arrow=False):
+    """Run ``sql`` and return a DataFrame (or a pyarrow Table with ``arrow=True``).
+
+    The engine and the query time in seconds are attached as
+    ``result.attrs['engine']`` and ``result.attrs['seconds']`` (DataFrames only).
+    """
+    con, engine = connect(path, engine)
+    start = time.perf_counter()
+    if engine == 'duckdb':
+        relation = con.execute(sql)
+        result = relation.fetch_arrow_table() if arrow else relation.df()
+    else:
+        result = pd.read_sql_query(sql, con)
+        if arrow:
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ImportError("Arrow results require pyarrow (pip install pyarrow)")
+            result = pa.Table.from_pandas(result, preserve_index=False)
+    seconds = time.perf_counter() - start
+    if not arrow:
+        result.attrs.update(engine=engine, seconds=seconds)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run SQL over the flights dataset (tables: fares, flights, dim_*)')
+    parser.add_argument('sql', nargs='?', help='query to run; omit for an interactive prompt')
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--engine', default='auto', choices=('auto',) + ENGINES)
+    parser.add_argument('--output', default=None, help='write the result of ``sql`` to this CSV')
+    args = parser.parse_args()
+
+    print("🗃️ FLIGHTS SQL")
+    print("="*60)
+    start = time.perf_counter()
+    _, engine = connect(args.data, args.engine)
+    print(f"🔌 {engine} ready in {time.perf_counter() - start:.2f}s — tables: fares, flights, "
+          f"{', '.join('dim_' + col for col in DIMENSIONS)}")
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', None)
+
+    def run(sql):
+        try:
+            result = query(sql, args.data, engine)
+        except Exception as error:
+            print(f"❌ {error}")
+            return None
+        print(result.to_string(index=False, max_rows=50))
+        print(f"⚡ {len(result):,} rows in {result.attrs['seconds'] * 1000:.1f} ms")
+        return result
+
+    if args.sql:
+        result = run(args.sql)
+        if result is not None and args.output:
+            result.to_csv(args.output, index=False)
+            print(f"✅ Saved '{args.output}'")
+        return
+
+    print("Enter SQL terminated by ';' (Ctrl-D to quit)")
+    buffer = []
+    while True:
+        try:
+            line = input('sql> ' if not buffer else '...> ')
+        except EOFError:
+            break
+        buffer.append(line)
+        if line.rstrip().endswith(';'):
+            run('\n'.join(buffer))
+            buffer = []
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from flight_data import CATEGORY_DOMAINS, CITIES, DATA_FILE, encode_frame, load_flights, route_label
+from payload_profiler import write_checked_html
+
+# Per-flight price trajectories.
+#
+# Flight codes are dictionary-encoded, and a series is one (flight, route,
+# class) triple: the same flight number on another route, or in the other
+# cabin, is a different trajectory.  A series has one point per days_left:
+# when several rows share a day, the cheapest fare's row is kept, so the
+# first/last prices are well defined.  Rows are sorted by series then
+# days_left (descending, so a trajectory reads in booking order) and stored
+# column-wise with an offsets array, CSR style: series s occupies rows
+# offsets[s]:offsets[s + 1].
+# Fetching a trajectory is a dict lookup plus a slice, per-series features
+# are np.*.reduceat over the offsets, and plots draw thousands of series as
+# one NaN-separated line per airline.
+
+STORE_FILE = 'flight_trajectories.npz'
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+N_ROUTES = len(CITIES) ** 2
+STORE_COLUMNS = {'days_left': np.int8, 'price': np.int32, 'duration': np.float32,
+                 'route': np.int8, 'airline': np.int8, 'departure_time': np.int8}
+
+
+def build_store(df):
+    """Sort the flights into the CSR layout (cheapest row per series and day); returns a store dict."""
+    flights, labels = pd.factorize(df['flight'].astype(str), sort=True)
+    codes = encode_frame(df)
+    series = (flights.astype(np.int64) * N_ROUTES + codes['route']) * N_CLASSES + codes['class']
+    days_left = df['days_left'].to_numpy()
+    price = df['price'].to_numpy()
+    valid = (flights >= 0) & (codes['route'] >= 0) & (codes['class'] >= 0)
+
+    rows = np.flatnonzero(valid)
+    order = rows[np.lexsort((price[rows], -days_left[rows].astype(np.int16), series[rows]))]
+    # Same-day rows of a series are adjacent, cheapest first: keep that one
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (series[order[1:]] != series[order[:-1]]) | (days_left[order[1:]] != days_left[order[:-1]])
+    order = order[first]
+    sorted_series = series[order]
+
+    store = {'flights': np.asarray(labels, dtype=str),
+             'offsets': np.searchsorted(sorted_series, np.arange(len(labels) * N_ROUTES * N_CLASSES + 1))}
+    values = {'days_left': days_left, 'price': price, 'duration': df['duration'].to_numpy()}
+    values.update({col: codes[col] for col in ('route', 'airline', 'departure_time')})
+    for col, dtype in STORE_COLUMNS.items():
+        store[col] = np.asarray(values[col])[order].astype(dtype)
+    _index(store)
+    return store
+
+
+def _index(store):
+    store['lookup'] = {label: i for i, label in enumerate(store['flights'])}
+
+
+def save_store(store, path=STORE_FILE):
+    arrays = {key: store[key] for key in ['flights', 'offsets', *STORE_COLUMNS]}
+    np.savez_compressed(path, domains=json.dumps(CATEGORY_DOMAINS), **arrays)
+
+
+def load_store(path=STORE_FILE):
+    with np.load(path) as data:
+        if json.loads(str(data['domains'])) != CATEGORY_DOMAINS:
+            raise ValueError(f"{path} was built with different category domains")
+        store = {key: data[key] for key in ['flights', 'offsets', *STORE_COLUMNS]}
+    _index(store)
+    return store
+
+
+def series_id(store, flight, travel_class='Economy', route=None):
+    """Series of a flight code and class; ``route`` ('Delhi→Mumbai') is needed if it flies several."""
+    if flight not in store['lookup']:
+        raise KeyError(f"Unknown flight {flight!r}")
+    cls = CATEGORY_DOMAINS['class'].index(travel_class)
+    candidates = (store['lookup'][flight] * N_ROUTES + np.arange(N_ROUTES)) * N_CLASSES + cls
+    flown = candidates[np.diff(store['offsets'])[candidates] > 0]
+    labels = [route_label(code) for code in range(N_ROUTES)]
+    if route is not None:
+        if route not in labels:
+            raise KeyError(f"Unknown route {route!r}")
+        return candidates[labels.index(route)]
+    if len(flown) > 1:
+        routes = [labels[(s // N_CLASSES) % N_ROUTES] for s in flown]
+        raise ValueError(f"{flight} ({travel_class}) flies several routes, pass one of {routes}")
+    return flown[0] if len(flown) else candidates[0]
+
+
+def trajectory(store, flight, travel_class='Economy', route=None):
+    """One series as a DataFrame in booking order (most days_left first)."""
+    s = series_id(store, flight, travel_class, route)
+    rows = slice(store['offsets'][s], store['offsets'][s + 1])
+    result = pd.DataFrame({col: store[col][rows] for col in ('days_left', 'price', 'duration')})
+    result['route'] = [route_label(code) for code in store['route'][rows]]
+    result['departure_time'] = np.array(CATEGORY_DOMAINS['departure_time'])[store['departure_time'][rows]]
+    return result
+
+
+def series_features(store, min_points=2):
+    """Vectorized per-series features for every series with at least ``min_points`` rows."""
+    offsets = store['offsets']
+    counts = np.diff(offsets)
+    series = np.flatnonzero(counts >= max(min_points, 1))
+    starts, ends = offsets[series], offsets[series + 1]
+    n = counts[series].astype(np.float64)
+
+    price = store['price'].astype(np.float64)
+    days = store['days_left'].astype(np.float64)
+    sums = {name: np.add.reduceat(values, starts)
+            for name, values in (('x', days), ('y', price), ('xy', days * price), ('xx', days * days))}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Least-squares slope of price against days_left (negative: fares rise as departure nears)
+        slope = (n * sums['xy'] - sums['x'] * sums['y']) / (n * sums['xx'] - sums['x'] ** 2)
+
+    flight_route, travel_class = np.divmod(series, N_CLASSES)
+    flight, route = np.divmod(flight_route, N_ROUTES)
+    features = pd.DataFrame({
+        'flight': store['flights'][flight],
+        'route': np.array([route_label(code) for code in range(N_ROUTES)])[route],
+        'class': np.array(CATEGORY_DOMAINS['class'])[travel_class],
+        'airline': np.array(CATEGORY_DOMAINS['airline'])[store['airline'][starts]],
+        'points': counts[series],
+        'first_days_left': store['days_left'][starts],
+        'last_days_left': store['days_left'][ends - 1],
+        'first_price': store['price'][starts],
+        'last_price': store['price'][ends - 1],
+        'min_price': np.minimum.reduceat(store['price'], starts),
+        'max_price': np.maximum.reduceat(store['price'], starts),
+        'mean_price': sums['y'] / n,
+        'slope_per_day': slope,
+    })
+    features['last_minute_premium'] = features['last_price'] / features['first_price']
+    return features
+
+
+def trajectory_figure(store, series=None, max_series=2000, title='Fare Trajectories by Flight'):
+    """Plot many series as one NaN-separated WebGL line per airline."""
+    counts = np.diff(store['offsets'])
+    if series is None:
+        series = np.argsort(-counts, kind='stable')[:max_series]
+    series = np.asarray(series)
+    series = series[counts[series] > 0]
+
+    fig = go.Figure()
+    airlines = store['airline'][store['offsets'][series]]
+    for code, airline in enumerate(CATEGORY_DOMAINS['airline']):
+        chosen = series[airlines == code]
+        if not len(chosen):
+            continue
+        # Row positions of every chosen series, each followed by a -1 gap marker
+        starts, sizes = store['offsets'][chosen], counts[chosen] + 1
+        out_starts = np.cumsum(sizes) - sizes
+        positions = np.arange(sizes.sum()) - np.repeat(out_starts, sizes) + np.repeat(starts, sizes)
+        positions[out_starts + sizes - 1] = -1
+        gap = positions < 0
+        x = np.where(gap, np.nan, store['days_left'][positions]).astype(np.float32)
+        y = np.where(gap, np.nan, store['price'][positions]).astype(np.float32)
+        # No per-point flight labels: they would dominate the file size
+        fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name=f"{airline} ({len(chosen)})",
+                                   line=dict(width=1), opacity=0.4,
+                                   hovertemplate='%{x} days left: $%{y:,.0f}<extra></extra>'))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Days Before Departure',
+        yaxis_title='Price ($)',
+        xaxis=dict(autorange='reversed'),
+        template='plotly_white',
+        title_font_size=20,
+        height=700
+    )
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-flight price trajectories')
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--flight', default=None, help='print the trajectory of one flight code')
+    parser.add_argument('--class', dest='travel_class', default='Economy', choices=CATEGORY_DOMAINS['class'])
+    parser.add_argument('--route', default=None, help="e.g. 'Delhi→Mumbai', for a flight code on several routes")
+    parser.add_argument('--max-series', type=int, default=2000, help='series to plot')
+    args = parser.parse_args()
+
+    print("🛫 FLIGHT PRICE TRAJECTORIES")
+    print("="*60)
+    df = load_flights(args.data)
+    start = time.perf_counter()
+    store = build_store(df)
+    print(f"📦 {len(store['price']):,} rows, {len(store['flights']):,} flight codes "
+          f"stored in {time.perf_counter() - start:.2f}s")
+    save_store(store)
+
+    if args.flight:
+        print(f"\n{args.flight} ({args.travel_class}):")
+        print(trajectory(store, args.flight, args.travel_class, args.route).to_string(index=False))
+        return
+
+    start = time.perf_counter()
+    features = series_features(store)
+    print(f"⚡ Features for {len(features):,} series in {(time.perf_counter() - start) * 1000:.1f} ms")
+    features.to_csv('flight_features.csv', index=False)
+
+    steepest = features[features['points'] >= 10].nsmallest(5, 'slope_per_day')
+    print("\nFares rising fastest towards departure:")
+    for _, row in steepest.iterrows():
+        print(f"  {row['flight']} {row['route']} ({row['class']}): {-row['slope_per_day']:,.0f} $/day, "
+              f"{row['last_minute_premium']:.2f}x last-minute premium")
+
+    write_checked_html(trajectory_figure(store, max_series=args.max_series), 'flight_trajectories.html')
+    print(f"\n✅ Saved '{STORE_FILE}', 'flight_features.csv' and 'flight_trajectories.html'")
+
+
+if __name__ == '__main__':
+    main()
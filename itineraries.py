@@ -0,0 +1,170 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from flight_data import CATEGORY_DOMAINS, CITIES, TIME_SLOTS, encode_frame, load_flights
+from payload_profiler import write_checked_html
+
+# Cheapest one- and two-leg itineraries between the six cities.
+#
+# Minimum fares are gathered into small dense tensors indexed by
+# (class, days_left, origin, destination[, time slot]) with one unbuffered
+# np.minimum.at scatter per tensor, so no sort is needed.  A
+# self-transfer books both legs for the same day: the first leg must land
+# the same day (slot midpoint + duration < 24h), and the second must leave
+# in a later time slot than the first arrives.  Folding the arrival slot
+# into the hub index turns "cheapest connection through any hub" into a
+# single batched min-plus matrix product over every (class, days_left).
+
+MAX_DAYS = 49
+N_CITIES = len(CITIES)
+N_CLASSES = len(CATEGORY_DOMAINS['class'])
+N_SLOTS = len(TIME_SLOTS)
+
+# Chronological rank and approximate midpoint hour of each TIME_SLOTS entry
+# (Late_Night is after midnight, so it starts the day)
+SLOT_RANK = np.array([1, 2, 3, 4, 5, 0])
+SLOT_MID_HOUR = np.array([6.0, 10.0, 14.0, 18.0, 22.0, 2.0])
+
+
+def min_fares(cell, price, size):
+    """Minimum price per cell id (np.inf for empty cells)."""
+    fares = np.full(size, np.inf)
+    np.minimum.at(fares, cell, price)
+    return fares
+
+
+def fare_tensors(df):
+    """Direct, first-leg (by arrival slot) and second-leg (by departure slot) minimum fares."""
+    codes = encode_frame(df)
+    days_left = df['days_left'].to_numpy().astype(np.int64)
+    price = df['price'].to_numpy().astype(np.float64)
+    src, dst = codes['source_city'].astype(np.int64), codes['destination_city'].astype(np.int64)
+    depart, arrive = codes['departure_time'].astype(np.int64), codes['arrival_time'].astype(np.int64)
+    valid = ((src >= 0) & (dst >= 0) & (codes['class'] >= 0) & (depart >= 0) & (arrive >= 0)
+             & (days_left >= 1) & (days_left <= MAX_DAYS))
+    base = ((codes['class'].astype(np.int64) * MAX_DAYS + days_left - 1) * N_CITIES + src) * N_CITIES + dst
+    shape = (N_CLASSES, MAX_DAYS, N_CITIES, N_CITIES)
+    size = int(np.prod(shape))
+
+    direct = min_fares(base[valid], price[valid], size).reshape(shape)
+
+    same_day = valid & (SLOT_MID_HOUR[np.maximum(depart, 0)] + df['duration'].to_numpy() < 24)
+    first = min_fares(base[same_day] * N_SLOTS + SLOT_RANK[arrive[same_day]], price[same_day],
+                      size * N_SLOTS).reshape(shape + (N_SLOTS,))
+    second = min_fares(base[valid] * N_SLOTS + SLOT_RANK[depart[valid]], price[valid],
+                       size * N_SLOTS).reshape(shape + (N_SLOTS,))
+    return direct, first, second
+
+
+def min_plus(a, b):
+    """Batched min-plus product over the last two axes; returns (minimum, argmin over the inner axis)."""
+    total = a[..., :, :, None] + b[..., None, :, :]
+    best = total.argmin(axis=-2)
+    return np.take_along_axis(total, best[..., None, :], axis=-2)[..., 0, :], best
+
+
+def two_leg_fares(first, second):
+    """Cheapest feasible self-transfer for every (class, days_left, origin, destination).
+
+    Returns (fares, hub city, arrival slot rank at the hub).
+    """
+    # Cheapest second leg departing strictly after each arrival slot
+    from_slot = np.minimum.accumulate(second[..., ::-1], axis=-1)[..., ::-1]
+    after = np.full_like(second, np.inf)
+    after[..., :-1] = from_slot[..., 1:]
+
+    # Fold (hub, slot) into one inner axis: first is (..., i, hub, slot), after is (..., hub, j, slot)
+    lead = first.shape[:-3]
+    a = first.reshape(lead + (N_CITIES, N_CITIES * N_SLOTS))
+    b = np.moveaxis(after, -1, -2).reshape(lead + (N_CITIES * N_SLOTS, N_CITIES))
+    fares, inner = min_plus(a, b)
+    return fares, inner // N_SLOTS, inner % N_SLOTS
+
+
+def itinerary_table(df):
+    """One row per (class, days_left, origin, destination) with direct vs best two-leg fares."""
+    direct, first, second = fare_tensors(df)
+    two_leg, hub, _ = two_leg_fares(first, second)
+
+    travel_class, days, src, dst = np.indices(direct.shape).reshape(4, -1)
+    table = pd.DataFrame({
+        'class': np.array(CATEGORY_DOMAINS['class'])[travel_class],
+        'days_left': days + 1,
+        'source_city': np.array(CITIES)[src],
+        'destination_city': np.array(CITIES)[dst],
+        'direct_fare': direct.ravel(),
+        'two_leg_fare': two_leg.ravel(),
+        'via': np.array(CITIES)[hub.ravel()],
+    })
+    table = table[table['source_city'] != table['destination_city']]
+    table.loc[~np.isfinite(table['two_leg_fare']), 'via'] = None
+    table['savings'] = table['direct_fare'] - table['two_leg_fare']
+    table['savings_pct'] = table['savings'] / table['direct_fare'] * 100
+    table = table.replace([np.inf, -np.inf], np.nan)
+    return table.reset_index(drop=True)
+
+
+def savings_heatmap(table):
+    """Per class: share of days where a self-transfer beats the direct fare, by city pair."""
+    fig = make_subplots(rows=1, cols=N_CLASSES, subplot_titles=CATEGORY_DOMAINS['class'], horizontal_spacing=0.12)
+    for i, travel_class in enumerate(CATEGORY_DOMAINS['class']):
+        rows = table[(table['class'] == travel_class) & table['direct_fare'].notna()]
+        wins = rows.assign(win=rows['savings'] > 0).pivot_table(
+            index='source_city', columns='destination_city', values='win', aggfunc='mean').reindex(index=CITIES, columns=CITIES)
+        median = rows[rows['savings'] > 0].pivot_table(
+            index='source_city', columns='destination_city', values='savings_pct', aggfunc='median').reindex(index=CITIES, columns=CITIES)
+        text = median.map(lambda v: '' if pd.isna(v) else f"-{v:.0f}%")
+        fig.add_trace(go.Heatmap(z=wins.to_numpy() * 100, x=CITIES, y=CITIES, text=text.to_numpy(),
+                                 texttemplate='%{text}', colorscale='Greens', zmin=0, zmax=100,
+                                 colorbar=dict(title='% of days', x=0.45 if i == 0 else 1.0),
+                                 hovertemplate='%{y} → %{x}<br>self-transfer cheaper on %{z:.0f}% of days'
+                                               '<br>median saving %{text}<extra></extra>'),
+                      row=1, col=i + 1)
+        fig.update_xaxes(title_text='Destination', row=1, col=i + 1)
+        fig.update_yaxes(title_text='Source', row=1, col=i + 1)
+    fig.update_layout(
+        title='When Does a Two-Leg Self-Transfer Beat the Direct Fare? (cell text: median saving)',
+        template='plotly_white',
+        title_font_size=20,
+        height=550
+    )
+    return fig
+
+
+if __name__ == '__main__':
+    print("🧭 MULTI-LEG ITINERARY ENGINE")
+    print("="*60)
+    df = load_flights()
+
+    start = time.perf_counter()
+    direct, first, second = fare_tensors(df)
+    built = time.perf_counter()
+    two_leg_fares(first, second)
+    solved = time.perf_counter()
+    print(f"⚡ Fare tensors in {(built - start) * 1000:.0f} ms, all {N_CLASSES * MAX_DAYS} (class, days_left) "
+          f"min-plus products in {(solved - built) * 1000:.1f} ms")
+
+    table = itinerary_table(df)
+    table.to_csv('itinerary_savings.csv', index=False)
+    write_checked_html(savings_heatmap(table), 'itinerary_savings.html')
+
+    for travel_class in CATEGORY_DOMAINS['class']:
+        rows = table[(table['class'] == travel_class) & table['direct_fare'].notna()]
+        wins = rows[rows['savings'] > 0]
+        print(f"\n{travel_class}: self-transfer cheaper for {len(wins) / max(len(rows), 1):.1%} of "
+              f"{len(rows):,} (route, day) fares" + (f", median saving {wins['savings_pct'].median():.0f}%"
+                                                     if len(wins) else ""))
+    only_two_leg = table['direct_fare'].isna() & table['two_leg_fare'].notna()
+    if only_two_leg.any():
+        print(f"🔗 {int(only_two_leg.sum()):,} (route, day) combinations reachable only with a transfer")
+
+    cheaper = table[table['savings'] > 0]
+    print("\nBiggest savings:" if len(cheaper) else "\nNo self-transfer beats a direct fare")
+    for _, row in cheaper.nlargest(5, 'savings').iterrows():
+        print(f"  {row['source_city']} → {row['destination_city']} via {row['via']} ({row['class']}, "
+              f"{row['days_left']} days): ${row['two_leg_fare']:,.0f} vs ${row['direct_fare']:,.0f} direct")
+    print("\n✅ Saved itinerary_savings.csv and itinerary_savings.html")
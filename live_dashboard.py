@@ -0,0 +1,254 @@
+import argparse
+import glob
+import os
+import threading
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from bokeh.layouts import column, row
+from bokeh.models import ColumnDataSource, Div, HoverTool
+from bokeh.palettes import Viridis256
+from bokeh.plotting import figure
+from bokeh.server.server import Server
+
+from flight_data import CATEGORY_DOMAINS, CITIES, encode_frame, load_flights
+
+# Live dashboard on a Bokeh server, fed by a drop directory.
+#
+# A watcher thread picks up new CSV batches (files must be moved in whole,
+# e.g. written elsewhere and renamed), validates them with the shared loader
+# and folds them into per-route, per-airline and per-days_left count and
+# price-sum arrays with one bincount each.  Browser sessions never see rows:
+# each session keeps the panel values it last sent, and on every tick it
+# sends ``patch`` updates for just the cells that changed, plus a ``stream``
+# of one latency record per new batch.  Latency is measured from the moment
+# a file landed in the drop directory to the moment its patches were sent.
+
+DROP_DIR = 'incoming'
+MAX_DAYS = 49
+N_ROUTES = len(CITIES) ** 2
+N_AIRLINES = len(CATEGORY_DOMAINS['airline'])
+LATENCY_ROLLOVER = 500
+
+
+def new_state():
+    """Shared aggregate state; every session reads it, only the watcher writes it."""
+    return {
+        'lock': threading.Lock(),
+        'seen': set(),
+        'rows': 0,
+        'route_count': np.zeros(N_ROUTES), 'route_price': np.zeros(N_ROUTES),
+        'airline_count': np.zeros(N_AIRLINES), 'airline_price': np.zeros(N_AIRLINES),
+        'days_count': np.zeros(MAX_DAYS), 'days_price': np.zeros(MAX_DAYS),
+        'batches': [],
+    }
+
+
+def aggregate_batch(df):
+    """Per-panel (count, price sum) arrays for one batch."""
+    codes = encode_frame(df)
+    price = df['price'].to_numpy().astype(np.float64)
+    days = df['days_left'].to_numpy().astype(np.int64) - 1
+    partial_sums = {}
+    for name, index, size in (('route', codes['route'].astype(np.int64), N_ROUTES),
+                              ('airline', codes['airline'].astype(np.int64), N_AIRLINES),
+                              ('days', days, MAX_DAYS)):
+        ok = (index >= 0) & (index < size)
+        partial_sums[f"{name}_count"] = np.bincount(index[ok], minlength=size)
+        partial_sums[f"{name}_price"] = np.bincount(index[ok], weights=price[ok], minlength=size)
+    return partial_sums
+
+
+def ingest(state, df, path=None, landed=None):
+    """Fold a batch into ``state`` and record its timings."""
+    start = time.perf_counter()
+    sums = aggregate_batch(df)
+    with state['lock']:
+        for key, values in sums.items():
+            state[key] += values
+        state['rows'] += len(df)
+        state['batches'].append({
+            'file': os.path.basename(path) if path else '(seed)',
+            'rows': len(df),
+            'landed': landed if landed is not None else time.time(),
+            'aggregate_ms': (time.perf_counter() - start) * 1000,
+        })
+
+
+def poll_drops(state, drop_dir=DROP_DIR):
+    """Ingest every new CSV in ``drop_dir`` (oldest first); returns the number of files read."""
+    paths = [p for p in glob.glob(os.path.join(drop_dir, '*.csv'))
+             if not p.endswith('.quarantine.csv') and p not in state['seen']]
+    paths.sort(key=os.path.getmtime)
+    for path in paths:
+        state['seen'].add(path)
+        landed = os.path.getmtime(path)
+        df = load_flights(path, quarantine=os.path.join(drop_dir, 'quarantine', os.path.basename(path)))
+        ingest(state, df, path, landed)
+    return len(paths)
+
+
+def watch(state, drop_dir=DROP_DIR, interval=0.25):
+    os.makedirs(os.path.join(drop_dir, 'quarantine'), exist_ok=True)
+    while True:
+        try:
+            poll_drops(state, drop_dir)
+        except Exception as error:  # a bad batch must not stop the watcher
+            print(f"⚠️ {error}")
+        time.sleep(interval)
+
+
+def panel_values(state):
+    """Current value of every patchable column, per source."""
+    with state['lock']:
+        route_count, route_price = state['route_count'].copy(), state['route_price'].copy()
+        airline_count, airline_price = state['airline_count'].copy(), state['airline_price'].copy()
+        days_count, days_price = state['days_count'].copy(), state['days_price'].copy()
+    mean = lambda total, count: np.round(np.divide(total, count, out=np.zeros_like(total), where=count > 0), 1)
+    shade = (route_count / max(route_count.max(), 1) * 255).astype(int)
+    return {
+        'route': {'count': route_count.astype(int), 'mean_price': mean(route_price, route_count),
+                  'color': np.array(Viridis256)[shade]},
+        'airline': {'count': airline_count.astype(int), 'mean_price': mean(airline_price, airline_count)},
+        'days': {'count': days_count.astype(int), 'mean_price': mean(days_price, days_count)},
+    }
+
+
+def diff_patches(shown, current):
+    """{column: [(index, value), ...]} for the entries of ``current`` that differ from ``shown``."""
+    patches = {}
+    for col, values in current.items():
+        changed = np.flatnonzero(values != shown[col])
+        if len(changed):
+            patches[col] = [(int(i), values[i].item()) for i in changed]
+    return patches
+
+
+def make_document(doc, state, interval_ms=250):
+    """Build one browser session: static keys plus the current panel values, then patch on a timer."""
+    shown = panel_values(state)
+    sources = {
+        'route': ColumnDataSource(dict(source=[CITIES[r // len(CITIES)] for r in range(N_ROUTES)],
+                                       destination=[CITIES[r % len(CITIES)] for r in range(N_ROUTES)],
+                                       **{k: list(v) for k, v in shown['route'].items()})),
+        'airline': ColumnDataSource(dict(airline=CATEGORY_DOMAINS['airline'],
+                                         **{k: list(v) for k, v in shown['airline'].items()})),
+        'days': ColumnDataSource(dict(days_left=list(range(1, MAX_DAYS + 1)),
+                                      **{k: list(v) for k, v in shown['days'].items()})),
+    }
+    latency = ColumnDataSource(dict(batch=[], rows=[], landed_ms=[], aggregate_ms=[], patch_ms=[]))
+
+    heatmap = figure(title='Route Popularity Heatmap', x_range=CITIES, y_range=CITIES[::-1],
+                     width=480, height=420, toolbar_location=None, tools='')
+    heatmap.rect(x='destination', y='source', width=0.95, height=0.95, fill_color='color', line_color=None,
+                 source=sources['route'])
+    heatmap.add_tools(HoverTool(tooltips=[('Route', '@source → @destination'), ('Flights', '@count{0,0}'),
+                                          ('Avg price', '$@mean_price{0,0}')]))
+    heatmap.xaxis.axis_label, heatmap.yaxis.axis_label = 'Destination', 'Source'
+
+    airlines = figure(title='Average Price by Airline', x_range=CATEGORY_DOMAINS['airline'],
+                      width=480, height=420, toolbar_location=None, tools='')
+    airlines.vbar(x='airline', top='mean_price', width=0.8, color='#1f77b4', source=sources['airline'])
+    airlines.add_tools(HoverTool(tooltips=[('Airline', '@airline'), ('Flights', '@count{0,0}'),
+                                           ('Avg price', '$@mean_price{0,0}')]))
+    airlines.yaxis.axis_label = 'Price ($)'
+
+    booking = figure(title='Booking Patterns by Days Left', width=480, height=420, toolbar_location=None, tools='')
+    booking.line(x='days_left', y='mean_price', line_width=3, color='#ff7f0e', source=sources['days'])
+    booking.scatter(x='days_left', y='mean_price', size=5, color='#ff7f0e', source=sources['days'])
+    booking.add_tools(HoverTool(tooltips=[('Days left', '@days_left'), ('Flights', '@count{0,0}'),
+                                          ('Avg price', '$@mean_price{0,0}')]))
+    booking.xaxis.axis_label, booking.yaxis.axis_label = 'Days Left', 'Price ($)'
+
+    timing = figure(title='Update Latency per Batch', width=480, height=420, toolbar_location=None, tools='')
+    timing.line(x='batch', y='landed_ms', legend_label='file landed → patch sent', line_width=2, source=latency)
+    timing.line(x='batch', y='aggregate_ms', legend_label='aggregate', color='#2ca02c', source=latency)
+    timing.line(x='batch', y='patch_ms', legend_label='diff + patch', color='#d62728', source=latency)
+    timing.xaxis.axis_label, timing.yaxis.axis_label = 'Batch', 'ms'
+    timing.legend.location = 'top_left'
+
+    status = Div(text='Waiting for batches…', width=960)
+    session = {'shown': shown, 'batches': len(state['batches'])}
+
+    def refresh():
+        # Snapshot the batch list first: the values read next include at least these batches
+        with state['lock']:
+            new = state['batches'][session['batches']:]
+            rows = state['rows']
+        start = time.perf_counter()
+        current = panel_values(state)
+        patched = 0
+        for name, values in current.items():
+            patches = diff_patches(session['shown'][name], values)
+            if patches:
+                sources[name].patch(patches)
+                patched += sum(len(p) for p in patches.values())
+        session['shown'] = current
+        patch_ms = (time.perf_counter() - start) * 1000
+        if not new:
+            return
+        now = time.time()
+        first = session['batches'] + 1
+        session['batches'] += len(new)
+        latency.stream(dict(batch=list(range(first, first + len(new))),
+                            rows=[b['rows'] for b in new],
+                            landed_ms=[(now - b['landed']) * 1000 for b in new],
+                            aggregate_ms=[b['aggregate_ms'] for b in new],
+                            patch_ms=[patch_ms] * len(new)), rollover=LATENCY_ROLLOVER)
+        last = new[-1]
+        status.text = (f"<b>{rows:,}</b> flights from {session['batches']} batches · last: "
+                       f"<code>{last['file']}</code> ({last['rows']:,} rows), landed → patched in "
+                       f"<b>{(now - last['landed']) * 1000:,.0f} ms</b> "
+                       f"(aggregate {last['aggregate_ms']:.1f} ms, {patched} cells patched in {patch_ms:.1f} ms)")
+
+    doc.add_root(column(status, row(heatmap, airlines), row(booking, timing)))
+    doc.title = 'Live Airlines Dashboard'
+    doc.add_periodic_callback(refresh, interval_ms)
+
+
+def replay(path, drop_dir=DROP_DIR, batch_rows=5_000, interval=1.0):
+    """Simulate a scraper: move ``path`` into ``drop_dir`` in batches, one every ``interval`` seconds."""
+    for n, chunk in enumerate(pd.read_csv(path, chunksize=batch_rows)):
+        staging = os.path.join(drop_dir, f".batch_{n:06d}.tmp")
+        chunk.to_csv(staging, index=False)
+        os.replace(staging, os.path.join(drop_dir, f"batch_{n:06d}.csv"))
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live dashboard fed by CSV batches dropped into a directory')
+    parser.add_argument('--drop-dir', default=DROP_DIR)
+    parser.add_argument('--seed', default=None, help='CSV to load before watching (e.g. the full history)')
+    parser.add_argument('--replay', default=None, help='CSV to replay into the drop directory in batches')
+    parser.add_argument('--batch-rows', type=int, default=5_000)
+    parser.add_argument('--replay-interval', type=float, default=1.0)
+    parser.add_argument('--port', type=int, default=5006)
+    parser.add_argument('--show', action='store_true', help='open a browser tab')
+    args = parser.parse_args()
+
+    print("📡 LIVE AIRLINES DASHBOARD")
+    print("="*60)
+    os.makedirs(args.drop_dir, exist_ok=True)
+    state = new_state()
+    if args.seed:
+        ingest(state, load_flights(args.seed))
+        print(f"🌱 Seeded with {state['rows']:,} rows from '{args.seed}'")
+
+    threading.Thread(target=watch, args=(state, args.drop_dir), daemon=True).start()
+    if args.replay:
+        threading.Thread(target=replay, args=(args.replay, args.drop_dir, args.batch_rows,
+                                              args.replay_interval), daemon=True).start()
+
+    server = Server({'/': partial(make_document, state=state)}, port=args.port, num_procs=1)
+    server.start()
+    print(f"👀 Watching '{args.drop_dir}/' for new CSV batches")
+    print(f"🌐 Serving on http://localhost:{args.port}/")
+    if args.show:
+        server.io_loop.add_callback(server.show, '/')
+    server.io_loop.start()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,424 @@
+import argparse
+import io
+import os
+import secrets
+import statistics
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+import numpy as np
+import pandas as pd
+
+from derived_columns import evaluate
+from flight_data import (CATEGORY_DOMAINS, CITIES, DATA_FILE, downcast, encode_frame, read_flights, route_label,
+                         validate_flights)
+from flight_sketches import distinct_flights, merge_sketches, new_sketches, save_sketches, top_k, update_sketches
+
+# Map-reduce of the data_analysis_explorer.py aggregates over CSV partitions.
+#
+# The coordinator splits each CSV into byte ranges (a line belongs to the
+# range holding its first byte) and hands them to worker processes over
+# multiprocessing.connection, i.e. a TCP socket with an authkey, so workers
+# can be local processes or run on other hosts that see the same files.
+# Messages are pickles, so the authkey is all that keeps a stranger from
+# running code in the coordinator: it comes from $MAP_REDUCE_AUTHKEY or is
+# generated per job, and the printed join command carries it.  The
+# challenge runs in each connection's own thread, so a client that connects
+# and stalls cannot keep other workers from joining.  Workers drop the rows
+# load_flights would drop (flight_data.validate_flights), except that a
+# duplicate is only caught within its own partition: a row repeated in
+# another partition is counted twice.  A
+# worker maps a range to a partial: per group counts, sums and sums of
+# squares, plus a fine log-price histogram per airline for medians, and the
+# flight_sketches.py sketches (busiest flight codes, distinct flights).
+# Every partial is additive, so the reduce is an elementwise sum (a sketch
+# merge for the sketches) and the first result for a partition wins.  A
+# partition whose worker disconnects or fails is re-queued; one that runs
+# much longer than the median partition is speculatively re-issued to an
+# idle worker (straggler retry).
+
+AUTHKEY_ENV = 'MAP_REDUCE_AUTHKEY'
+PARTITION_BYTES = 64 << 20
+
+BOOKING_BINS = [0, 7, 14, 30, 49]
+BOOKING_LABELS = ['1-7 days', '8-14 days', '15-30 days', '31-49 days']
+GROUPS = {
+    'airline': CATEGORY_DOMAINS['airline'],
+    'route': [route_label(code) for code in range(len(CITIES) ** 2)],
+    'departure_time': CATEGORY_DOMAINS['departure_time'],
+    'stops': CATEGORY_DOMAINS['stops'],
+    'booking': BOOKING_LABELS,
+}
+MEASURES = ['count', 'price', 'price_sq', 'duration', 'revenue_potential']
+
+# Log-price grid for medians: 4096 bins over $100-$1M, about 0.2% wide
+N_BINS = 4096
+LOG_MIN, LOG_MAX = np.log(100.0), np.log(1_000_000.0)
+
+
+def plan_partitions(paths, partition_bytes=PARTITION_BYTES):
+    """[(path, start, end)] byte ranges covering the data rows of every CSV."""
+    tasks = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            header = len(f.readline())
+        size = os.path.getsize(path)
+        starts = list(range(header, size, partition_bytes)) or [header]
+        tasks += [(path, start, min(start + partition_bytes, size)) for start in starts]
+    return tasks
+
+
+def read_partition(path, start, end):
+    """DataFrame of the lines whose first byte lies in [start, end)."""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        if start > len(header):
+            # Skip the line already owned by the previous range
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        data = f.read(max(end - position, 0))
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+    df = read_flights(io.BytesIO(header + data))
+    # Rows failing any loader check are left out, as load_flights would drop them
+    failures, _ = validate_flights(df)
+    return downcast(df[failures == 0])
+
+
+def new_partial():
+    partial = {f"{group}_{measure}": np.zeros(len(labels)) for group, labels in GROUPS.items() for measure in MEASURES}
+    partial['airline_hist'] = np.zeros((len(GROUPS['airline']), N_BINS))
+    return partial
+
+
+def map_frame(df):
+    """Additive partial aggregates of one frame."""
+    codes = encode_frame(df)
+    price = df['price'].to_numpy().astype(np.float64)
+    days_left = df['days_left'].to_numpy()
+    values = {
+        'count': np.ones(len(df)),
+        'price': price,
+        'price_sq': price * price,
+        'duration': df['duration'].to_numpy().astype(np.float64),
+        'revenue_potential': evaluate({'price': price, 'days_left': days_left},
+                                      'revenue_potential')['revenue_potential'],
+    }
+    booking = np.searchsorted(BOOKING_BINS, days_left, side='left') - 1
+    booking[(days_left <= BOOKING_BINS[0]) | (days_left > BOOKING_BINS[-1])] = -1
+    group_codes = {'airline': codes['airline'], 'route': codes['route'], 'departure_time': codes['departure_time'],
+                   'stops': codes['stops'], 'booking': booking}
+
+    partial = new_partial()
+    for group, code in group_codes.items():
+        code = code.astype(np.int64)
+        ok = code >= 0
+        for measure, weights in values.items():
+            partial[f"{group}_{measure}"] = np.bincount(code[ok], weights=weights[ok], minlength=len(GROUPS[group]))
+
+    airline = codes['airline'].astype(np.int64)
+    ok = (airline >= 0) & (price > 0)
+    bins = np.clip(((np.log(price[ok]) - LOG_MIN) / (LOG_MAX - LOG_MIN) * N_BINS).astype(np.int64), 0, N_BINS - 1)
+    partial['airline_hist'] = np.bincount(airline[ok] * N_BINS + bins,
+                                          minlength=len(GROUPS['airline']) * N_BINS).reshape(-1, N_BINS).astype(float)
+    partial['sketches'] = update_sketches(new_sketches(), df)
+    return partial
+
+
+def merge_partials(partials):
+    merged = new_partial()
+    merged['sketches'] = new_sketches()
+    for partial in partials:
+        for key, values in partial.items():
+            if key == 'sketches':
+                merged[key] = merge_sketches(merged[key], values)
+            else:
+                merged[key] += values
+    return merged
+
+
+def summary_tables(partial):
+    """The explorer's tables from a merged partial: {group: DataFrame indexed by label}."""
+    tables = {}
+    for group, labels in GROUPS.items():
+        n = partial[f"{group}_count"]
+        safe = np.maximum(n, 1)
+        mean = partial[f"{group}_price"] / safe
+        variance = np.maximum(partial[f"{group}_price_sq"] - n * mean ** 2, 0) / np.maximum(n - 1, 1)
+        table = pd.DataFrame({
+            'count': n.astype(np.int64),
+            'mean_price': np.where(n > 0, mean, np.nan),
+            'price_std': np.where(n > 1, np.sqrt(variance), np.nan),
+            'avg_duration': np.where(n > 0, partial[f"{group}_duration"] / safe, np.nan),
+            'revenue_potential': partial[f"{group}_revenue_potential"],
+            'share_pct': n / max(n.sum(), 1) * 100,
+        }, index=pd.Index(labels, name=group))
+        tables[group] = table
+    # Median from the histogram: centre of the bin where the cumulative count crosses half
+    hist = partial['airline_hist']
+    cumulative = hist.cumsum(axis=1)
+    position = (cumulative >= cumulative[:, -1:] / 2).argmax(axis=1)
+    centres = np.exp(LOG_MIN + (position + 0.5) * (LOG_MAX - LOG_MIN) / N_BINS)
+    tables['airline']['median_price'] = np.where(hist.sum(axis=1) > 0, centres, np.nan)
+    tables['airline']['distinct_flights'] = distinct_flights(partial['sketches'], 'airline').round().to_numpy()
+    tables['flight'] = top_k(partial['sketches'], 'flight', k=10)
+    return tables
+
+
+def run_task(task):
+    return map_frame(read_partition(*task))
+
+
+def job_authkey():
+    """The authkey in $MAP_REDUCE_AUTHKEY, or a fresh random one."""
+    return (os.environ.get(AUTHKEY_ENV) or secrets.token_hex(16)).encode()
+
+
+def worker_loop(address, authkey, delay=0.0):
+    """Connect to a coordinator and process tasks until told to stop.
+
+    ``delay`` sleeps before each task, to simulate a slow (straggling) worker.
+    """
+    with Client(address, authkey=authkey) as conn:
+        conn.send(('hello', os.getpid()))
+        while True:
+            message = conn.recv()
+            if message[0] == 'stop':
+                return
+            _, task_id, task = message
+            time.sleep(delay)
+            try:
+                conn.send(('done', task_id, run_task(task)))
+            except Exception:
+                conn.send(('error', task_id, traceback.format_exc()))
+
+
+def new_job(tasks, straggler_factor=3.0, min_straggler_seconds=1.0, max_attempts=3):
+    """Coordinator state: pending partitions, running attempts and the first result of each."""
+    return {
+        'tasks': tasks,
+        'pending': list(range(len(tasks))),
+        'running': {},  # task id -> start times of its live attempts
+        'results': {},
+        'durations': [],
+        'failures': {},
+        'stats': {'retries': 0, 'speculative': 0, 'workers': {}},
+        'straggler_factor': straggler_factor,
+        'min_straggler_seconds': min_straggler_seconds,
+        'max_attempts': max_attempts,
+        'error': None,
+        'condition': threading.Condition(),
+    }
+
+
+def _job_done(job):
+    return len(job['results']) == len(job['tasks']) or job['error'] is not None
+
+
+def _straggler(job):
+    """A running partition (with a single attempt) that is far slower than the median partition."""
+    if not job['durations']:
+        return None
+    threshold = max(job['min_straggler_seconds'], job['straggler_factor'] * statistics.median(job['durations']))
+    now = time.perf_counter()
+    for task_id, starts in job['running'].items():
+        if len(starts) == 1 and now - starts[0] > threshold:
+            return task_id
+    return None
+
+
+def _next_task(job):
+    """Block until there is a task for an idle worker; None when the job is over."""
+    with job['condition']:
+        while not _job_done(job):
+            if job['pending']:
+                task_id = job['pending'].pop(0)
+            else:
+                task_id = _straggler(job)
+                if task_id is not None:
+                    job['stats']['speculative'] += 1
+            if task_id is not None:
+                job['running'].setdefault(task_id, []).append(time.perf_counter())
+                return task_id
+            job['condition'].wait(0.1)
+        return None
+
+
+def _complete(job, task_id, partial, worker):
+    with job['condition']:
+        if task_id not in job['results']:
+            job['results'][task_id] = partial
+            now = time.perf_counter()
+            job['durations'].append(now - min(job['running'].get(task_id) or [now]))
+            job['stats']['workers'][worker] = job['stats']['workers'].get(worker, 0) + 1
+        job['running'].pop(task_id, None)
+        job['condition'].notify_all()
+
+
+def _fail(job, task_id, reason):
+    """Drop a failed attempt; re-queue the partition if no other attempt is still running."""
+    with job['condition']:
+        starts = job['running'].get(task_id, [])
+        if starts:
+            starts.pop(0)
+        if task_id in job['results'] or starts:
+            return
+        job['running'].pop(task_id, None)
+        job['failures'][task_id] = job['failures'].get(task_id, 0) + 1
+        if job['failures'][task_id] >= job['max_attempts']:
+            job['error'] = f"partition {job['tasks'][task_id]} failed {job['max_attempts']} times:\n{reason}"
+        else:
+            job['stats']['retries'] += 1
+            job['pending'].insert(0, task_id)
+        job['condition'].notify_all()
+
+
+def serve_worker(job, conn):
+    """Drive one connected worker until the job is over or the worker goes away."""
+    task_id = None
+    try:
+        _, worker = conn.recv()
+        while True:
+            task_id = _next_task(job)
+            if task_id is None:
+                conn.send(('stop',))
+                return
+            conn.send(('task', task_id, job['tasks'][task_id]))
+            status, _, payload = conn.recv()
+            if status == 'done':
+                _complete(job, task_id, payload, worker)
+            else:
+                _fail(job, task_id, payload)
+            task_id = None
+    except (EOFError, OSError) as error:
+        if task_id is not None:
+            _fail(job, task_id, f"worker disconnected: {error!r}")
+    finally:
+        conn.close()
+
+
+def run_job(paths, workers=2, partition_bytes=PARTITION_BYTES, address=('127.0.0.1', 0), authkey=None,
+            straggler_factor=3.0, min_straggler_seconds=1.0, on_listen=None):
+    """Map-reduce ``paths`` with ``workers`` local worker processes (remote ones may connect too).
+
+    ``authkey`` defaults to :func:`job_authkey`; ``on_listen(address, authkey)``
+    is called once the coordinator accepts workers.  Returns (merged partial, stats dict).
+    """
+    start = time.perf_counter()
+    authkey = authkey or job_authkey()
+    job = new_job(plan_partitions(paths, partition_bytes), straggler_factor, min_straggler_seconds)
+    # No authkey here: accept() would run the challenge on the accepting thread
+    listener = Listener(address)
+    if on_listen:
+        on_listen(listener.address, authkey)
+
+    def handshake(conn):
+        try:
+            deliver_challenge(conn, authkey)
+            answer_challenge(conn, authkey)
+        except (AuthenticationError, EOFError, OSError):
+            # A client with the wrong authkey (or none) is turned away
+            conn.close()
+            return
+        serve_worker(job, conn)
+
+    def accept():
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handshake, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    local = [Process(target=worker_loop, args=(listener.address, authkey), daemon=True) for _ in range(workers)]
+    for process in local:
+        process.start()
+    try:
+        with job['condition']:
+            while not _job_done(job):
+                job['condition'].wait(0.5)
+    finally:
+        listener.close()
+        for process in local:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    if job['error']:
+        raise RuntimeError(job['error'])
+
+    stats = dict(job['stats'], partitions=len(job['tasks']), seconds=time.perf_counter() - start)
+    return merge_partials(job['results'][i] for i in range(len(job['tasks']))), stats
+
+
+def print_summary(tables):
+    airline = tables['airline'].sort_values('mean_price')
+    print("Airline Performance Summary:")
+    print(airline[['mean_price', 'median_price', 'price_std', 'avg_duration', 'count',
+                   'distinct_flights']].round(2).to_string())
+    print("\nTop 10 Most Popular Routes:")
+    for i, (route, count) in enumerate(tables['route']['count'].nlargest(10).items(), 1):
+        print(f"{i:2d}. {route}: {count:,} flights")
+    print("\nTop 10 Busiest Flight Codes (sketched):")
+    for i, (flight, row) in enumerate(tables['flight'].iterrows(), 1):
+        print(f"{i:2d}. {flight}: ~{row['estimate']:,} flights (at least {row['guaranteed']:,})")
+    print("\nPrice patterns by booking advance:")
+    for period, row in tables['booking'].iterrows():
+        print(f"  {period}: ${row['mean_price']:,.0f} avg price ({row['count']:,} bookings)")
+    print("\nMarket Share by Airline:")
+    for name, share in tables['airline']['share_pct'].sort_values(ascending=False).items():
+        print(f"  {name}: {share:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Map-reduce the explorer aggregates over CSV partitions')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='coordinate a job (spawning local workers)')
+    run.add_argument('paths', nargs='*', default=[DATA_FILE])
+    run.add_argument('--workers', type=int, default=2, help='local worker processes')
+    run.add_argument('--partition-mb', type=float, default=PARTITION_BYTES / (1 << 20))
+    run.add_argument('--host', default='127.0.0.1', help='use 0.0.0.0 to accept workers from other hosts')
+    run.add_argument('--port', type=int, default=0)
+    run.add_argument('--output', default=None, help='save the merged partial (.npz; sketches go to <name>.sketches.npz)')
+    worker = sub.add_parser('worker', help='join a running coordinator')
+    worker.add_argument('address', help='host:port printed by the coordinator')
+    worker.add_argument('--authkey', default=os.environ.get(AUTHKEY_ENV),
+                        help=f"the coordinator's authkey (default: ${AUTHKEY_ENV})")
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        if not args.authkey:
+            parser.error(f"a worker needs the coordinator's authkey (--authkey or ${AUTHKEY_ENV})")
+        host, port = args.address.rsplit(':', 1)
+        worker_loop((host, int(port)), args.authkey.encode())
+        return
+
+    print("🗺️ MAP-REDUCE COORDINATOR")
+    print("="*60)
+
+    def on_listen(address, authkey):
+        print(f"👂 Workers can join with: {AUTHKEY_ENV}={authkey.decode()} python map_reduce.py "
+              f"worker {address[0]}:{address[1]}")
+
+    partial, stats = run_job(args.paths, args.workers, int(args.partition_mb * (1 << 20)), (args.host, args.port),
+                             on_listen=on_listen)
+    print(f"⚡ {stats['partitions']} partitions in {stats['seconds']:.2f}s "
+          f"({stats['retries']} retried, {stats['speculative']} speculative re-runs)")
+    for worker_id, count in stats['workers'].items():
+        print(f"  worker {worker_id}: {count} partitions")
+    if args.output:
+        # The sketches are a nested dict: np.savez would pickle it, so they get their own file
+        np.savez_compressed(args.output, **{key: value for key, value in partial.items() if key != 'sketches'})
+        sketch_path = f"{os.path.splitext(args.output)[0]}.sketches.npz"
+        save_sketches(partial['sketches'], sketch_path)
+        print(f"💾 Saved merged partial to '{args.output}' (sketches in '{sketch_path}')")
+    print()
+    print_summary(summary_tables(partial))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,14 @@ from plotly.subplots import make_subplots
 import plotly.figure_factory as ff
 import altair as alt
 from wordcloud import WordCloud
-import folium
-from folium import plugins
 import seaborn as sns
 import matplotlib.pyplot as plt
 from scipy import stats
+from animation_builder import frame_aggregates, build_animation
+from comoments import accumulate_frame, correlation_heatmap
+from flight_geo import route_flow_map, route_metrics
+from flight_data import load_flights
+from payload_profiler import write_checked_html
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -30,7 +33,7 @@ print("🚀 CREATING MODERN AIRLINES DASHBOARD")
 print("="*60)
 
 # Read the dataset
-df = pd.read_csv('airlines_flights_data.csv')
+df = load_flights()
 print(f"📊 Dataset loaded: {df.shape[0]:,} flights, {df.shape[1]} features")
 
 # 1. INTERACTIVE PRICE ANALYSIS DASHBOARD
@@ -51,7 +54,7 @@ fig_price_dist.update_layout(
     title_font_size=20,
     showlegend=False
 )
-fig_price_dist.write_html('price_distribution.html')
+write_checked_html(fig_price_dist, 'price_distribution.html')
 
 # Price by airline with interactive box plot
 fig_airline_prices = px.box(
@@ -65,7 +68,7 @@ fig_airline_prices.update_layout(
     title_font_size=20,
     xaxis_tickangle=-45
 )
-fig_airline_prices.write_html('airline_prices.html')
+write_checked_html(fig_airline_prices, 'airline_prices.html')
 
 # 2. ADVANCED ROUTE ANALYSIS
 print("🛫 Creating Advanced Route Analysis...")
@@ -83,7 +86,7 @@ fig_route_heatmap.update_layout(
     template='plotly_white',
     title_font_size=20
 )
-fig_route_heatmap.write_html('route_heatmap.html')
+write_checked_html(fig_route_heatmap, 'route_heatmap.html')
 
 # 3. INTERACTIVE TIME SERIES ANALYSIS
 print("⏰ Creating Time Series Analysis...")
@@ -104,7 +107,7 @@ fig_time_price.update_layout(
     title_font_size=20,
     xaxis_tickangle=-45
 )
-fig_time_price.write_html('time_price_analysis.html')
+write_checked_html(fig_time_price, 'time_price_analysis.html')
 
 # 4. 3D SCATTER PLOT - PRICE VS DURATION VS DAYS LEFT
 print("🎯 Creating 3D Scatter Plot...")
@@ -125,63 +128,24 @@ fig_3d.update_layout(
         zaxis_title="Days Left"
     )
 )
-fig_3d.write_html('3d_analysis.html')
+write_checked_html(fig_3d, '3d_analysis.html')
 
 # 5. INTERACTIVE MAP VISUALIZATION
 print("🗺️ Creating Interactive Map...")
 
-# Create a map centered on India
-m = folium.Map(
-    location=[20.5937, 78.9629],  # Center of India
-    zoom_start=5,
-    tiles='CartoDB positron'
-)
-
-# Add city markers with flight information
-cities = {
-    'Delhi': [28.7041, 77.1025],
-    'Mumbai': [19.0760, 72.8777],
-    'Bangalore': [12.9716, 77.5946],
-    'Kolkata': [22.5726, 88.3639],
-    'Hyderabad': [17.3850, 78.4867],
-    'Chennai': [13.0827, 80.2707]
-}
-
-for city, coords in cities.items():
-    city_flights = df[df['source_city'] == city].shape[0]
-    avg_price = df[df['source_city'] == city]['price'].mean()
-    
-    folium.Marker(
-        coords,
-        popup=f"""
-        <b>{city}</b><br>
-        Total Flights: {city_flights:,}<br>
-        Avg Price: ${avg_price:,.0f}
-        """,
-        tooltip=city,
-        icon=folium.Icon(color='red', icon='plane')
-    ).add_to(m)
+# Route-flow map: one arc per route weighted by volume, city markers from the same aggregates
+geo_metrics = route_metrics(df)
+m = route_flow_map(geo_metrics)
 
 m.save('interactive_map.html')
 
 # 6. ADVANCED STATISTICAL VISUALIZATIONS
 print("📊 Creating Advanced Statistical Visualizations...")
 
-# Correlation heatmap
-numeric_cols = ['price', 'duration', 'days_left']
-correlation_matrix = df[numeric_cols].corr()
-
-fig_corr = px.imshow(
-    correlation_matrix,
-    title='Feature Correlation Heatmap',
-    color_continuous_scale='RdBu',
-    aspect="auto"
-)
-fig_corr.update_layout(
-    template='plotly_white',
-    title_font_size=20
-)
-fig_corr.write_html('correlation_heatmap.html')
+# Correlation heatmap (numeric features plus one-hot class and stops)
+correlation_state = accumulate_frame(df, one_hot=['class', 'stops'])
+fig_corr = correlation_heatmap(correlation_state)
+write_checked_html(fig_corr, 'correlation_heatmap.html')
 
 # 7. WORD CLOUD FOR AIRLINES
 print("☁️ Creating Word Cloud...")
@@ -274,25 +238,26 @@ fig_dashboard.update_layout(
     showlegend=False
 )
 
-fig_dashboard.write_html('comprehensive_dashboard.html')
+write_checked_html(fig_dashboard, 'comprehensive_dashboard.html')
 
 # 9. ANIMATED VISUALIZATIONS
 print("🎬 Creating Animated Visualizations...")
 
 # Animated price trends by airline over days left
-df_animated = df.groupby(['airline', 'days_left'])['price'].mean().reset_index()
-fig_animated = px.scatter(
-    df_animated, x='days_left', y='price', color='airline', size='price',
+# Per-frame means come from a single groupby; frames only carry the arrays that change
+animation_data = frame_aggregates(df, 'days_left', 'airline', ['days_left', 'price'], n_frames=49)
+fig_animated = build_animation(
+    animation_data, x='days_left', y='price', size='price',
     title='Animated Price Trends by Airline',
-    labels={'price': 'Average Price ($)', 'days_left': 'Days Before Departure'},
-    animation_frame='days_left',
+    labels={'price': 'Average Price ($)', 'days_left': 'Days Before Departure',
+            'frame': 'days_left', 'group': 'airline'},
     range_x=[1, 49], range_y=[0, 50000]
 )
 fig_animated.update_layout(
     template='plotly_white',
     title_font_size=20
 )
-fig_animated.write_html('animated_price_trends.html')
+write_checked_html(fig_animated, 'animated_price_trends.html')
 
 # 10. ADVANCED ALTAR CHART
 print("📊 Creating Altair Chart...")
@@ -352,7 +317,7 @@ fig_summary.update_layout(
     template='plotly_white',
     title_font_size=20
 )
-fig_summary.write_html('summary_statistics.html')
+write_checked_html(fig_summary, 'summary_statistics.html')
 
 print("\n" + "="*60)
 print("🎉 MODERN DASHBOARD CREATION COMPLETE!")
@@ -363,7 +328,7 @@ print("2. airline_prices.html - Box plots by airline")
 print("3. route_heatmap.html - Route popularity heatmap")
 print("4. time_price_analysis.html - Price by departure time")
 print("5. 3d_analysis.html - 3D scatter plot")
-print("6. interactive_map.html - Interactive map of India")
+print("6. interactive_map.html - Route-flow map of India")
 print("7. correlation_heatmap.html - Feature correlations")
 print("8. airline_wordcloud.png - Airline frequency word cloud")
 print("9. comprehensive_dashboard.html - Multi-panel dashboard")
@@ -0,0 +1,275 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+# Byte-level profile of the generated HTML dashboards.
+#
+# A Plotly page is the plotly.js bundle (unless it is loaded from a CDN)
+# plus one Plotly.newPlot(id, data, layout, config) call and, for
+# animations, a Plotly.addFrames(id, frames) call.  An Altair page is a
+# Vega-Lite spec whose rows live in ``datasets``.  The same walkers run on
+# live figures (``profile_figure`` / ``profile_chart``, before anything is
+# written) and on the JSON recovered from an HTML file (``profile_html``),
+# and both re-serialize the way the page was written (plotly's JSON encoder
+# for figures, json.dumps for Altair specs), so the numbers match the files.
+#
+# A report is a DataFrame of (page, kind, item, bytes).  Top-level kinds
+# (library, trace, layout, template, frame, config, dataset, spec, other)
+# add up to the page size; ``array`` rows break traces, frames and datasets
+# down by data array (e.g. ``trace 0.marker.color``) and are not added in.
+# The dashboards write their figures through ``write_checked_html``, which
+# warns about an over-budget page before writing it rather than failing.
+
+KINDS = ('library', 'trace', 'layout', 'template', 'frame', 'config', 'dataset', 'spec', 'other')
+TRACE_BUDGET = 250_000
+_SCRIPT = re.compile(r'<script([^>]*)>(.*?)</script>', re.S)
+_SRC = re.compile(r'src="([^"]+)"')
+# The figure script starts by setting window.PLOTLYENV; the bundle mentions
+# both PLOTLYENV and Plotly.newPlot( too, so it is told apart by its header
+_FIGURE = re.compile(r'\s*window\.PLOTLYENV\s*=')
+_LIBRARY = re.compile(r'\s*/\*\*?\s*\*?\s*plotly\.js')
+
+
+def json_bytes(value):
+    """Size of ``value`` as written into the page by plotly (compact JSON, numpy as base64)."""
+    from plotly.io.json import to_json_plotly
+    return len(to_json_plotly(value).encode())
+
+
+def spec_bytes(value):
+    """Size of ``value`` as written by Altair (json.dumps with default separators)."""
+    return len(json.dumps(value).encode())
+
+
+def _is_array(value):
+    if isinstance(value, dict):
+        return set(value) >= {'dtype', 'bdata'}
+    return isinstance(value, (list, tuple)) and len(value) > 1 and not isinstance(value[0], dict)
+
+
+def _arrays(obj, prefix):
+    """(path, bytes) of every data array inside a trace or frame dict."""
+    for key, value in obj.items():
+        path = f"{prefix}.{key}"
+        if _is_array(value):
+            yield path, json_bytes(value)
+        elif isinstance(value, dict):
+            yield from _arrays(value, path)
+
+
+def _row(page, kind, item, size):
+    return {'page': page, 'kind': kind, 'item': item, 'bytes': size}
+
+
+def _trace_label(i, trace):
+    name = trace.get('name')
+    return f"trace {i} ({trace.get('type', 'scatter')}{', ' + str(name) if name not in (None, '') else ''})"
+
+
+def profile_plotly(figure, page='figure', library_bytes=0, config=None):
+    """Report rows for a figure dict: {'data': [...], 'layout': {...}, 'frames': [...]}."""
+    rows = []
+    if library_bytes:
+        rows.append(_row(page, 'library', 'plotly.js', library_bytes))
+    for i, trace in enumerate(figure.get('data', [])):
+        rows.append(_row(page, 'trace', _trace_label(i, trace), json_bytes(trace)))
+        rows += [_row(page, 'array', f"trace {i}{path}", size) for path, size in _arrays(trace, '')]
+    layout = dict(figure.get('layout', {}))
+    template = layout.pop('template', None)
+    rows.append(_row(page, 'layout', 'layout', json_bytes(layout)))
+    if template is not None:
+        rows.append(_row(page, 'template', 'layout.template', json_bytes(template)))
+    for i, frame in enumerate(figure.get('frames', []) or []):
+        label = f"frame {frame.get('name', i)}"
+        rows.append(_row(page, 'frame', label, json_bytes(frame)))
+        for j, trace in enumerate(frame.get('data', [])):
+            rows += [_row(page, 'array', f"{label} trace {j}{path}", size) for path, size in _arrays(trace, '')]
+    if config is not None:
+        rows.append(_row(page, 'config', 'config', json_bytes(config)))
+    return rows
+
+
+def profile_vega(spec, page='chart'):
+    """Report rows for a Vega-Lite spec: one per dataset (and per field), plus the rest of the spec."""
+    rows = []
+    spec = dict(spec)
+    datasets = spec.pop('datasets', {}) or {}
+    if isinstance(spec.get('data'), dict) and 'values' in spec['data']:
+        spec['data'] = dict(spec['data'])
+        datasets = dict(datasets, inline=spec['data'].pop('values'))
+    for name, records in datasets.items():
+        rows.append(_row(page, 'dataset', f"dataset {name} ({len(records):,} rows)", spec_bytes(records)))
+        if records and isinstance(records[0], dict):
+            for field in records[0]:
+                # The field's key and value in every record, as '{"field": value}'
+                size = sum(spec_bytes({field: r.get(field)}) for r in records)
+                rows.append(_row(page, 'array', f"dataset {name}.{field}", size))
+    rows.append(_row(page, 'spec', 'spec (encodings, config)', spec_bytes(spec)))
+    return rows
+
+
+def _report(rows):
+    return pd.DataFrame(rows, columns=['page', 'kind', 'item', 'bytes'])
+
+
+def profile_figure(fig, page='figure', include_plotlyjs=True):
+    """Report for a plotly Figure as ``fig.write_html(include_plotlyjs=...)`` would embed it."""
+    library = 0
+    if include_plotlyjs is True:
+        from plotly.offline import get_plotlyjs
+        library = len(get_plotlyjs().encode())
+    return _report(profile_plotly(fig.to_dict(), page, library))
+
+
+def profile_chart(chart, page='chart'):
+    """Report for an Altair chart (vega, vega-lite and vega-embed come from a CDN)."""
+    return _report(profile_vega(chart.to_dict(), page))
+
+
+def _decode_calls(script, call, decoder):
+    """JSON arguments (after the element id) of every ``Plotly.<call>(`` in a script."""
+    for match in re.finditer(rf'Plotly\.{call}\(', script):
+        position = match.end()
+        arguments = []
+        while True:
+            while script[position] in ' \t\r\n,':
+                position += 1
+            if script[position] == "'":  # addFrames quotes the id with single quotes
+                position = script.index("'", position + 1) + 1
+                arguments.append(None)
+                continue
+            if script[position] == ')':
+                break
+            value, position = decoder.raw_decode(script, position)
+            arguments.append(value)
+        yield arguments[1:]
+
+
+def profile_html(path):
+    """Report for a generated HTML page."""
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    page, decoder, rows = os.path.basename(path), json.JSONDecoder(), []
+    figures = {}
+    for attributes, script in _SCRIPT.findall(html):
+        src = _SRC.search(attributes)
+        if src:
+            rows.append(_row(page, 'library', f"{src.group(1)} (external)", 0))
+        elif _FIGURE.match(script):
+            for data, layout, *config in _decode_calls(script, 'newPlot', decoder):
+                figures[len(figures)] = {'data': data, 'layout': layout, 'frames': [],
+                                         'config': config[0] if config else None}
+            for (frames,) in _decode_calls(script, 'addFrames', decoder):
+                figures[len(figures) - 1]['frames'] += frames
+        elif _LIBRARY.match(script) or 'PLOTLYENV' in script:
+            # A bundle without its licence header still refers to PLOTLYENV
+            rows.append(_row(page, 'library', 'plotly.js', len(script.encode())))
+        elif 'var spec = ' in script:
+            spec, _ = decoder.raw_decode(script, script.index('var spec = ') + len('var spec = '))
+            rows += profile_vega(spec, page)
+    for figure in figures.values():
+        rows += profile_plotly(figure, page, config=figure['config'])
+    counted, size = sum(row['bytes'] for row in rows if row['kind'] != 'array'), len(html.encode())
+    if counted > size:
+        raise ValueError(f"{page}: parts add up to {counted:,} bytes, more than the page's {size:,}")
+    rows.append(_row(page, 'other', 'HTML, CSS and glue code', size - counted))
+    return _report(rows)
+
+
+def page_totals(report):
+    """Bytes per page and top-level kind (one row per page)."""
+    top = report[report['kind'] != 'array']
+    totals = top.pivot_table(index='page', columns='kind', values='bytes', aggfunc='sum', fill_value=0)
+    totals = totals.reindex(columns=[kind for kind in KINDS if kind in totals.columns])
+    totals['total'] = totals.sum(axis=1)
+    return totals.sort_values('total', ascending=False)
+
+
+def check_budgets(report, page_budget=None, trace_budget=TRACE_BUDGET, frame_budget=None):
+    """Messages for every page, trace/dataset or frame over its budget (bytes; None disables)."""
+    problems = []
+    if page_budget is not None:
+        for page, total in page_totals(report)['total'].items():
+            if total > page_budget:
+                problems.append(f"{page}: {total / 1e6:,.2f} MB exceeds the page budget of {page_budget / 1e6:,.2f} MB")
+    for kind, budget in (('trace', trace_budget), ('dataset', trace_budget), ('frame', frame_budget)):
+        if budget is None:
+            continue
+        for _, row in report[(report['kind'] == kind) & (report['bytes'] > budget)].iterrows():
+            problems.append(f"{row['page']}: {row['item']} is {row['bytes'] / 1e3:,.0f} KB "
+                            f"(budget {budget / 1e3:,.0f} KB)")
+    return problems
+
+
+def assert_within_budget(report, page_budget=None, trace_budget=TRACE_BUDGET, frame_budget=None):
+    """Raise ValueError listing every budget a report exceeds (e.g. before writing a figure)."""
+    problems = check_budgets(report, page_budget, trace_budget, frame_budget)
+    if problems:
+        raise ValueError("Payload over budget:\n  " + "\n  ".join(problems))
+
+
+def write_checked_html(fig, path, page_budget=None, trace_budget=TRACE_BUDGET, frame_budget=None, **kwargs):
+    """``fig.write_html(path, **kwargs)``, printing a warning for every budget the page exceeds."""
+    report = profile_figure(fig, os.path.basename(path), kwargs.get('include_plotlyjs', True))
+    for problem in check_budgets(report, page_budget, trace_budget, frame_budget):
+        print(f"⚠️ {problem}")
+    fig.write_html(path, **kwargs)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile the payload of generated HTML dashboards')
+    parser.add_argument('paths', nargs='*', help='HTML files (default: every *.html here)')
+    parser.add_argument('--budget-mb', type=float, default=None, help='maximum size of one page')
+    parser.add_argument('--trace-kb', type=float, default=TRACE_BUDGET / 1e3, help='maximum size of one trace')
+    parser.add_argument('--frame-kb', type=float, default=None, help='maximum size of one animation frame')
+    parser.add_argument('--top', type=int, default=5, help='largest traces/arrays to list per page')
+    parser.add_argument('--output', default=None, help='write the full report to this CSV')
+    parser.add_argument('--fail', action='store_true', help='exit with status 1 when a budget is exceeded')
+    args = parser.parse_args()
+
+    print("📦 HTML PAYLOAD PROFILER")
+    print("="*60)
+    paths = args.paths or sorted(glob.glob('*.html'))
+    if not paths:
+        print("⚠️ No HTML files to profile")
+        return
+    report = pd.concat([profile_html(path) for path in paths], ignore_index=True)
+    totals = page_totals(report)
+    print((totals / 1e3).round(0).astype(int).to_string())
+    print("(KB)")
+
+    for page in totals.index:
+        parts = report[(report['page'] == page) & report['kind'].isin(['trace', 'frame', 'dataset', 'array'])]
+        if parts.empty:
+            continue
+        print(f"\n{page}: largest parts")
+        for _, row in parts.nlargest(args.top, 'bytes').iterrows():
+            print(f"  {row['bytes'] / 1e3:>10,.1f} KB  {row['kind']:8s} {row['item']}")
+        frames = report[(report['page'] == page) & (report['kind'] == 'frame')]['bytes']
+        if len(frames):
+            print(f"  {len(frames)} frames: {frames.sum() / 1e3:,.1f} KB total, {frames.mean() / 1e3:,.1f} KB each")
+
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"\n✅ Saved '{args.output}'")
+
+    problems = check_budgets(report, None if args.budget_mb is None else args.budget_mb * 1e6, args.trace_kb * 1e3,
+                             None if args.frame_kb is None else args.frame_kb * 1e3)
+    if problems:
+        print(f"\n⚠️ {len(problems)} over budget:")
+        for problem in problems:
+            print(f"  {problem}")
+        if args.fail:
+            sys.exit(1)
+    else:
+        print("\n✅ All pages within budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import time
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import SGDRegressor
+
+from flight_data import (DATA_FILE, CACHE_DIR, CATEGORY_DOMAINS, CITIES,
+                         build_column_cache, open_column_cache)
+
+# Out-of-core price prediction.
+#
+# Training reads the encoded column cache from flight_data.py chunk by chunk,
+# turns each chunk into a sparse one-hot matrix directly from the int8 codes
+# and feeds it to SGDRegressor.partial_fit, so memory use depends on the chunk
+# size rather than on the dataset.  The model predicts log(price).
+
+MODEL_FILE = 'price_model.joblib'
+
+ONE_HOT = {
+    'airline': len(CATEGORY_DOMAINS['airline']),
+    'route': len(CITIES) ** 2,
+    'class': len(CATEGORY_DOMAINS['class']),
+    'stops': len(CATEGORY_DOMAINS['stops']),
+    'departure_time': len(CATEGORY_DOMAINS['departure_time']),
+    'arrival_time': len(CATEGORY_DOMAINS['arrival_time']),
+}
+NUMERIC_FEATURES = ['duration', 'days_left', 'log_days_left']
+N_FEATURES = sum(ONE_HOT.values()) + len(NUMERIC_FEATURES)
+
+
+def feature_matrix(columns):
+    """Build the CSR feature matrix from encoded columns.
+
+    ``columns`` needs int8 codes for every one-hot column plus ``duration``
+    and ``days_left``.  Unknown codes (-1) contribute an explicit zero.
+    """
+    n = len(columns['duration'])
+    width = len(ONE_HOT) + len(NUMERIC_FEATURES)
+    indices = np.empty((n, width), dtype=np.int32)
+    data = np.empty((n, width), dtype=np.float32)
+
+    offset = 0
+    for i, (col, size) in enumerate(ONE_HOT.items()):
+        codes = np.asarray(columns[col])
+        known = codes >= 0
+        indices[:, i] = np.where(known, codes, 0) + offset
+        data[:, i] = known
+        offset += size
+
+    days_left = np.asarray(columns['days_left'], dtype=np.float32)
+    numeric = [np.asarray(columns['duration'], dtype=np.float32) / 24, days_left / 49,
+               np.log(np.maximum(days_left, 1)) / np.log(49)]
+    for j, values in enumerate(numeric):
+        indices[:, len(ONE_HOT) + j] = offset + j
+        data[:, len(ONE_HOT) + j] = values
+
+    indptr = np.arange(0, n * width + 1, width, dtype=np.int64)
+    return sparse.csr_matrix((data.ravel(), indices.ravel(), indptr), shape=(n, N_FEATURES))
+
+
+def _chunk(columns, start, stop):
+    return {col: np.asarray(values[start:stop]) for col, values in columns.items()}
+
+
+def _is_holdout(start, stop, holdout_every):
+    return np.arange(start, stop) % holdout_every == 0
+
+
+def train(cache_path, chunksize=100_000, epochs=5, holdout_every=10, alpha=1e-6, seed=0):
+    """Train an SGD price model with partial_fit over chunks of the column cache.
+
+    Every ``holdout_every``-th row is held out.  Returns (model, stats).
+    """
+    columns = open_column_cache(cache_path)
+    n = len(columns['price'])
+    starts = np.arange(0, n, chunksize)
+    rng = np.random.default_rng(seed)
+    model = SGDRegressor(alpha=alpha, learning_rate='invscaling', eta0=0.05, random_state=seed)
+
+    trained_rows = 0
+    start_time = time.perf_counter()
+    for epoch in range(epochs):
+        for start in rng.permutation(starts):
+            stop = min(start + chunksize, n)
+            chunk = _chunk(columns, start, stop)
+            train_rows = ~_is_holdout(start, stop, holdout_every)
+            X = feature_matrix(chunk)[train_rows]
+            y = np.log(chunk['price'][train_rows])
+            order = rng.permutation(len(y))
+            model.partial_fit(X[order], y[order])
+            trained_rows += len(y)
+    train_seconds = time.perf_counter() - start_time
+
+    stats = evaluate(model, columns, chunksize, holdout_every)
+    stats.update(trained_rows=trained_rows, train_seconds=train_seconds,
+                 rows_per_second=trained_rows / train_seconds if train_seconds else float('inf'))
+    return model, stats
+
+
+def evaluate(model, columns, chunksize=100_000, holdout_every=10):
+    """Holdout MAE, RMSE, MAPE and R² in price units, accumulated chunk by chunk."""
+    n = len(columns['price'])
+    count = abs_err = sq_err = pct_err = total = total_sq = 0.0
+    for start in range(0, n, chunksize):
+        stop = min(start + chunksize, n)
+        chunk = _chunk(columns, start, stop)
+        rows = _is_holdout(start, stop, holdout_every)
+        actual = chunk['price'][rows].astype(np.float64)
+        predicted = np.exp(model.predict(feature_matrix(chunk)[rows]))
+        error = predicted - actual
+        count += len(actual)
+        abs_err += np.abs(error).sum()
+        sq_err += (error ** 2).sum()
+        pct_err += (np.abs(error) / actual).sum()
+        total += actual.sum()
+        total_sq += (actual ** 2).sum()
+
+    variance = total_sq - total ** 2 / count
+    return {
+        'holdout_rows': int(count),
+        'mae': abs_err / count,
+        'rmse': np.sqrt(sq_err / count),
+        'mape': pct_err / count * 100,
+        'r2': 1 - sq_err / variance,
+    }
+
+
+def save_model(model, path=MODEL_FILE):
+    joblib.dump({'model': model, 'one_hot': ONE_HOT, 'numeric': NUMERIC_FEATURES,
+                 'domains': CATEGORY_DOMAINS}, path)
+
+
+def load_model(path=MODEL_FILE):
+    bundle = joblib.load(path)
+    if bundle['one_hot'] != ONE_HOT or bundle['numeric'] != NUMERIC_FEATURES:
+        raise ValueError(f"{path} was trained with a different feature layout")
+    return bundle['model']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the out-of-core flight price model')
+    parser.add_argument('--data', default=DATA_FILE, help='flights CSV')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='encoded column cache directory')
+    parser.add_argument('--model', default=MODEL_FILE, help='output model file')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--holdout-every', type=int, default=10, help='hold out every n-th row')
+    args = parser.parse_args()
+
+    print("🔮 PRICE PREDICTION TRAINING")
+    print("="*60)
+
+    start = time.perf_counter()
+    cache_path = build_column_cache(args.data, args.cache_dir)
+    print(f"📦 Encoded column cache: {cache_path} ({time.perf_counter() - start:.2f}s)")
+
+    model, stats = train(cache_path, args.chunksize, args.epochs, args.holdout_every)
+    save_model(model, args.model)
+
+    print(f"⚡ Trained on {stats['trained_rows']:,} rows in {stats['train_seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s)")
+    print(f"🎯 Holdout ({stats['holdout_rows']:,} rows): MAE ${stats['mae']:,.0f}, "
+          f"RMSE ${stats['rmse']:,.0f}, MAPE {stats['mape']:.1f}%, R² {stats['r2']:.3f}")
+    print(f"✅ Model saved to '{args.model}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_data import hash_columns, label_hashes, load_flights, read_flights
+
+# Diff two snapshots of the dataset (e.g. yesterday's and today's scrape).
+#
+# A fare is identified by KEY_COLUMNS and described by VALUE_COLUMNS.  Each
+# row is reduced to a 24-byte record: a uint64 hash of its key, a uint64 hash
+# of its values and its row position.  Records are streamed to
+# disk in partitions chosen by the top bits of the key hash, so each
+# partition of the old and new snapshot can be diffed on its own with a
+# sort + searchsorted merge, and memory is bounded by the partition size.
+# Only the rows that differ are read back from the CSVs to build the output.
+# Identical rows are paired first; remaining repeated keys are paired in
+# order of appearance.
+
+KEY_COLUMNS = ['flight', 'class', 'days_left', 'source_city', 'destination_city', 'departure_time', 'arrival_time']
+VALUE_COLUMNS = ['price', 'duration', 'stops', 'airline']
+RECORD = np.dtype([('key', '<u8'), ('value', '<u8'), ('row', '<i8')])
+
+PARTITIONS = 16
+CHUNKSIZE = 1_000_000
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def snapshot_records(df, first_row=0):
+    """RECORD array for a chunk whose first row is at position ``first_row`` in its file."""
+    records = np.empty(len(df), dtype=RECORD)
+    # Unvalidated numbers are float64 and may be NaN: hash their bits
+    records['key'] = hash_columns([df['days_left'].to_numpy(dtype=np.float64).view(np.uint64)]
+                                  + [label_hashes(df[col]) for col in KEY_COLUMNS if col != 'days_left'])
+    records['value'] = hash_columns([df['price'].to_numpy(dtype=np.float64).view(np.uint64),
+                                     df['duration'].to_numpy(dtype=np.float32).view(np.uint32).astype(np.uint64),
+                                     label_hashes(df['stops']), label_hashes(df['airline'])])
+    records['row'] = np.arange(first_row, first_row + len(df))
+    return records
+
+
+def partition_snapshot(path, directory, partitions=PARTITIONS, chunksize=CHUNKSIZE):
+    """Stream ``path`` into ``directory/<n>.bin`` record files by key-hash partition; returns the row count."""
+    shift = np.uint64(64 - (partitions.bit_length() - 1))
+    files = [open(os.path.join(directory, f"{n}.bin"), 'wb') for n in range(partitions)]
+    rows = 0
+    try:
+        # Unvalidated: rows the loader would quarantine are still part of the snapshot
+        for chunk in load_flights(path, chunksize=chunksize, validate=False):
+            records = snapshot_records(chunk, rows)
+            part = (records['key'] >> shift).astype(np.int64) if partitions > 1 else np.zeros(len(records), np.int64)
+            order = np.argsort(part, kind='stable')
+            bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+            for n in range(partitions):
+                records[order[bounds[n]:bounds[n + 1]]].tofile(files[n])
+            rows += len(chunk)
+    finally:
+        for f in files:
+            f.close()
+    return rows
+
+
+def _ranked(keys, rows):
+    """Make repeated keys distinct: key + (occurrence rank by row position) * constant."""
+    order = np.lexsort((rows, keys))
+    sorted_keys = keys[order]
+    position = np.arange(len(keys))
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    rank = position - np.maximum.accumulate(np.where(first, position, 0))
+    ranked = np.empty_like(keys)
+    with np.errstate(over='ignore'):
+        ranked[order] = sorted_keys + rank.astype(np.uint64) * _GOLDEN
+    return ranked
+
+
+def _pair(old_keys, new_keys):
+    """Indices (into old, into new) of records with equal keys."""
+    if not len(old_keys) or not len(new_keys):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(old_keys)
+    sorted_keys = old_keys[order]
+    position = np.minimum(np.searchsorted(sorted_keys, new_keys), len(sorted_keys) - 1)
+    found = sorted_keys[position] == new_keys
+    return order[position[found]], np.flatnonzero(found)
+
+
+def diff_partition(old, new):
+    """Diff two RECORD arrays; returns row positions of added, removed and changed fares.
+
+    Identical rows are paired first, so repeated keys only count as changed
+    when their values really differ; the remaining rows are paired by key.
+    """
+    old_same, new_same = _pair(_ranked(hash_columns([old['key'], old['value']]), old['row']),
+                               _ranked(hash_columns([new['key'], new['value']]), new['row']))
+    old_rest = np.setdiff1d(np.arange(len(old)), old_same, assume_unique=True)
+    new_rest = np.setdiff1d(np.arange(len(new)), new_same, assume_unique=True)
+
+    old_pair, new_pair = _pair(_ranked(old['key'][old_rest], old['row'][old_rest]),
+                               _ranked(new['key'][new_rest], new['row'][new_rest]))
+    return {
+        'added': new['row'][np.delete(new_rest, new_pair)],
+        'removed': old['row'][np.delete(old_rest, old_pair)],
+        'changed_old': old['row'][old_rest[old_pair]],
+        'changed_new': new['row'][new_rest[new_pair]],
+        'unchanged': len(old_same),
+    }
+
+
+def fetch_rows(path, rows, chunksize=CHUNKSIZE):
+    """Read only the given row positions of a CSV, streaming; returns a frame indexed by position."""
+    rows = np.unique(rows)
+    parts, offset = [], 0
+    for chunk in load_flights(path, chunksize=chunksize, validate=False):
+        lo, hi = np.searchsorted(rows, [offset, offset + len(chunk)])
+        if hi > lo:
+            part = chunk.iloc[rows[lo:hi] - offset]
+            part.index = rows[lo:hi]
+            parts.append(part)
+        offset += len(chunk)
+    if not parts:
+        return read_flights(path, nrows=0)
+    return pd.concat(parts)
+
+
+def diff_snapshots(old_path, new_path, partitions=PARTITIONS, chunksize=CHUNKSIZE, workdir=None):
+    """Diff two snapshot CSVs.
+
+    Returns {'added', 'removed', 'changed'} DataFrames plus a 'stats' dict.
+    ``changed`` holds the key columns, old and new price, the price delta and
+    the names of the value columns that changed.
+    """
+    if partitions < 1 or partitions & (partitions - 1):
+        raise ValueError("partitions must be a power of two")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        sides = {}
+        for side, path in (('old', old_path), ('new', new_path)):
+            os.makedirs(os.path.join(directory, side))
+            sides[side] = partition_snapshot(path, os.path.join(directory, side), partitions, chunksize)
+        hashed = time.perf_counter()
+
+        results = []
+        for n in range(partitions):
+            old = np.fromfile(os.path.join(directory, 'old', f"{n}.bin"), dtype=RECORD)
+            new = np.fromfile(os.path.join(directory, 'new', f"{n}.bin"), dtype=RECORD)
+            results.append(diff_partition(old, new))
+    merged = time.perf_counter()
+
+    diff = {key: np.concatenate([r[key] for r in results]) for key in ('added', 'removed', 'changed_old', 'changed_new')}
+    old_rows = fetch_rows(old_path, np.concatenate([diff['removed'], diff['changed_old']]), chunksize)
+    new_rows = fetch_rows(new_path, np.concatenate([diff['added'], diff['changed_new']]), chunksize)
+
+    before = old_rows.loc[diff['changed_old']].reset_index(drop=True)
+    after = new_rows.loc[diff['changed_new']].reset_index(drop=True)
+    changed = after[KEY_COLUMNS].copy()
+    changed['old_price'] = before['price'].to_numpy()
+    changed['new_price'] = after['price'].to_numpy()
+    changed['price_delta'] = changed['new_price'] - changed['old_price']
+    differs = np.column_stack([before[col].astype(str).to_numpy() != after[col].astype(str).to_numpy()
+                               for col in VALUE_COLUMNS]) if len(changed) else np.zeros((0, len(VALUE_COLUMNS)), bool)
+    changed['changed'] = [','.join(np.array(VALUE_COLUMNS)[mask]) for mask in differs]
+
+    return {
+        'added': new_rows.loc[np.sort(diff['added'])],
+        'removed': old_rows.loc[np.sort(diff['removed'])],
+        'changed': changed.sort_values('price_delta', key=np.abs, ascending=False, kind='stable'),
+        'stats': {
+            'old_rows': sides['old'],
+            'new_rows': sides['new'],
+            'unchanged': sum(r['unchanged'] for r in results),
+            'hash_seconds': hashed - start,
+            'merge_seconds': merged - hashed,
+            'total_seconds': time.perf_counter() - start,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two snapshots of the flights dataset')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--partitions', type=int, default=PARTITIONS)
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    parser.add_argument('--output-prefix', default='snapshot_diff')
+    args = parser.parse_args()
+
+    print("🔀 SNAPSHOT DIFF")
+    print("="*60)
+    diff = diff_snapshots(args.old, args.new, args.partitions, args.chunksize)
+    stats = diff['stats']
+    print(f"📄 {stats['old_rows']:,} old rows vs {stats['new_rows']:,} new rows")
+    print(f"⚡ hashed in {stats['hash_seconds']:.2f}s, merged in {stats['merge_seconds']:.2f}s, "
+          f"{stats['total_seconds']:.2f}s total")
+    print(f"  ➕ added:     {len(diff['added']):,}")
+    print(f"  ➖ removed:   {len(diff['removed']):,}")
+    print(f"  ✏️ changed:   {len(diff['changed']):,}")
+    print(f"  ✔️ unchanged: {stats['unchanged']:,}")
+
+    if len(diff['changed']):
+        print("\nLargest price changes:")
+        print(diff['changed'].head(10).to_string(index=False))
+    for kind in ('added', 'removed', 'changed'):
+        diff[kind].to_csv(f"{args.output_prefix}_{kind}.csv", index=False)
+    print(f"\n✅ Saved {args.output_prefix}_added.csv, _removed.csv and _changed.csv")
+
+
+if __name__ == '__main__':
+    main()
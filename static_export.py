@@ -0,0 +1,146 @@
+import argparse
+import os
+import runpy
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Batch static image export for the Plotly dashboards.
+#
+# Every kaleido call made through plotly.io normally pays for a fresh
+# renderer (a headless browser with kaleido>=1, a subprocess with 0.2.x).
+# Here each worker process starts its renderer once in the pool initializer
+# and keeps it warm, so the queued figures only pay for the render itself.
+# A plain export is tried first, in the parent: it fails fast when the
+# renderer cannot run (e.g. no Chrome for kaleido>=1), whereas starting the
+# persistent server would block, so that start is also given a timeout.
+
+DASHBOARD_SCRIPTS = ['modern_dashboard.py', 'advanced_visualizations.py', 'beautiful_dashboard.py']
+FORMATS = ['png', 'svg', 'pdf']
+RENDERER_TIMEOUT = 60
+
+
+def _probe():
+    pio.to_image(go.Figure(go.Scatter(x=[0], y=[0])), format='png', width=10, height=10)
+
+
+def check_renderer():
+    """Raise RuntimeError if a single image cannot be rendered."""
+    try:
+        _probe()
+    except Exception as error:
+        raise RuntimeError(f"Static export is unavailable: {str(error).strip().splitlines()[0]}") from error
+
+
+def _warm_worker(timeout=RENDERER_TIMEOUT):
+    """Start a persistent renderer in this worker process and warm it up."""
+    try:
+        import kaleido
+    except ImportError:
+        kaleido = None
+    if hasattr(kaleido, 'start_sync_server'):
+        starter = threading.Thread(target=kaleido.start_sync_server, kwargs={'silence_warnings': True}, daemon=True)
+        starter.start()
+        starter.join(timeout)
+        if starter.is_alive():
+            raise RuntimeError(f"kaleido renderer did not start within {timeout}s")
+    _probe()
+
+
+def _export_one(fig_dict, path, fmt, scale):
+    start = time.perf_counter()
+    pio.write_image(fig_dict, path, format=fmt, scale=scale, validate=False)
+    return path, time.perf_counter() - start
+
+
+def collect_figures(scripts=DASHBOARD_SCRIPTS):
+    """Run the dashboard scripts and return {name: figure} for every Plotly figure they build.
+
+    Names are ``<script>_<variable>`` with the ``fig_`` prefix dropped, e.g.
+    ``modern_dashboard_price_dist``.
+    """
+    figures = {}
+    for script in scripts:
+        stem = os.path.splitext(os.path.basename(script))[0]
+        try:
+            namespace = runpy.run_path(script, run_name='__static_export__')
+        except Exception as error:  # one broken dashboard must not stop the others
+            print(f"⚠️ Skipping {script}: {type(error).__name__}: {error}")
+            continue
+        for var, value in namespace.items():
+            if isinstance(value, go.Figure):
+                name = var[4:] if var.startswith('fig_') else var
+                figures[f"{stem}_{name}"] = value
+    return figures
+
+
+def export_figures(figures, out_dir='static_exports', formats=FORMATS, workers=None, scale=2):
+    """Export every figure in every format over a pool of warm renderer processes.
+
+    Returns (results, failures): (path, seconds) per written image and
+    (path, error message) per image that could not be written.
+    """
+    if not figures:
+        return [], []
+    check_renderer()
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or max(1, min(len(figures), os.cpu_count() or 1))
+    results, failures = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        jobs = {
+            pool.submit(_export_one, fig.to_plotly_json(), path, fmt, scale): path
+            for name, fig in figures.items()
+            for fmt in formats
+            for path in [os.path.join(out_dir, f"{name}.{fmt}")]
+        }
+        for job in as_completed(jobs):
+            try:
+                results.append(job.result())
+            except Exception as error:
+                failures.append((jobs[job], f"{type(error).__name__}: {error}"))
+    return sorted(results), sorted(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export every Plotly dashboard figure as static images')
+    parser.add_argument('scripts', nargs='*', default=DASHBOARD_SCRIPTS, help='dashboard scripts to collect figures from')
+    parser.add_argument('--out', default='static_exports', help='output directory')
+    parser.add_argument('--formats', nargs='+', default=FORMATS, choices=['png', 'jpg', 'webp', 'svg', 'pdf'])
+    parser.add_argument('--workers', type=int, default=None, help='renderer processes (default: one per CPU)')
+    parser.add_argument('--scale', type=float, default=2, help='image scale factor')
+    args = parser.parse_args()
+
+    print("🖼️ BATCH STATIC IMAGE EXPORT")
+    print("="*60)
+
+    figures = collect_figures(args.scripts)
+    print(f"📊 Collected {len(figures)} figures from {len(args.scripts)} scripts")
+
+    start = time.perf_counter()
+    try:
+        results, failures = export_figures(figures, args.out, args.formats, args.workers, args.scale)
+    except RuntimeError as error:
+        print(f"❌ {error}")
+        return
+    elapsed = time.perf_counter() - start
+
+    if results:
+        print("\n⏱️ Per-image latency:")
+    for path, seconds in results:
+        print(f"  {path}: {seconds * 1000:,.0f} ms")
+    for path, error in failures:
+        print(f"  ❌ {path}: {error}")
+
+    if not results:
+        print("\n⚠️ No images were exported")
+        return
+    latencies = sorted(seconds for _, seconds in results)
+    print(f"\n✅ Exported {len(results)} images to '{args.out}' in {elapsed:.1f}s "
+          f"(median {latencies[len(latencies) // 2] * 1000:,.0f} ms, max {latencies[-1] * 1000:,.0f} ms per image)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from flight_data import load_flights
+
+# Static report pages for data_analysis_explorer.py.
+#
+# All heavy lifting happens up front on the full frame: histograms come from
+# np.histogram, the price/duration cloud is binned into a 2D density image
+# with np.histogram2d instead of drawing 300k markers, and group statistics
+# are plain groupbys.  The page renderers only see these small arrays, so
+# pages can be drawn in parallel worker processes on the Agg backend.
+
+STYLE = 'seaborn-v0_8'
+DENSITY_BINS = 200
+
+REPORT_PAGES = {
+    'price': 'price_analysis.png',
+    'routes': 'route_analysis.png',
+    'time': 'time_analysis.png',
+    'booking': 'booking_analysis.png',
+}
+
+
+# 1. PAGE DATA (computed once in the parent process)
+
+def price_page_data(df):
+    price = df['price'].to_numpy()
+    duration = df['duration'].to_numpy()
+    counts, edges = np.histogram(price, bins=50)
+    density, x_edges, y_edges = np.histogram2d(duration, price, bins=DENSITY_BINS)
+    return {
+        'airline_mean': df.groupby('airline')['price'].mean().round(0),
+        'class_mean': df.groupby('class')['price'].mean(),
+        'hist_counts': counts,
+        'hist_edges': edges,
+        'density': density.T,
+        'density_extent': [x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]],
+        'correlation': np.corrcoef(price, duration)[0, 1],
+        'median': np.median(price),
+    }
+
+
+def routes_page_data(df):
+    routes = df.groupby(['source_city', 'destination_city'])['price'].agg(['mean', 'count'])
+    routes.index = [f"{src}→{dst}" for src, dst in routes.index]
+    return {
+        'popular': routes['count'].sort_values(ascending=False).head(10),
+        'expensive': routes['mean'].sort_values(ascending=False).head(10),
+        'matrix': df.groupby(['source_city', 'destination_city']).size().unstack(fill_value=0),
+    }
+
+
+def time_page_data(df):
+    return {
+        'departure_counts': df['departure_time'].value_counts(),
+        'departure_prices': df.groupby('departure_time')['price'].mean().sort_values(ascending=False),
+        'days_left_mean': df.groupby('days_left')['price'].mean(),
+    }
+
+
+def booking_page_data(df):
+    days_left_bins = pd.cut(df['days_left'], bins=[0, 7, 14, 30, 49],
+                            labels=['1-7 days', '8-14 days', '15-30 days', '31-49 days'])
+    return {
+        'booking': df.groupby(days_left_bins, observed=False)['price'].agg(['mean', 'count']),
+        'stops': df.groupby('stops').agg(price=('price', 'mean'), duration=('duration', 'mean')),
+    }
+
+
+PAGE_DATA = {
+    'price': price_page_data,
+    'routes': routes_page_data,
+    'time': time_page_data,
+    'booking': booking_page_data,
+}
+
+
+# 2. PAGE RENDERERS (only ever see the precomputed arrays)
+
+def render_price_page(data):
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+
+    ax = axes[0, 0]
+    data['airline_mean'].plot(kind='bar', color='skyblue', ax=ax)
+    ax.set_title('Average Ticket Prices by Airline')
+    ax.set_ylabel('Price ($)')
+    ax.tick_params(axis='x', rotation=45)
+
+    ax = axes[0, 1]
+    density = np.where(data['density'] > 0, np.log1p(data['density']), np.nan)
+    ax.imshow(density, extent=data['density_extent'], origin='lower',
+              aspect='auto', cmap='viridis', interpolation='nearest', rasterized=True)
+    ax.set_xlabel('Duration (hours)')
+    ax.set_ylabel('Price ($)')
+    ax.set_title('Price vs Flight Duration')
+    ax.text(0.05, 0.95, f"Correlation: {data['correlation']:.3f}", transform=ax.transAxes,
+            bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
+
+    ax = axes[1, 0]
+    ax.stairs(data['hist_counts'], data['hist_edges'], fill=True, alpha=0.7, color='lightgreen')
+    ax.set_xlabel('Price ($)')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Price Distribution')
+    ax.axvline(data['median'], color='red', linestyle='--', label=f"Median: ${data['median']:,.0f}")
+    ax.legend()
+
+    ax = axes[1, 1]
+    data['class_mean'].plot(kind='bar', color=['orange', 'purple'], ax=ax)
+    ax.set_title('Average Price by Class')
+    ax.set_ylabel('Price ($)')
+    ax.tick_params(axis='x', rotation=0)
+
+    fig.tight_layout()
+    return fig
+
+
+def render_routes_page(data):
+    fig, axes = plt.subplots(1, 3, figsize=(20, 6))
+
+    data['popular'].plot(kind='barh', color='steelblue', ax=axes[0])
+    axes[0].invert_yaxis()
+    axes[0].set_title('Top 10 Most Popular Routes')
+    axes[0].set_xlabel('Flights')
+
+    data['expensive'].plot(kind='barh', color='indianred', ax=axes[1])
+    axes[1].invert_yaxis()
+    axes[1].set_title('Most Expensive Routes')
+    axes[1].set_xlabel('Average Price ($)')
+
+    matrix = data['matrix']
+    image = axes[2].imshow(matrix.values, cmap='viridis')
+    axes[2].set_xticks(range(len(matrix.columns)), matrix.columns, rotation=45)
+    axes[2].set_yticks(range(len(matrix.index)), matrix.index)
+    axes[2].set_title('Route Popularity Heatmap')
+    fig.colorbar(image, ax=axes[2], label='Flights')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_time_page(data):
+    fig, axes = plt.subplots(1, 3, figsize=(20, 6))
+
+    data['departure_counts'].plot(kind='bar', color='orange', ax=axes[0])
+    axes[0].set_title('Departure Time Preferences')
+    axes[0].set_ylabel('Flights')
+    axes[0].tick_params(axis='x', rotation=45)
+
+    data['departure_prices'].plot(kind='bar', color='green', ax=axes[1])
+    axes[1].set_title('Average Price by Departure Time')
+    axes[1].set_ylabel('Price ($)')
+    axes[1].tick_params(axis='x', rotation=45)
+
+    data['days_left_mean'].plot(color='blue', marker='o', ax=axes[2])
+    axes[2].set_title('Price Trend by Days Left')
+    axes[2].set_xlabel('Days Left')
+    axes[2].set_ylabel('Average Price ($)')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_booking_page(data):
+    fig, axes = plt.subplots(1, 3, figsize=(20, 6))
+
+    data['booking']['mean'].plot(kind='bar', color='skyblue', ax=axes[0])
+    axes[0].set_title('Average Price by Booking Advance')
+    axes[0].set_ylabel('Price ($)')
+    axes[0].tick_params(axis='x', rotation=0)
+
+    data['stops']['price'].plot(kind='bar', color='purple', ax=axes[1])
+    axes[1].set_title('Average Price by Stops')
+    axes[1].set_ylabel('Price ($)')
+    axes[1].tick_params(axis='x', rotation=0)
+
+    data['stops']['duration'].plot(kind='bar', color='teal', ax=axes[2])
+    axes[2].set_title('Average Duration by Stops')
+    axes[2].set_ylabel('Duration (hours)')
+    axes[2].tick_params(axis='x', rotation=0)
+
+    fig.tight_layout()
+    return fig
+
+
+PAGE_RENDERERS = {
+    'price': render_price_page,
+    'routes': render_routes_page,
+    'time': render_time_page,
+    'booking': render_booking_page,
+}
+
+
+# 3. REPORT DRIVER
+
+def render_page(page, data, path, dpi=300):
+    """Draw one report page from its precomputed data and save it to ``path``."""
+    with plt.style.context(STYLE):
+        fig = PAGE_RENDERERS[page](data)
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+
+def _use_agg():
+    plt.switch_backend('Agg')
+
+
+def _render_job(page, data, path, dpi):
+    start = time.perf_counter()
+    plt.close(render_page(page, data, path, dpi))
+    return path, time.perf_counter() - start
+
+
+def render_report(df, out_dir='.', pages=None, dpi=300, workers=None):
+    """Render the report pages headlessly, one worker process per page.
+
+    Returns a list of (path, seconds) tuples in page order.
+    """
+    pages = pages or list(REPORT_PAGES)
+    data = {page: PAGE_DATA[page](df) for page in pages}
+    paths = {page: os.path.normpath(os.path.join(out_dir, REPORT_PAGES[page])) for page in pages}
+
+    # Workers are forked: with spawn/forkserver each would re-run the caller's
+    # __main__, and data_analysis_explorer.py is a script without a main guard
+    workers = workers or min(len(pages), os.cpu_count() or 1)
+    if workers == 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        _use_agg()
+        return [_render_job(page, data[page], paths[page], dpi) for page in pages]
+
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg, mp_context=context) as pool:
+        jobs = [pool.submit(_render_job, page, data[page], paths[page], dpi) for page in pages]
+        return [job.result() for job in jobs]
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+    print("📄 RENDERING STATIC REPORT")
+    print("="*60)
+    df = load_flights()
+    start = time.perf_counter()
+    for path, seconds in render_report(df):
+        print(f"  {path}: {seconds:.2f}s")
+    print(f"✅ Report rendered in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from plotly.offline import get_plotlyjs
+
+from flight_data import CATEGORY_DOMAINS, DATA_FILE, build_column_cache, open_column_cache
+
+# Level-of-detail pyramid for zoomable full-data scatter plots.
+#
+# Points are binned on a 2^16 x 2^16 grid over the plot extent and sorted by
+# the Morton (Z-order) code of their bin.  In Z-order every bin at every
+# coarser level, and every tile, is a contiguous run of the sorted points, so
+# one sort builds the whole pyramid: each bin level keeps the sorted distinct
+# bin keys (uint32, as 2 x 16 bits fit) and the offset of each bin's first
+# point (counts are offset differences), and the finest level is the points
+# themselves.  All arrays are .npy files opened memory-mapped, next
+# to the column cache of the same dataset fingerprint.
+#
+# A tile at level z is 1/2^z of the extent per axis and is drawn with
+# 2^TILE_BITS bins per axis.  A viewport request picks the level whose tiles
+# are at least as large as the viewport (so at most 2x2 tiles), and returns
+# the raw points when the bins it covers hold at most ``max_points``, or the
+# bin counts otherwise: a response is bounded whatever the dataset size.
+
+FINEST_BITS = 16
+TILE_BITS = 6
+MAX_ZOOM = FINEST_BITS - TILE_BITS
+MAX_POINTS = 20_000
+PLOTS = {'duration': ('duration', 'price'), 'days_left': ('days_left', 'price')}
+POINT_COLUMNS = ['x', 'y', 'row', 'airline', 'class']
+PORT = 8050
+
+
+def _spread(v):
+    """Interleave zeros between the low 32 bits of ``v`` (uint64)."""
+    v = v & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def _compact(v):
+    """Inverse of :func:`_spread`."""
+    v = v & np.uint64(0x5555555555555555)
+    for shift, mask in ((1, 0x3333333333333333), (2, 0x0F0F0F0F0F0F0F0F), (4, 0x00FF00FF00FF00FF),
+                        (8, 0x0000FFFF0000FFFF), (16, 0x00000000FFFFFFFF)):
+        v = (v | (v >> np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton(bx, by):
+    return _spread(np.asarray(bx, dtype=np.uint64)) | (_spread(np.asarray(by, dtype=np.uint64)) << np.uint64(1))
+
+
+def unmorton(keys):
+    keys = np.asarray(keys, dtype=np.uint64)
+    return _compact(keys).astype(np.int64), _compact(keys >> np.uint64(1)).astype(np.int64)
+
+
+def _level_keys(keys, level):
+    return keys >> np.uint64(2 * (FINEST_BITS - level))
+
+
+def build_pyramid(x, y, directory, airline=None, travel_class=None):
+    """Sort points into Z-order and write the point and per-level bin arrays to ``directory``."""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    extent = [float(x.min()), float(x.max()), float(y.min()), float(y.max())]
+    side = 1 << FINEST_BITS
+    bx = np.clip((x - extent[0]) / max(extent[1] - extent[0], 1e-9) * side, 0, side - 1)
+    by = np.clip((y - extent[2]) / max(extent[3] - extent[2], 1e-9) * side, 0, side - 1)
+    keys = morton(bx.astype(np.uint64), by.astype(np.uint64))
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+
+    os.makedirs(directory, exist_ok=True)
+    missing = np.full(len(x), -1, dtype=np.int8)
+    points = {'x': x[order].astype(np.float32), 'y': y[order].astype(np.float32), 'row': order.astype(np.int64),
+              'airline': (missing if airline is None else np.asarray(airline))[order].astype(np.int8),
+              'class': (missing if travel_class is None else np.asarray(travel_class))[order].astype(np.int8)}
+    for name, values in points.items():
+        np.save(os.path.join(directory, f"{name}.npy"), values)
+    for level in range(TILE_BITS, FINEST_BITS + 1):
+        level_keys = _level_keys(keys, level)
+        starts = np.flatnonzero(np.r_[True, level_keys[1:] != level_keys[:-1]])
+        np.save(os.path.join(directory, f"keys_{level}.npy"), level_keys[starts].astype(np.uint32))
+        # One extra offset at the end, so a bin's count is starts[i + 1] - starts[i]
+        np.save(os.path.join(directory, f"starts_{level}.npy"), np.r_[starts, len(keys)].astype(np.int64))
+
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({'points': len(x), 'extent': extent, 'finest_bits': FINEST_BITS, 'tile_bits': TILE_BITS}, f)
+
+
+def open_pyramid(directory):
+    """Return the pyramid as a dict of memory-mapped arrays plus its metadata."""
+    with open(os.path.join(directory, 'meta.json')) as f:
+        pyramid = json.load(f)
+    load = lambda name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+    pyramid['columns'] = {name: load(name) for name in POINT_COLUMNS}
+    pyramid['levels'] = {level: {part: load(f"{part}_{level}") for part in ('keys', 'starts')}
+                         for level in range(TILE_BITS, FINEST_BITS + 1)}
+    return pyramid
+
+
+def build_pyramids(path=DATA_FILE):
+    """Build (once per dataset fingerprint) and open a pyramid per plot; returns {plot: pyramid}."""
+    cache_path = build_column_cache(path)
+    columns = None
+    pyramids = {}
+    for plot, (x, y) in PLOTS.items():
+        directory = os.path.join(cache_path, 'pyramid', plot)
+        if not os.path.exists(os.path.join(directory, 'meta.json')):
+            columns = columns or open_column_cache(cache_path)
+            build_pyramid(columns[x], columns[y], directory, columns['airline'], columns['class'])
+        pyramids[plot] = open_pyramid(directory)
+    return pyramids
+
+
+def _to_bins(pyramid, level, x, y):
+    """Continuous data coordinates -> (fractional) bin coordinates at ``level``."""
+    x0, x1, y0, y1 = pyramid['extent']
+    side = 1 << level
+    return ((np.asarray(x, dtype=np.float64) - x0) / max(x1 - x0, 1e-9) * side,
+            (np.asarray(y, dtype=np.float64) - y0) / max(y1 - y0, 1e-9) * side)
+
+
+def _bins_in_tile(pyramid, z, tx, ty):
+    """(keys, first-point offsets, counts) of the level ``z + TILE_BITS`` bins inside tile (z, tx, ty)."""
+    level = pyramid['levels'][z + TILE_BITS]
+    prefix = int(morton(np.uint64(tx), np.uint64(ty))) << (2 * TILE_BITS)
+    lo = int(np.searchsorted(level['keys'], np.uint32(prefix)))
+    hi = int(np.searchsorted(level['keys'], np.uint32(prefix + (1 << 2 * TILE_BITS) - 1), side='right'))
+    starts = np.asarray(level['starts'][lo:hi + 1])
+    return np.asarray(level['keys'][lo:hi]), starts[:-1], np.diff(starts)
+
+
+def _gather_points(starts, counts):
+    """Point indices of the given runs of the sorted point arrays."""
+    total = int(counts.sum())
+    out_starts = np.cumsum(counts) - counts
+    return np.arange(total) - np.repeat(out_starts, counts) + np.repeat(starts, counts)
+
+
+def _points_payload(pyramid, index, x0, x1, y0, y1):
+    columns = pyramid['columns']
+    x, y = columns['x'][index], columns['y'][index]
+    keep = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+    index = index[keep]
+    return {
+        'kind': 'points',
+        'x': x[keep].astype(np.float64).round(3).tolist(),
+        'y': y[keep].astype(np.float64).round(3).tolist(),
+        'row': columns['row'][index].tolist(),
+        'airline': np.array(CATEGORY_DOMAINS['airline'] + ['?'])[columns['airline'][index]].tolist(),
+        'class': np.array(CATEGORY_DOMAINS['class'] + ['?'])[columns['class'][index]].tolist(),
+    }
+
+
+def viewport(pyramid, x0, x1, y0, y1, max_points=MAX_POINTS):
+    """Raw points or a dense bin-count grid for a data-space viewport; response size is bounded."""
+    ex0, ex1, ey0, ey1 = pyramid['extent']
+    x0, x1, y0, y1 = max(x0, ex0), min(x1, ex1), max(y0, ey0), min(y1, ey1)
+    if x1 < x0 or y1 < y0:
+        return {'kind': 'points', 'x': [], 'y': [], 'row': [], 'airline': [], 'class': [], 'zoom': 0}
+    span = max((x1 - x0) / max(ex1 - ex0, 1e-9), (y1 - y0) / max(ey1 - ey0, 1e-9), 1e-12)
+    z = int(np.clip(np.floor(-np.log2(span)), 0, MAX_ZOOM))
+    level = z + TILE_BITS
+
+    # The (at most 2x2) tiles covering the viewport, then their bins inside it
+    (bx0, bx1), (by0, by1) = (np.clip(np.floor(v), 0, (1 << level) - 1).astype(np.int64)
+                              for v in _to_bins(pyramid, level, [x0, x1], [y0, y1]))
+    parts = [_bins_in_tile(pyramid, z, tx, ty)
+             for tx in range(bx0 >> TILE_BITS, (bx1 >> TILE_BITS) + 1)
+             for ty in range(by0 >> TILE_BITS, (by1 >> TILE_BITS) + 1)]
+    keys, starts, counts = (np.concatenate(arrays) for arrays in zip(*parts))
+    bx, by = unmorton(keys)
+    inside = (bx >= bx0) & (bx <= bx1) & (by >= by0) & (by <= by1)
+    bx, by, starts, counts = bx[inside], by[inside], starts[inside], counts[inside]
+
+    if counts.sum() <= max_points:
+        payload = _points_payload(pyramid, _gather_points(starts, counts), x0, x1, y0, y1)
+    else:
+        grid = np.zeros((by1 - by0 + 1, bx1 - bx0 + 1), dtype=np.int64)
+        grid[by - by0, bx - bx0] = counts
+        dx, dy = (ex1 - ex0) / (1 << level), (ey1 - ey0) / (1 << level)
+        payload = {'kind': 'bins', 'x0': ex0 + (bx0 + 0.5) * dx, 'dx': dx, 'y0': ey0 + (by0 + 0.5) * dy, 'dy': dy,
+                   'z': np.where(grid > 0, grid, -1).tolist(), 'count': int(counts.sum())}
+    payload['zoom'] = z
+    return payload
+
+
+def tile(pyramid, z, tx, ty, max_points=MAX_POINTS):
+    """One tile: sparse bin counts (bin x, bin y within the tile), or raw points when it is small enough."""
+    if not 0 <= z <= MAX_ZOOM:
+        raise ValueError(f"Zoom {z} outside 0-{MAX_ZOOM}")
+    if not (0 <= tx < 1 << z and 0 <= ty < 1 << z):
+        raise ValueError(f"No tile ({tx}, {ty}) at zoom {z}: tx and ty must be 0-{(1 << z) - 1}")
+    keys, starts, counts = _bins_in_tile(pyramid, z, tx, ty)
+    if counts.sum() <= max_points or z == MAX_ZOOM:
+        index = _gather_points(starts, counts)[:max_points]
+        return _points_payload(pyramid, index, -np.inf, np.inf, -np.inf, np.inf)
+    bx, by = unmorton(keys)
+    mask = (1 << TILE_BITS) - 1
+    return {'kind': 'bins', 'bx': (bx & mask).tolist(), 'by': (by & mask).tolist(), 'count': counts.tolist()}
+
+
+VIEWER = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>Zoomable Flight Scatter</title>
+<script src="/plotly.js"></script>
+<style>body { font-family: 'Segoe UI', Tahoma, sans-serif; margin: 16px; } #info { color: #7f8c8d; }</style>
+</head><body>
+<select id="plot"><option value="duration">Price vs Duration</option><option value="days_left">Price vs Days Left</option></select>
+<span id="info"></span>
+<div id="chart" style="height: 85vh;"></div>
+<script>
+const chart = document.getElementById('chart'), info = document.getElementById('info');
+const META = __META__;
+let plot = 'duration';
+
+async function load(x0, x1, y0, y1) {
+    const started = performance.now();
+    const data = await (await fetch(`/viewport?plot=${plot}&x0=${x0}&x1=${x1}&y0=${y0}&y1=${y1}`)).json();
+    const trace = data.kind === 'points'
+        ? {type: 'scattergl', mode: 'markers', x: data.x, y: data.y, customdata: data.row,
+           text: data.airline.map((a, i) => a + ' · ' + data['class'][i]), marker: {size: 4, opacity: 0.6},
+           hovertemplate: '%{text}<br>x=%{x}<br>$%{y:,.0f}<br>row %{customdata}<extra></extra>'}
+        : {type: 'heatmap', z: data.z.map(r => r.map(v => v < 0 ? null : Math.log10(v))), x0: data.x0, dx: data.dx,
+           y0: data.y0, dy: data.dy, colorscale: 'Viridis', colorbar: {title: 'log10 flights'},
+           hovertemplate: 'x=%{x:.2f}<br>$%{y:,.0f}<br>10^%{z:.1f} flights<extra></extra>'};
+    Plotly.react(chart, [trace], {
+        template: 'plotly_white', title: {text: META[plot].title, font: {size: 20}},
+        xaxis: {title: META[plot].x, range: [x0, x1]}, yaxis: {title: 'Price ($)', range: [y0, y1]}
+    });
+    const shown = data.kind === 'points' ? `${data.x.length.toLocaleString()} flights` : `${data.count.toLocaleString()} flights in bins`;
+    info.textContent = ` zoom ${data.zoom} · ${shown} · ${(performance.now() - started).toFixed(0)} ms`;
+}
+
+function reset() { const e = META[plot].extent; return load(e[0], e[1], e[2], e[3]); }
+
+document.getElementById('plot').onchange = event => { plot = event.target.value; reset(); };
+reset().then(() => chart.on('plotly_relayout', event => {
+    if (event['xaxis.autorange'] || event['yaxis.autorange']) return reset();
+    const x = chart.layout.xaxis.range, y = chart.layout.yaxis.range;
+    if ('xaxis.range[0]' in event || 'yaxis.range[0]' in event) load(x[0], x[1], y[0], y[1]);
+}));
+</script></body></html>
+"""
+
+
+def make_handler(pyramids):
+    meta = {plot: {'title': f"{y.title()} vs {x.replace('_', ' ').title()}", 'x': x.replace('_', ' ').title(),
+                   'extent': pyramids[plot]['extent']} for plot, (x, y) in PLOTS.items()}
+    page = VIEWER.replace('__META__', json.dumps(meta)).encode('utf-8')
+    plotly_js = get_plotlyjs().encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, body, content_type='application/json'):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                if url.path == '/':
+                    return self._send(page, 'text/html; charset=utf-8')
+                if url.path == '/plotly.js':
+                    return self._send(plotly_js, 'application/javascript')
+                if url.path == '/viewport':
+                    payload = viewport(pyramids[query['plot']], *(float(query[k]) for k in ('x0', 'x1', 'y0', 'y1')),
+                                       # A client may ask for fewer points, never more
+                                       max_points=min(max(int(query.get('max_points', MAX_POINTS)), 0), MAX_POINTS))
+                elif url.path.startswith('/tile/'):
+                    plot, z, tx, ty = url.path.split('/')[2:6]
+                    payload = tile(pyramids[plot], int(z), int(tx), int(ty))
+                else:
+                    return self.send_error(404)
+            except (KeyError, ValueError, IndexError) as error:
+                return self.send_error(400, str(error))
+            self._send(json.dumps(payload).encode('utf-8'))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve zoomable full-data scatter plots from a tile pyramid')
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--build-only', action='store_true')
+    args = parser.parse_args()
+
+    print("🔭 TILE PYRAMID")
+    print("="*60)
+    start = time.perf_counter()
+    pyramids = build_pyramids(args.data)
+    print(f"📦 {pyramids['duration']['points']:,} points, zoom levels 0-{MAX_ZOOM}, "
+          f"ready in {time.perf_counter() - start:.2f}s")
+    if args.build_only:
+        return
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(pyramids))
+    print(f"🌐 Serving on http://localhost:{args.port}/ (viewport responses ≤ {MAX_POINTS:,} points)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()